@@ -0,0 +1,115 @@
+"""Quản lý asset dùng chung: mỗi ảnh chỉ load + convert + scale 1 lần cho mọi scene.
+
+Cache theo (đường dẫn, kích thước, alpha, smooth). Ảnh không load được cũng được ghi nhớ
+(None) để các scene gọi mỗi frame không phải thử đọc lại file thiếu.
+Surface trả về dùng chung - không sửa trực tiếp (set_alpha, fill...), cần thì copy() trước.
+
+Ảnh đã decode sẵn ở thread khác (preloader.py) được đưa vào qua provide(); image() khi đó
+chỉ còn bước convert/scale trên main thread thay vì đọc + giải nén PNG.
+Có atlas (atlas.py) thì sprite nhỏ (alpha + smoothscale) lấy thẳng từ sheet, không cần ảnh gốc.
+"""
+from typing import Dict, Optional, Tuple
+
+import pygame
+
+
+class AssetManager:
+    def __init__(self):
+        self._images: Dict[Tuple, Optional[pygame.Surface]] = {}
+        self._decoded: Dict[str, Optional[pygame.Surface]] = {}  # Ảnh đã decode, chưa convert
+        self._sounds: Dict[str, Optional[pygame.mixer.Sound]] = {}
+        self.atlas = None
+        self.hits = 0
+        self.misses = 0
+
+    def use_atlas(self, atlas):
+        self.atlas = atlas
+
+    def image(self, path: str, size: Optional[Tuple[int, int]] = None,
+              alpha: bool = True, smooth: bool = True) -> Optional[pygame.Surface]:
+        """Ảnh đã convert (convert_alpha nếu alpha) và scale về size (smoothscale nếu smooth); None nếu lỗi."""
+        key = (path, tuple(size) if size else None, alpha, smooth if size else True)
+        if key in self._images:
+            self.hits += 1
+            return self._images[key]
+        self.misses += 1
+        img = None
+        if size and alpha and smooth and self.atlas is not None:
+            img = self.atlas.get(path, size)
+            if img is not None:
+                self._images[key] = img
+                return img
+        try:
+            if size:
+                base = self.image(path, None, alpha)  # Ảnh gốc cũng được cache (scale nhiều cỡ)
+                if base is not None:
+                    img = (pygame.transform.smoothscale if smooth else pygame.transform.scale)(base, size)
+            else:
+                raw = self._decoded[path] if path in self._decoded else pygame.image.load(path)
+                if raw is not None:
+                    img = raw.convert_alpha() if alpha else raw.convert()
+        except Exception:
+            img = None
+        self._images[key] = img
+        return img
+
+    def source_size(self, path: str) -> Optional[Tuple[int, int]]:
+        """Cỡ ảnh gốc; lấy từ index atlas nếu có để khỏi decode ảnh lớn chỉ để đo."""
+        if self.atlas is not None and self.atlas.covers(path):
+            return self.atlas.source_sizes[path]
+        base = self.image(path)
+        return base.get_size() if base is not None else None
+
+    def needs_load(self, path: str, size: Optional[Tuple[int, int]] = None,
+                   alpha: bool = True, smooth: bool = True) -> bool:
+        """False nếu image(...) đã có sẵn - trong cache, hoặc atlas có sẵn bản scale (ảnh gốc khi đó
+        chỉ cần để scale sang cỡ khác nên không preload)."""
+        if (path, tuple(size) if size else None, alpha, smooth if size else True) in self._images:
+            return False
+        if self.atlas is not None and alpha and smooth:
+            return not (self.atlas.get(path, size) if size else self.atlas.covers(path))
+        return True
+
+    def atlas_candidates(self, max_side: int):
+        """Các sprite đã scale (alpha + smoothscale, cạnh <= max_side) đang cache -> (ảnh, cỡ ảnh gốc) để build atlas."""
+        images, source_sizes = {}, {}
+        for (path, size, alpha, smooth), img in list(self._images.items()):
+            if img is None or size is None or not (alpha and smooth) or max(size) > max_side:
+                continue
+            images[(path, size)] = img
+            src = self.source_size(path)
+            source_sizes[path] = src if src else size
+        return images, source_sizes
+
+    def sound(self, path: str) -> Optional[pygame.mixer.Sound]:
+        """Sound đã decode (dùng chung); None nếu lỗi hoặc mixer chưa init."""
+        if path not in self._sounds:
+            try:
+                self._sounds[path] = pygame.mixer.Sound(path)
+            except Exception:
+                self._sounds[path] = None
+        return self._sounds[path]
+
+    def provide(self, path: str, surface: Optional[pygame.Surface]):
+        """Nhận ảnh đã decode (chưa convert) từ preloader; None = file lỗi."""
+        self._decoded[path] = surface
+
+    def provide_sound(self, path: str, sound: Optional[pygame.mixer.Sound]):
+        self._sounds.setdefault(path, sound)
+
+    def drop_decoded(self):
+        """Bỏ các bản decode thô sau khi đã convert xong (chúng chiếm nhiều RAM)."""
+        self._decoded.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._images)}
+
+    def clear(self):
+        self._images.clear()
+        self.atlas = None
+        self._decoded.clear()
+        self._sounds.clear()
+
+
+# Cache dùng chung cho toàn game
+assets = AssetManager()
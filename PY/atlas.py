@@ -0,0 +1,109 @@
+"""Texture atlas: gom các sprite nhỏ đã scale (tile, decor, tower, enemy) vào vài sheet PNG + index JSON.
+
+Ảnh gốc của tower/enemy/decor là PNG vài trăm KB - vài MB nhưng trong game chỉ dùng ở cỡ ~50px.
+Lần chạy đầu AssetManager vẫn decode + scale từ ảnh gốc, sau đó Game ghi các bản đã scale ra
+atlas; các lần sau chỉ decode 1 sheet nhỏ. Mỗi vùng trong sheet là subsurface nên blit như Surface
+thường (kể cả trong Surface.blits). Entry có file gốc đã đổi (mtime/size) bị bỏ qua khi load.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+AtlasKey = Tuple[str, Tuple[int, int]]  # (đường dẫn ảnh gốc, cỡ đã scale)
+INDEX_FILE = "atlas.json"
+
+
+def _source_stamp(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def pack_shelves(sizes: Dict[AtlasKey, Tuple[int, int]], sheet_size: int,
+                 padding: int = 1) -> List[Dict[AtlasKey, pygame.Rect]]:
+    """Xếp hình chữ nhật theo kệ (shelf): cao trước, trái sang phải, hết chỗ thì sang kệ/sheet mới."""
+    sheets: List[Dict[AtlasKey, pygame.Rect]] = []
+    x = y = shelf_h = 0
+    for key, (w, h) in sorted(sizes.items(), key=lambda kv: (-kv[1][1], -kv[1][0], kv[0])):
+        if w > sheet_size or h > sheet_size:
+            continue  # Quá lớn cho 1 sheet - để AssetManager load riêng như cũ
+        if not sheets or x + w > sheet_size:
+            x, y, shelf_h = 0, y + shelf_h, 0
+        if not sheets or y + h > sheet_size:
+            sheets.append({})
+            x = y = shelf_h = 0
+        sheets[-1][key] = pygame.Rect(x, y, w, h)
+        x += w + padding
+        shelf_h = max(shelf_h, h + padding)
+    return sheets
+
+
+class TextureAtlas:
+    def __init__(self):
+        self.sheets: List[pygame.Surface] = []
+        self.regions: Dict[AtlasKey, pygame.Surface] = {}
+        self.source_sizes: Dict[str, Tuple[int, int]] = {}  # Cỡ ảnh gốc (decor chọn cỡ scale theo nó)
+        self._entries: List[dict] = []
+
+    def get(self, path: str, size: Tuple[int, int]) -> Optional[pygame.Surface]:
+        return self.regions.get((path, tuple(size)))
+
+    def covers(self, path: str) -> bool:
+        return path in self.source_sizes
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    @classmethod
+    def build(cls, images: Dict[AtlasKey, pygame.Surface], source_sizes: Dict[str, Tuple[int, int]],
+              sheet_size: int = 1024) -> "TextureAtlas":
+        atlas = cls()
+        layout = pack_shelves({k: img.get_size() for k, img in images.items()}, sheet_size)
+        for idx, rects in enumerate(layout):
+            used_h = max(r.bottom for r in rects.values())
+            sheet = pygame.Surface((sheet_size, used_h), pygame.SRCALPHA)
+            for key, rect in rects.items():
+                # MAX trên nền (0,0,0,0) = chép nguyên RGBA, không trộn alpha
+                sheet.blit(images[key], rect, special_flags=pygame.BLEND_RGBA_MAX)
+            atlas.sheets.append(sheet)
+            for (path, size), rect in rects.items():
+                atlas.regions[(path, size)] = sheet.subsurface(rect)
+                atlas.source_sizes[path] = tuple(source_sizes.get(path, size))
+                atlas._entries.append({"path": path, "size": list(size), "sheet": idx,
+                                       "rect": [rect.x, rect.y, rect.w, rect.h],
+                                       "source_size": list(atlas.source_sizes[path]),
+                                       "stamp": _source_stamp(path)})
+        return atlas
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        names = []
+        for idx, sheet in enumerate(self.sheets):
+            names.append(f"sheet_{idx}.png")
+            pygame.image.save(sheet, os.path.join(directory, names[-1]))
+        with open(os.path.join(directory, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump({"sheets": names, "entries": self._entries}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["TextureAtlas"]:
+        """Đọc atlas đã build (cần display đã set_mode để convert_alpha); None nếu chưa có/hỏng."""
+        try:
+            with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as f:
+                index = json.load(f)
+            atlas = cls()
+            atlas.sheets = [pygame.image.load(os.path.join(directory, name)).convert_alpha()
+                            for name in index["sheets"]]
+        except Exception:
+            return None
+        for entry in index["entries"]:
+            if entry.get("stamp") is None or entry["stamp"] != _source_stamp(entry["path"]):
+                continue  # Ảnh gốc đã đổi/mất - để AssetManager load lại, lần sau build lại atlas
+            size = tuple(entry["size"])
+            atlas.regions[(entry["path"], size)] = atlas.sheets[entry["sheet"]].subsurface(pygame.Rect(entry["rect"]))
+            atlas.source_sizes[entry["path"]] = tuple(entry["source_size"])
+            atlas._entries.append(entry)
+        return atlas
@@ -0,0 +1,123 @@
+"""Chạy hàng loạt trận headless song song trên nhiều process để cân bằng level/tower.
+
+Mỗi job là 1 tổ hợp (level, mode, layout, seed). Kết quả được ghi dần ra CSV (mỗi job
+1 dòng, flush ngay) nên có thể theo dõi / dừng giữa chừng khi chạy qua đêm.
+
+Ví dụ:
+    python batch_sim.py --levels 1-15 --modes Easy,Normal,Hard --seeds 10 -o balance.csv
+    python batch_sim.py --levels 1-20 --towers gun,sniper,splash --count 8 --workers 4
+    python batch_sim.py --levels 5 --layout my_layout.json --seeds 50
+
+Layout mặc định: với mỗi loại trong TOWER_DEFS (hoặc --towers), đặt --count tower loại đó
+vào các ô sát đường đi (giống headless.py --auto TYPE:N). Cột stars tính giống handle_level_clear.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import csv
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+from config import MODE_PARAMS, TOWER_DEFS
+from headless import simulate, load_layout
+
+CSV_FIELDS = [
+    "level", "mode", "layout", "seed", "result", "reason", "wave", "max_waves",
+    "kills", "lives_lost", "money", "money_spent", "towers", "skipped_towers", "stars",
+    "ticks", "sim_seconds", "wall_seconds", "ticks_per_sec",
+]
+
+
+def parse_levels(text: str) -> List[int]:
+    """'1-15,20,25-27' -> [1..15, 20, 25, 26, 27]."""
+    levels = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, sep, hi = part.partition("-")
+        levels.extend(range(int(lo), int(hi) + 1) if sep else [int(lo)])
+    return levels
+
+
+def build_jobs(levels: List[int], modes: List[str], layouts: Dict[str, dict],
+               seeds: int, seed_base: int) -> List[Tuple]:
+    return [(level, mode, name, layout, seed_base + s)
+            for level in levels for mode in modes
+            for name, layout in layouts.items() for s in range(seeds)]
+
+
+def _run_job(job: Tuple) -> Dict:
+    """Chạy trong process con: 1 trận headless -> 1 dòng CSV."""
+    level, mode, name, layout, seed = job
+    res = simulate(level, mode, layout=layout.get("towers"), auto=layout.get("auto"),
+                   max_minutes=layout.get("max_minutes", 30.0), seed=seed)
+    res["layout"] = name
+    res["seed"] = seed
+    return res
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Chạy mô phỏng cân bằng song song (không cửa sổ).")
+    ap.add_argument("--levels", default="1-15", help="vd 1-15 hoặc 1-20 (level > 15 là map procedural)")
+    ap.add_argument("--modes", default=",".join(MODE_PARAMS), help="danh sách mode, cách nhau bởi dấu phẩy")
+    ap.add_argument("--towers", default=",".join(TOWER_DEFS), help="loại tower cho layout tự động")
+    ap.add_argument("--count", type=int, default=6, help="số tower mỗi layout tự động")
+    ap.add_argument("--layout", action="append", default=[], help="thêm layout từ file JSON (lặp lại được)")
+    ap.add_argument("--seeds", type=int, default=5, help="số seed mỗi tổ hợp")
+    ap.add_argument("--seed-base", type=int, default=0)
+    ap.add_argument("--max-minutes", type=float, default=30.0, help="giới hạn thời gian game mỗi trận")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("-o", "--output", default="batch_results.csv")
+    args = ap.parse_args(argv)
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    for m in modes:
+        if m not in MODE_PARAMS:
+            ap.error(f"mode không hợp lệ: {m}")
+    layouts: Dict[str, dict] = {}
+    for ttype in (t.strip() for t in args.towers.split(",") if t.strip()):
+        if ttype not in TOWER_DEFS:
+            ap.error(f"tower không hợp lệ: {ttype}")
+        layouts[f"auto:{ttype}:{args.count}"] = {"auto": [f"{ttype}:{args.count}"]}
+    for path in args.layout:
+        layouts[os.path.basename(path)] = {"towers": load_layout(path)}
+    for layout in layouts.values():
+        layout["max_minutes"] = args.max_minutes
+
+    jobs = build_jobs(parse_levels(args.levels), modes, layouts, args.seeds, args.seed_base)
+    print(f"{len(jobs)} trận, {args.workers} process -> {args.output}", file=sys.stderr)
+
+    wins = defaultdict(lambda: [0, 0])  # (level, mode, layout) -> [thắng, tổng]
+    t0 = time.perf_counter()
+    done = 0
+    with open(args.output, "w", newline="", encoding="utf-8") as f, \
+            ProcessPoolExecutor(max_workers=args.workers) as ex:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        futures = [ex.submit(_run_job, job) for job in jobs]
+        for fut in as_completed(futures):
+            res = fut.result()
+            writer.writerow(res)
+            f.flush()
+            key = (res["level"], res["mode"], res["layout"])
+            wins[key][0] += res["result"] == "win"
+            wins[key][1] += 1
+            done += 1
+            if done % 50 == 0 or done == len(jobs):
+                print(f"  {done}/{len(jobs)} ({time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+
+    # Tóm tắt tỉ lệ thắng theo (level, mode, layout)
+    for (level, mode, name), (w, n) in sorted(wins.items()):
+        print(f"L{level:<3} {mode:<6} {name:<24} thắng {w}/{n}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
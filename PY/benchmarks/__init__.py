@@ -0,0 +1,4 @@
+"""Bộ benchmark hiệu năng: kịch bản tải cố định (scenarios), đo + so baseline (runner), CLI (__main__).
+
+Chạy trong thư mục PY: python -m benchmarks  (xem benchmarks/__main__.py).
+"""
@@ -0,0 +1,110 @@
+"""Chạy bộ benchmark và so với baseline đã lưu (chạy trong thư mục PY).
+
+Ví dụ:
+    python -m benchmarks                          # Mọi scenario, so với benchmarks/baseline.json
+    python -m benchmarks permanent_wave50 splash_heavy --repeat 5
+    python -m benchmarks --list
+    python -m benchmarks --update-baseline        # Ghi lại baseline (sau khi cố ý đổi hiệu năng/gameplay)
+    python -m benchmarks -o result.json           # Lưu kết quả lần chạy này
+
+Trả về mã thoát 1 nếu có scenario chậm đi / cấp phát nhiều hơn quá ngưỡng, state trận khác
+baseline, hoặc 1 kiểm tra nhanh trong benchmarks/checks.py không đạt. Số đo thời gian phụ thuộc máy: baseline chỉ có ý nghĩa khi ghi trên cùng máy (thông tin
+máy được lưu kèm và cảnh báo nếu khác).
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import sys
+
+from benchmarks.checks import run_checks
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.runner import machine_info, run_all, compare
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def _report(scn, res):
+    unit = "frame" if scn.kind == "render" else "tick"
+    print(f"{scn.name:<18} {res['per_sec']:>9.1f} {unit}/s  avg {res['ms_avg']:.3f} ms  p99 {res['ms_p99']:.3f} ms  "
+          f"alloc {res['alloc_kib_avg']:.1f} KiB/{unit} (max {res['alloc_kib_max']:.1f})  "
+          f"peak {res['peak_kib']:.0f} KiB  {res['state']['enemies']} enemy"
+          + ("" if res["deterministic"] else "  [KHÔNG tất định]"))
+    sys.stdout.flush()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark mô phỏng và render với kịch bản tải cố định.")
+    ap.add_argument("scenarios", nargs="*", help="tên scenario (bỏ trống = tất cả)")
+    ap.add_argument("--list", action="store_true", help="liệt kê scenario rồi thoát")
+    ap.add_argument("--repeat", type=int, default=3, help="số lượt đo thời gian (mỗi tick lấy lần nhanh nhất)")
+    ap.add_argument("--baseline", default=BASELINE_FILE)
+    ap.add_argument("--update-baseline", action="store_true", help="ghi kết quả lần này làm baseline")
+    ap.add_argument("--time-tolerance", type=float, default=0.20, help="ngưỡng chậm đi (0.20 = 20%%)")
+    ap.add_argument("--mem-tolerance", type=float, default=0.10, help="ngưỡng cấp phát/bộ nhớ tăng")
+    ap.add_argument("-o", "--output", help="ghi kết quả (JSON) ra file")
+    args = ap.parse_args(argv)
+
+    if args.list:
+        for scn in SCENARIOS.values():
+            print(f"{scn.name:<18} [{scn.kind}] {scn.description}")
+        return 0
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        ap.error(f"scenario không tồn tại: {', '.join(unknown)} (xem --list)")
+    selected = [SCENARIOS[name] for name in args.scenarios] or list(SCENARIOS.values())
+
+    failed = False
+    for name, error in run_checks():
+        print(f"check {name:<26} " + ("ok" if error is None else f"FAIL: {error}"))
+        failed |= error is not None
+    sys.stdout.flush()
+
+    results = run_all(selected, args.repeat, report=_report)
+    data = {"machine": machine_info(), "scenarios": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    if args.update_baseline:
+        if os.path.exists(args.baseline):  # Chỉ chạy vài scenario thì giữ số cũ của các scenario còn lại
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                old = json.load(f)
+            data["scenarios"] = {**old.get("scenarios", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Đã ghi baseline: {args.baseline}")
+        return 1 if failed else 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Chưa có baseline ({args.baseline}) - chạy lại với --update-baseline để tạo.")
+        return 1 if failed else 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != data["machine"]:
+        print("Cảnh báo: baseline được ghi trên máy/phiên bản khác, số đo thời gian có thể lệch:")
+        print(f"  baseline: {baseline.get('machine')}")
+        print(f"  hiện tại: {data['machine']}")
+
+    print(f"\nSo với baseline (thời gian ±{args.time_tolerance:.0%}, bộ nhớ ±{args.mem_tolerance:.0%}):")
+    for name, res in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"  {name:<18} (chưa có trong baseline)")
+            continue
+        for metric, old, new, status in compare(res, base, args.time_tolerance, args.mem_tolerance):
+            if status == "CHANGED":
+                print(f"  {name:<18} state      {status}: {old} -> {new}")
+            else:
+                change = (new - old) / old if old else 0.0
+                print(f"  {name:<18} {metric:<14} {old:>10} -> {new:<10} {change:+7.1%}  {status}")
+            failed |= status in ("REGRESSION", "CHANGED")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
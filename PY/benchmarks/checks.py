@@ -0,0 +1,54 @@
+"""Kiểm tra nhanh hành vi (không đo thời gian), chạy trước các scenario: sai thì CLI trả mã thoát 1.
+
+Mỗi hàm kiểm tra trả về None nếu đạt, ngược lại là chuỗi mô tả chỗ sai.
+"""
+from typing import Callable, List, Optional, Tuple
+
+from config import (
+    QUALITY_ORDER, QUALITY_WINDOW_FRAMES, QUALITY_DOWNGRADE_RATIO, QUALITY_UPGRADE_RATIO, QUALITY_UPGRADE_WINDOWS,
+)
+from quality import QualityManager
+
+# Đủ số lần đánh giá để cả lần nâng chờ lâu nhất (gấp 8) cũng kịp xảy ra
+_WINDOWS = QUALITY_UPGRADE_WINDOWS * 8 + 1
+
+
+def _run_auto(work_ratio: float, start_tier: Optional[str] = None) -> str:
+    """Tier của QualityManager("auto") sau _WINDOWS lần đánh giá với phần việc = work_ratio * ngân sách frame."""
+    qm = QualityManager("auto")
+    if start_tier:
+        qm.set_tier(start_tier)
+    for _ in range(QUALITY_WINDOW_FRAMES * _WINDOWS):
+        qm.record(qm.budget_ms * work_ratio)
+    return qm.tier
+
+
+def quality_auto_holds_tier() -> Optional[str]:
+    """Auto giữ nguyên tier cao nhất khi phần việc mỗi frame còn trong ngân sách.
+
+    Game.run chỉ gửi thời gian update + draw: ở 60 Hz có vsync cả frame luôn ~16.7 ms (> 90% của
+    ngân sách 16.7 ms) dù phần việc chỉ vài ms - gửi nhầm thời gian cả frame là auto tụt về "minimal".
+    """
+    for ratio in (0.1, QUALITY_UPGRADE_RATIO, QUALITY_DOWNGRADE_RATIO * 0.99):
+        tier = _run_auto(ratio)
+        if tier != QUALITY_ORDER[-1]:
+            return f"phần việc {ratio:.0%} ngân sách frame -> tự hạ xuống {tier}"
+    return None
+
+
+def quality_auto_adapts() -> Optional[str]:
+    """Vượt ngân sách thì hạ dần tới mức thấp nhất; dư nhiều thì nâng dần lại mức cao nhất."""
+    tier = _run_auto(QUALITY_DOWNGRADE_RATIO * 1.5)
+    if tier != QUALITY_ORDER[0]:
+        return f"phần việc vượt ngân sách nhưng dừng ở {tier}"
+    tier = _run_auto(QUALITY_UPGRADE_RATIO * 0.5, start_tier=QUALITY_ORDER[0])
+    if tier != QUALITY_ORDER[-1]:
+        return f"phần việc dư nhiều nhưng chỉ nâng lên {tier}"
+    return None
+
+
+CHECKS: List[Callable[[], Optional[str]]] = [quality_auto_holds_tier, quality_auto_adapts]
+
+
+def run_checks() -> List[Tuple[str, Optional[str]]]:
+    return [(check.__name__, check()) for check in CHECKS]
@@ -0,0 +1,187 @@
+"""Đo 1 Scenario và so kết quả với baseline.
+
+Mỗi scenario được dựng lại từ đầu cho từng lượt đo (cùng seed nên thế giới giống hệt nhau):
+- Lượt thời gian (không bật tracemalloc), lặp `repeat` lần, mỗi tick lấy thời gian nhỏ nhất qua
+  các lượt: kind "sim" đo từng tick _sim_step, kind "render" đo từng lần draw_game (tick update
+  và spawn bù không tính).
+- Lượt bộ nhớ (tracemalloc): mỗi tick/frame ghi lượng cấp phát đỉnh phát sinh trong đúng tick đó
+  (rác tạm: list, tuple, mảng numpy trung gian...), đỉnh bộ nhớ của cả đoạn đo và phần còn giữ lại
+  sau đoạn đo (kèm các dòng code giữ nhiều nhất, chỉ để tham khảo).
+
+`state` là ảnh chụp kết quả trận (kills, tiền, số enemy...) sau đoạn đo: khác baseline nghĩa là hành
+vi mô phỏng đã đổi, số đo thời gian không còn so sánh được 1-1.
+"""
+import os
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import pygame
+
+from config import SAVE_FILE, ACCOUNTS_FILE
+from benchmarks.scenarios import Scenario, build_sim, build_render, top_up, BENCH_LIVES
+
+try:
+    import numpy as np
+except ImportError:  # NumPy không bắt buộc (game tự tắt EnemyPool/particle)
+    np = None
+
+# metric -> (hướng tốt hơn, chênh lệch tuyệt đối bỏ qua) khi so với baseline
+CHECKS = {
+    "per_sec": ("higher", 0.0),
+    "alloc_kib_avg": ("lower", 1.0),
+    "peak_kib": ("lower", 64.0),
+}
+TIME_METRICS = ("per_sec",)  # Dùng ngưỡng thời gian (nhiễu hơn); còn lại dùng ngưỡng bộ nhớ
+
+
+def machine_info() -> Dict[str, str]:
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__ if np is not None else "-",
+    }
+
+
+def _build(scn: Scenario):
+    return build_render(scn) if scn.kind == "render" else build_sim(scn)
+
+
+def _unit(scn: Scenario, world, step) -> Tuple[Callable[[], None], Callable[[], None]]:
+    """(phần chạy trước không đo, phần được đo) của 1 tick/frame."""
+    if scn.kind == "render":
+        def before():
+            top_up(world, scn)
+            step()
+        return before, world.draw_game
+    return (lambda: top_up(world, scn)), step
+
+
+def _state(world) -> Dict[str, int]:
+    return {
+        "wave": world.wave_mgr.wave_no,
+        "kills": world.kills,
+        "money": world.money,
+        "lives_lost": BENCH_LIVES - world.lives,
+        "enemies": len(world.enemies),
+        "projectiles": len(world.projectiles),
+    }
+
+
+def _time_pass(scn: Scenario) -> Tuple[List[float], Dict[str, int]]:
+    world, step = _build(scn)
+    before, measured = _unit(scn, world, step)
+    clock = time.perf_counter
+    times = []
+    for _ in range(scn.ticks):
+        before()
+        t0 = clock()
+        measured()
+        times.append((clock() - t0) * 1000.0)
+    return times, _state(world)
+
+
+def _alloc_pass(scn: Scenario) -> Dict:
+    world, step = _build(scn)
+    before, measured = _unit(scn, world, step)
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        first = tracemalloc.take_snapshot()
+        per_unit, peak = [], 0
+        for _ in range(scn.ticks):
+            before()
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            measured()
+            unit_peak = tracemalloc.get_traced_memory()[1]
+            per_unit.append(unit_peak - current)
+            peak = max(peak, unit_peak - start)
+        retained = tracemalloc.get_traced_memory()[0] - start
+        top = tracemalloc.take_snapshot().compare_to(first, "lineno")
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_kib_avg": round(sum(per_unit) / len(per_unit) / 1024, 2),
+        "alloc_kib_max": round(max(per_unit) / 1024, 2),
+        "peak_kib": round(peak / 1024, 1),
+        "retained_kib": round(retained / 1024, 1),
+        "top_retained": [f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno} "
+                         f"{stat.size_diff / 1024:+.1f} KiB" for stat in top[:5] if stat.size_diff > 0],
+    }
+
+
+def run_scenario(scn: Scenario, repeat: int = 3) -> Dict:
+    """Số đo của scn: per_sec (tick hoặc frame/giây), ms_avg/ms_p99, cấp phát, đỉnh bộ nhớ, state."""
+    runs = [_time_pass(scn) for _ in range(max(1, repeat))]
+    state = runs[0][1]
+    # Các lượt chạy cùng 1 chuỗi tick (cùng seed) -> lấy thời gian nhỏ nhất của từng tick qua các lượt,
+    # loại phần lớn nhiễu do máy bận mà vẫn giữ tick nặng thật sự
+    times = [min(column) for column in zip(*(run[0] for run in runs))]
+    ordered = sorted(times)
+    avg = sum(times) / len(times)
+    result = {
+        "kind": scn.kind,
+        "units": scn.ticks,
+        "per_sec": round(1000.0 / avg, 1) if avg > 0 else 0.0,
+        "ms_avg": round(avg, 4),
+        "ms_p99": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 4),
+        "deterministic": all(run[1] == state for run in runs),
+    }
+    result.update(_alloc_pass(scn))
+    result["state"] = state
+    return result
+
+
+class preserved_files:
+    """Game() đọc/ghi save.json, accounts.json như khi chơi: chụp nội dung trước, trả lại khi đo xong."""
+
+    def __init__(self, *paths: str):
+        self.paths = paths
+        self.saved: Dict[str, bytes] = {}
+
+    def __enter__(self):
+        for path in self.paths:
+            try:
+                with open(path, "rb") as f:
+                    self.saved[path] = f.read()
+            except OSError:
+                pass
+        return self
+
+    def __exit__(self, *exc):
+        for path, data in self.saved.items():
+            with open(path, "wb") as f:
+                f.write(data)
+        return False
+
+
+def run_all(scenarios: List[Scenario], repeat: int = 3, report=None) -> Dict[str, Dict]:
+    results = {}
+    with preserved_files(SAVE_FILE, ACCOUNTS_FILE):
+        for scn in scenarios:
+            results[scn.name] = run_scenario(scn, repeat)
+            if report:
+                report(scn, results[scn.name])
+    return results
+
+
+def compare(result: Dict, base: Dict, time_tolerance: float, mem_tolerance: float) -> List[Tuple[str, float, float, str]]:
+    """[(metric, baseline, hiện tại, trạng thái)]; trạng thái: ok / better / REGRESSION / CHANGED."""
+    rows = []
+    for metric, (better, slack) in CHECKS.items():
+        if metric not in base or metric not in result:
+            continue
+        old, new = base[metric], result[metric]
+        tol = time_tolerance if metric in TIME_METRICS else mem_tolerance
+        if better == "higher":
+            worse, improved = new < old * (1 - tol) - slack, new > old * (1 + tol) + slack
+        else:
+            worse, improved = new > old * (1 + tol) + slack, new < old * (1 - tol) - slack
+        rows.append((metric, old, new, "REGRESSION" if worse else "better" if improved else "ok"))
+    if "state" in base and result.get("state") != base["state"]:
+        rows.append(("state", base["state"], result.get("state"), "CHANGED"))
+    return rows
@@ -0,0 +1,149 @@
+"""Các kịch bản tải cố định cho bộ benchmark: cùng seed, cùng layout tower, cùng lượng enemy.
+
+Mỗi Scenario dựng lại đúng 1 thế giới qua code thật của game (HeadlessGame / Game, WaveManager,
+Enemy, Tower, Projectile): đặt tower, nhảy tới start_wave (hp/tốc độ enemy theo wave đó) rồi giữ
+khoảng `population` enemy trên map - trước mỗi tick, con nào chết/thoát được WaveManager spawn bù
+(ngoài phần đo thời gian). Warmup để enemy dàn đều trên đường rồi mới đo. Mạng được đặt rất lớn
+để trận không dừng giữa chừng, wave cũng không bao giờ hết nên tải ổn định suốt đoạn đo.
+"""
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+from config import SCENE_GAME, SCENE_LOADING, SIM_DT, WIDTH, HEIGHT
+from enemy_pool import EnemyPool, HAS_NUMPY
+from headless import HeadlessGame
+from simulation import SimulationCore, make_tower
+
+BENCH_LIVES = 10**6  # Enemy thoát không làm trận kết thúc trong lúc đo
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    level: int
+    towers: List[str]            # Loại tower, đặt lần lượt vào các ô (lặp lại nếu thiếu)
+    tower_count: int
+    tower_level: int = 1
+    start_wave: int = 1
+    population: int = 0          # Số enemy được giữ trên map (0 = wave bình thường, không spawn bù)
+    warmup_ticks: int = 300
+    ticks: int = 600             # Số tick (hoặc frame với kind="render") được đo
+    mode: str = "Normal"
+    seed: int = 1
+    kind: str = "sim"            # "sim": _sim_step headless; "render": draw_game lên Surface offscreen
+    use_pool: Optional[bool] = None  # None = theo config.USE_ENEMY_POOL; True = EnemyPool (nếu có numpy); False = Enemy thuần Python
+    quality: str = "ultra"       # Tier đồ họa cố định cho kind="render" (auto sẽ tự đổi giữa chừng)
+
+
+SCENARIOS: Dict[str, Scenario] = {s.name: s for s in (
+    Scenario("level15_upgraded", "Level 15, 20 tower cấp 3 đủ loại, wave 12, giữ 120 enemy (EnemyPool)",
+             level=15, towers=["gun", "sniper", "splash", "slow", "poison", "flame", "electric",
+                               "laser", "ice", "minigun", "rocket", "mortar"],
+             tower_count=20, tower_level=3, start_wave=12, population=120, seed=1515, use_pool=True),
+    Scenario("level15_objects", "Như level15_upgraded nhưng không dùng EnemyPool (Enemy.update thuần Python)",
+             level=15, towers=["gun", "sniper", "splash", "slow", "poison", "flame", "electric",
+                               "laser", "ice", "minigun", "rocket", "mortar"],
+             tower_count=20, tower_level=3, start_wave=12, population=120, seed=1515, use_pool=False),
+    Scenario("permanent_wave50", "Map vĩnh viễn, wave 50, giữ 300 enemy, 16 tower cấp 2",
+             level=999, towers=["gun", "minigun", "sniper", "slow", "electric", "laser", "flame", "ice"],
+             tower_count=16, tower_level=2, start_wave=50, population=300, seed=999, use_pool=True),
+    Scenario("splash_heavy", "Level 12, 18 tower mortar/rocket/splash cấp 3, giữ 150 enemy",
+             level=12, towers=["mortar", "rocket", "splash"],
+             tower_count=18, tower_level=3, start_wave=10, population=150, seed=1212, use_pool=True),
+    Scenario("render_level15", "draw_game của level15_upgraded lên Surface offscreen (tier ultra)",
+             level=15, towers=["gun", "sniper", "splash", "slow", "poison", "flame", "electric",
+                               "laser", "ice", "minigun", "rocket", "mortar"],
+             tower_count=20, tower_level=3, start_wave=12, population=120, seed=1515,
+             kind="render", ticks=300),
+)}
+
+
+def place_towers(world: SimulationCore, cells: List[Tuple[int, int]], scn: Scenario):
+    """Đặt scn.tower_count tower (đã nâng tới scn.tower_level) vào các ô đầu tiên của `cells`, không tốn tiền."""
+    for i, (gx, gy) in enumerate(cells[:scn.tower_count]):
+        t = make_tower(gx, gy, scn.towers[i % len(scn.towers)])
+        while t.level < scn.tower_level and t.can_upgrade():
+            t.apply_upgrade()
+        world.towers.append(t)
+        world.occupied.add((gx, gy))
+
+
+def start_wave(world: SimulationCore, scn: Scenario):
+    """Nhảy thẳng tới scn.start_wave; có population thì wave chỉ gồm enemy thường và không bao giờ hết."""
+    wm = world.wave_mgr
+    wm.wave_no = scn.start_wave - 1
+    wm.start_next_wave()
+    if scn.population:
+        wm.is_boss_wave = False  # Boss thoát = thua ngay, trận sẽ dừng giữa lúc đo
+        wm.boss_group = None
+        wm.just_started_boss_wave = False
+        wm.enemies_left_to_spawn = 10**9
+    world.lives = BENCH_LIVES
+
+
+def top_up(world: SimulationCore, scn: Scenario):
+    """Spawn bù (qua WaveManager như trong game) cho đủ scn.population enemy còn sống."""
+    wm = world.wave_mgr
+    for _ in range(scn.population - len(world.enemies)):
+        wm.spawn_timer = 0.0
+        world.enemies.extend(wm.update(0.0))
+
+
+def warmup(world: SimulationCore, step, scn: Scenario):
+    for _ in range(scn.warmup_ticks):
+        top_up(world, scn)
+        step()
+
+
+def build_sim(scn: Scenario):
+    """HeadlessGame đã đặt tower, vào wave và warmup xong; trả về (world, hàm chạy 1 tick)."""
+    random.seed(scn.seed)
+    game = HeadlessGame(scn.mode, scn.level, scn.seed)
+    if scn.use_pool is False and game.enemy_pool is not None:
+        game.enemy_pool = game.wave_mgr.enemy_pool = None
+    elif scn.use_pool and game.enemy_pool is None and HAS_NUMPY:
+        game.enemy_pool = game.wave_mgr.enemy_pool = EnemyPool(events=game.enemy_events)
+    place_towers(game, game.auto_cells(), scn)
+    start_wave(game, scn)
+
+    def step():
+        game._sim_step(SIM_DT)
+    warmup(game, step, scn)
+    return game, step
+
+
+_render_game = None
+
+
+def build_render(scn: Scenario):
+    """Game (display dummy) ở màn chơi của scn, vẽ vào Surface offscreen; trả về (game, hàm update 1 tick).
+
+    Chỉ tạo 1 Game mỗi process (pygame không mở lại được cửa sổ SCALED lần 2), các lượt đo sau
+    dựng lại ván bằng _init_runtime. Game() đọc/ghi save.json như khi chơi thật - runner chụp lại
+    file save quanh cả lần đo.
+    """
+    global _render_game
+    if _render_game is None:
+        import tower_defense  # Chỉ nạp (cửa sổ, asset) khi thật sự đo render
+        _render_game = tower_defense.Game()
+        while _render_game.scene == SCENE_LOADING:
+            _render_game.update(SIM_DT)
+    game = _render_game
+    random.seed(scn.seed)
+    game.scene = SCENE_GAME
+    game._init_runtime(scn.mode, scn.level, seed=scn.seed)
+    game.in_setup_phase = False
+    game.use_dirty_rects = False
+    game.quality.configure(scn.quality)
+    game.screen = pygame.Surface((WIDTH, HEIGHT))
+    place_towers(game, sorted(game.tower_slots), scn)
+    start_wave(game, scn)
+
+    def step():
+        game.update(SIM_DT)  # dt = SIM_DT -> đúng 1 tick mô phỏng mỗi frame
+    warmup(game, step, scn)
+    return game, step
@@ -10,6 +10,61 @@ UI_PANEL_HEIGHT = 100  # Không gian cho panel dưới
 WIDTH = GAME_WIDTH + UI_PANEL_WIDTH    # Tổng chiều rộng màn hình (1240)
 HEIGHT = GAME_HEIGHT + UI_PANEL_HEIGHT  # Tổng chiều cao màn hình (740)
 FPS = 60
+# Mô phỏng bước cố định: mỗi tick luôn dài SIM_DT giây game, tốc độ x2 = nhiều tick hơn mỗi frame
+SIM_TICK_RATE = 60
+SIM_DT = 1.0 / SIM_TICK_RATE
+SIM_MAX_FRAME_TIME = 0.25   # Frame bị treo lâu hơn mức này chỉ tính 0.25s (tránh "spiral of death")
+SIM_MAX_CATCHUP_STEPS = 5   # Số tick tối đa mỗi frame ở tốc độ x1 (nhân theo speed_scale)
+# Màn chơi chỉ vẽ lại/đẩy lên màn hình các vùng thay đổi thay vì flip cả khung hình
+DIRTY_RECT_RENDERING = False
+DIRTY_RECT_MAX_COVERAGE = 0.5  # Vùng bẩn vượt 50% màn hình thì vẽ lại toàn bộ cho rẻ hơn
+# Số Surface chữ đã render giữ trong cache LRU (text_cache.py)
+TEXT_CACHE_SIZE = 1024
+# Sprite enemy/tower xoay sẵn theo số góc này (72 = mỗi 5 độ) và số mức mờ khi fade (sprite_cache.py)
+SPRITE_ROTATION_STEPS = 72
+SPRITE_ALPHA_STEPS = 16
+# Số Surface hình tròn (particle/đạn/glow) giữ trong cache của render_queue.py
+RENDER_DISC_CACHE_SIZE = 4096
+# Particle trang trí (particles.py): số hạt tối đa mỗi hệ và số frame mờ dần được bake sẵn
+GATE_PARTICLE_CAPACITY = 512    # Hạt quanh cổng vào/ra
+# Số pha hình cổng vào/ra được dựng sẵn trong 1 chu kỳ nhịp đập (~1.6 giây)
+GATE_ANIMATION_FRAMES = 48
+EFFECT_PARTICLE_CAPACITY = 1024 # Vụn khi địch chết
+PARTICLE_FRAMES = 16
+# Số sát thương bay lên (floating_text.py): số tối đa cùng lúc, thời gian sống (giây), số chữ số tối đa
+DAMAGE_TEXT_CAPACITY = 128
+DAMAGE_TEXT_DURATION = 1.0
+DAMAGE_TEXT_MAX_DIGITS = 6
+# Mức đồ họa (quality.py): bật/tắt các lớp hiệu ứng; "auto" tự hạ/nâng mức theo thời gian vẽ mỗi frame
+QUALITY_ORDER = ("minimal", "low", "high", "ultra")  # Thấp -> cao
+QUALITY_TIERS = {
+    "ultra":   {"tower_glow": True,  "projectile_glow": True,  "trails": True,  "sparks": True,
+                "poison_fx": True,  "enemy_names": True,  "gate_particles": True,  "death_particles": True},
+    "high":    {"tower_glow": True,  "projectile_glow": False, "trails": True,  "sparks": True,
+                "poison_fx": True,  "enemy_names": True,  "gate_particles": True,  "death_particles": True},
+    "low":     {"tower_glow": False, "projectile_glow": False, "trails": False, "sparks": False,
+                "poison_fx": True,  "enemy_names": False, "gate_particles": True,  "death_particles": True},
+    "minimal": {"tower_glow": False, "projectile_glow": False, "trails": False, "sparks": False,
+                "poison_fx": False, "enemy_names": False, "gate_particles": False, "death_particles": False},
+}
+QUALITY_WINDOW_FRAMES = 60      # Số frame mỗi lần đánh giá (~1 giây)
+QUALITY_DOWNGRADE_RATIO = 0.9   # Trung bình > 90% ngân sách frame (1000/FPS ms) -> hạ 1 mức
+QUALITY_UPGRADE_RATIO = 0.5     # Trung bình < 50% ngân sách ...
+QUALITY_UPGRADE_WINDOWS = 3     # ... liên tiếp 3 lần đánh giá -> nâng 1 mức
+# Log theo nhóm (game_log.py): mức mặc định và mức riêng từng nhóm ("OFF" = tắt hẳn).
+# Nhóm nằm trong vòng mô phỏng (spawn từng enemy, chuyển junction) mặc định tắt.
+# Ghi đè khi chạy bằng biến môi trường, ví dụ: TD_LOG=debug hoặc TD_LOG=spawn=debug,waves=off
+LOG_DEFAULT_LEVEL = "INFO"
+LOG_CATEGORY_LEVELS = {"spawn": "OFF", "path": "OFF"}
+LOG_ENV_VAR = "TD_LOG"
+LOG_FILE = None  # Đường dẫn file log (None = chỉ ghi ra stderr)
+# Profiler màn chơi (profiler.py): F3 bật/tắt overlay, F4 export CSV/JSON vào PROFILE_DIR
+PROFILER_HISTORY_FRAMES = 600    # Số frame gần nhất dùng cho min/avg/p99 và export
+PROFILER_OVERLAY_REFRESH = 0.25  # Giây giữa 2 lần render lại bảng overlay
+PROFILE_DIR = "profiles"
+# Lúc khởi động: decode ảnh/âm thanh ở worker thread, main thread convert dần trong scene loading
+ASYNC_PRELOAD = True
+PRELOAD_FRAME_BUDGET_MS = 8  # Thời gian convert tối đa mỗi frame khi đang loading
 
 # Màu dùng nhanh
 WHITE=(255,255,255); BLACK=(0,0,0); DARK=(40,40,40)
@@ -21,6 +76,11 @@ CYAN=(80,220,220); PINK=(240,120,180); BROWN=(150,110,70); GRAY=(120,120,120)
 ASSETS_DIR = "assets"
 MUSIC_MENU_DIR = os.path.join(ASSETS_DIR, "music", "menu")
 MUSIC_GAME_DIR = os.path.join(ASSETS_DIR, "music", "game")
+# Atlas sprite đã scale (atlas.py): build lần chạy đầu, các lần sau load 1 sheet thay vì PNG gốc
+ATLAS_ENABLED = True
+ATLAS_DIR = os.path.join(ASSETS_DIR, "atlas")
+ATLAS_SHEET_SIZE = 1024
+ATLAS_MAX_SPRITE = 128  # Chỉ gom sprite có cạnh <= 128px (nền map vẫn load riêng)
 SAVE_FILE = "save.json"
 ACCOUNTS_FILE = "accounts.json"
 
@@ -30,6 +90,7 @@ BASE_START_MONEY = 3000
 BASE_START_LIVES = 5
 SELL_REFUND_RATE = 0.5
 PROJECTILE_SPEED = 420
+SPLASH_DAMAGE_MUL = 0.8  # Sát thương lan = damage x 0.8 (target chính nhận đủ damage)
 
 # Định nghĩa các loại trụ
 RANGE_TILES = 2
@@ -69,6 +130,11 @@ TOWER_KEYS = ["gun", "sniper", "splash", "slow"]
 # Tháp mặc định cho người chơi mới (chỉ súng máy - người chơi phải unlock từng súng)
 DEFAULT_LOADOUT = ["gun"]
 
+# Ưu tiên chọn mục tiêu của trụ (đổi bằng phím T khi đang chọn trụ)
+TARGET_PRIORITIES = ["first", "last", "strongest", "closest"]
+TARGET_PRIORITY_NAMES = {"first": "Đầu tiên", "last": "Cuối cùng", "strongest": "Máu nhiều nhất", "closest": "Gần nhất"}
+DEFAULT_TARGET_PRIORITY = "first"
+
 # Nâng cấp trụ (2 cấp)
 TOWER_UPGRADE = [
     {"range":1.15, "firerate":1.25, "damage":1.4,  "cost":120},
@@ -96,6 +162,10 @@ ENEMY_SPAWN_WEIGHTS = {
 
 # Wave
 SPAWN_GAP = 0.8
+# Dùng EnemyPool (NumPy, cập nhật vector hóa) nếu có numpy; False = Enemy object thường.
+# Mặc định tắt: chi phí cố định mỗi lần gọi numpy chỉ được bù khi có ~150+ enemy cùng lúc
+# (xem benchmarks), còn mỗi wave chỉ tối đa 15 enemy (+ nhóm boss) nên Enemy object nhanh hơn
+USE_ENEMY_POOL = False
 WAVE_COOLDOWN = 3.0
 
 # 🆕 Boss level configuration
@@ -143,3 +213,4 @@ SCENE_NAME = 7
 SCENE_AUTH = 8
 SCENE_MAP_PREVIEW = 9
 SCENE_SETTINGS = 10  # Scene cài đặt âm thanh
+SCENE_LOADING = 11   # Màn hình tải asset lúc khởi động
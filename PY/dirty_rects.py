@@ -0,0 +1,87 @@
+"""Dirty-rectangle rendering: chỉ xoá/vẽ lại/đẩy lên màn hình những vùng có thay đổi.
+
+Mỗi frame, Game đánh dấu vùng bao của mọi thứ động (enemy, đạn, hiệu ứng, tower, HUD).
+Vùng của frame trước + frame này được phục hồi từ lớp nền tĩnh, vẽ lại nội dung động,
+rồi pygame.display.update(rects) chỉ đẩy đúng các vùng đó thay vì flip cả màn hình.
+"""
+import math
+from typing import List
+
+import pygame
+
+
+class DirtyRectTracker:
+    """Danh sách rect bẩn của frame trước và frame hiện tại.
+
+    world là vùng vật thể động được phép vẽ vào (map); rect của vật thể bị cắt theo vùng này.
+    """
+
+    def __init__(self, width: int, height: int, world: pygame.Rect, max_coverage: float = 0.5):
+        self.bounds = pygame.Rect(0, 0, width, height)
+        self.world = pygame.Rect(world)
+        self.max_area = int(width * height * max_coverage)
+        self.prev: List[pygame.Rect] = []
+        self.cur: List[pygame.Rect] = []
+        self.once: List[pygame.Rect] = []  # Vẽ lại trọn vẹn trong frame này, frame sau không cần xoá
+        self.area = 0
+        self.full = True  # Frame đầu (hoặc sau khi nền đổi) phải vẽ lại toàn bộ
+
+    def invalidate(self):
+        """Frame tiếp theo vẽ lại và flip toàn màn hình (đổi scene, đổi nền tĩnh, overlay)."""
+        self.full = True
+
+    def begin_frame(self):
+        self.cur = []
+        self.once = []
+        self.area = 0
+
+    def add(self, x: float, y: float, w: float, h: float):
+        """Vùng của 1 vật thể động (cắt theo world), frame sau vẫn phải xoá chỗ cũ."""
+        left, top = math.floor(x), math.floor(y)
+        r = pygame.Rect(left, top, math.ceil(x + w) - left, math.ceil(y + h) - top).clip(self.world)
+        if r.width > 0 and r.height > 0:
+            self.cur.append(r)
+            self.area += r.width * r.height
+
+    def add_once(self, rect: pygame.Rect):
+        """Vùng UI được vẽ lại toàn bộ mỗi khi bẩn (panel HUD)."""
+        r = pygame.Rect(rect).clip(self.bounds)
+        self.once.append(r)
+        self.area += r.width * r.height
+
+    def add_circle(self, cx: float, cy: float, radius: float):
+        self.add(cx - radius, cy - radius, radius * 2, radius * 2)
+
+    def add_points(self, points, margin: float):
+        """Rect bao 1 nhóm điểm (x, y, ...) nới thêm margin mỗi phía."""
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        if xs:
+            self.add(min(xs) - margin, min(ys) - margin,
+                     max(xs) - min(xs) + 2 * margin, max(ys) - min(ys) + 2 * margin)
+
+    def _stale(self) -> List[pygame.Rect]:
+        """Rect của frame trước không trùng rect nào frame này (tower/cổng/HUD đứng yên thì trùng)."""
+        same = {tuple(r) for r in self.cur}
+        return [r for r in self.prev if tuple(r) not in same]
+
+    def needs_full_redraw(self) -> bool:
+        # Quá nhiều vùng bẩn: 1 blit + flip toàn màn hình còn rẻ hơn hàng trăm blit nhỏ
+        return self.full or self.area + sum(r.width * r.height for r in self._stale()) > self.max_area
+
+    def restore(self, screen: pygame.Surface, background: pygame.Surface):
+        """Xoá nội dung động của frame trước và frame này bằng cách chép lại từ nền tĩnh."""
+        self.prev = self._stale()
+        for r in self.prev + self.cur + self.once:
+            screen.blit(background, r, r)
+
+    def present(self):
+        """Đẩy vùng bẩn (cả chỗ vật thể vừa rời đi) lên màn hình."""
+        pygame.display.update(self.prev + self.cur + self.once)
+        self.prev = self.cur
+
+    def present_full(self):
+        """Frame vẽ toàn bộ: flip, và ghi nhớ vùng động để frame sau biết chỗ cần xoá."""
+        pygame.display.flip()
+        self.prev = self.cur
+        self.full = False
@@ -0,0 +1,326 @@
+"""Enemy pool dạng structure-of-arrays (NumPy) - cập nhật toàn bộ enemy trong 1 lần gọi.
+
+Enemy vẫn là object như cũ (PooledEnemy kế thừa Enemy) nhưng các thuộc tính nóng
+(x, y, hp, timers, path, idx...) được đọc/ghi thẳng vào mảng của pool. Code vẽ,
+targeting, projectile... dùng e.hp / e.pos() không cần thay đổi.
+NumPy là tùy chọn: nếu không có thì Game dùng Enemy thường (HAS_NUMPY = False).
+"""
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy không bắt buộc
+    np = None
+
+from entities import Enemy, EnemyEvents, path_cumulative_lengths
+
+HAS_NUMPY = np is not None
+
+# Các thuộc tính Enemy được lưu trong mảng của pool: tên -> dtype
+POOLED_FIELDS = {
+    "x": "f8", "y": "f8", "prev_x": "f8", "prev_y": "f8", "hp": "f8", "max_hp": "f8", "speed": "f8",
+    "slow_mul": "f8", "slow_timer": "f8",
+    "slow_resist": "f8", "regen_rate": "f8", "regen_timer": "f8",
+    "poison_damage": "f8", "poison_timer": "f8", "poison_tick_timer": "f8",
+    "progress": "f8", "_progress_base": "f8",
+    "idx": "i8", "alive": "?", "reached_end": "?",
+}
+
+
+def _pooled_property(name: str):
+    """Property đọc/ghi mảng của pool; khi đã tách khỏi pool thì dùng __dict__."""
+    def fget(self):
+        pool = self._pool
+        if pool is None:
+            return self.__dict__[name]
+        return pool.arrays[name].item(self._slot)
+
+    def fset(self, value):
+        pool = self._pool
+        if pool is None:
+            self.__dict__[name] = value
+        else:
+            pool.arrays[name][self._slot] = value
+    return property(fget, fset)
+
+
+class PooledEnemy(Enemy):
+    """Enemy là view nhẹ vào 1 slot của EnemyPool."""
+
+    def __init__(self, pool: "EnemyPool", *args, **kwargs):
+        self._pool = pool
+        self._slot = pool._alloc(self)
+        super().__init__(*args, **kwargs)
+
+    def _get_path(self):
+        pool = self._pool
+        if pool is None:
+            return self.__dict__["path"]
+        return pool.paths[pool.arrays["path_id"].item(self._slot)]
+
+    def _set_path(self, path):
+        pool = self._pool
+        if pool is None:
+            self.__dict__["path"] = path
+        else:
+            pool.arrays["path_id"][self._slot] = pool.path_id(path)
+
+    path = property(_get_path, _set_path)
+
+    def update(self, dt: float):
+        # Di chuyển được làm vector hóa trong EnemyPool.update
+        if self._pool is None:
+            super().update(dt)
+
+
+for _name in POOLED_FIELDS:
+    setattr(PooledEnemy, _name, _pooled_property(_name))
+
+
+class EnemyPool:
+    """Lưu enemy dạng mảng liên tục và cập nhật bằng phép toán vector."""
+
+    def __init__(self, capacity: int = 128, events: Optional[EnemyEvents] = None):
+        self.capacity = capacity
+        self.events = events  # Enemy chết/thoát trong các phép toán vector được báo vào đây
+        self.arrays = {name: np.zeros(capacity, dtype=dt) for name, dt in POOLED_FIELDS.items()}
+        self.arrays["path_id"] = np.zeros(capacity, dtype="i8")
+        self.used = np.zeros(capacity, dtype=bool)
+        self.views: List[Optional[PooledEnemy]] = [None] * capacity
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        # Bảng waypoint của các path đã đăng ký (đệm tới độ dài path dài nhất)
+        self.paths: List[List[Tuple[float, float]]] = []
+        self._path_ids = {}
+        self._wp = np.zeros((0, 1, 2))
+        self._cum = np.zeros((0, 1))
+        self._path_len = np.zeros(0, dtype="i8")
+
+    # ----- Quản lý slot -----
+    def _alloc(self, view: PooledEnemy) -> int:
+        if not self._free:
+            self._grow(self.capacity * 2)
+        slot = self._free.pop()
+        self.used[slot] = True
+        self.views[slot] = view
+        for arr in self.arrays.values():
+            arr[slot] = 0
+        return slot
+
+    def _grow(self, new_capacity: int):
+        for name, arr in self.arrays.items():
+            grown = np.zeros(new_capacity, dtype=arr.dtype)
+            grown[:self.capacity] = arr
+            self.arrays[name] = grown
+        used = np.zeros(new_capacity, dtype=bool)
+        used[:self.capacity] = self.used
+        self.used = used
+        self.views.extend([None] * (new_capacity - self.capacity))
+        self._free.extend(range(new_capacity - 1, self.capacity - 1, -1))
+        self.capacity = new_capacity
+
+    def spawn(self, path, max_hp, speed, reward, **kwargs) -> PooledEnemy:
+        return PooledEnemy(self, path, max_hp, speed, reward, **kwargs)
+
+    def release(self, enemy: PooledEnemy):
+        """Tách enemy khỏi pool: chép giá trị hiện tại vào object rồi trả slot.
+
+        Projectile / hiệu ứng còn giữ tham chiếu vẫn đọc được trạng thái cuối cùng.
+        """
+        pool = enemy._pool
+        if pool is not self:
+            return
+        slot = enemy._slot
+        snapshot = {name: self.arrays[name].item(slot) for name in POOLED_FIELDS}
+        snapshot["path"] = self.paths[self.arrays["path_id"].item(slot)]
+        enemy._pool = None
+        enemy.__dict__.update(snapshot)
+        self.used[slot] = False
+        self.arrays["alive"][slot] = False
+        self.views[slot] = None
+        self._free.append(slot)
+
+    def clear(self):
+        for slot in np.flatnonzero(self.used):
+            self.release(self.views[slot])
+
+    def _report(self, mask, queue_name: str):
+        """Đẩy view của các slot trong mask vào hàng đợi sự kiện (deaths / escapes)."""
+        if self.events is not None:
+            views = self.views
+            getattr(self.events, queue_name).extend(views[slot] for slot in np.flatnonzero(mask))
+
+    def snapshot_positions(self):
+        """prev_x/prev_y = x/y cho mọi slot (vẽ nội suy giữa 2 tick)."""
+        a = self.arrays
+        np.copyto(a["prev_x"], a["x"])
+        np.copyto(a["prev_y"], a["y"])
+
+    # ----- Path -----
+    def path_id(self, path) -> int:
+        pid = self._path_ids.get(id(path))
+        if pid is not None and self.paths[pid] is path:
+            return pid
+        pid = len(self.paths)
+        self.paths.append(path)
+        self._path_ids[id(path)] = pid
+        self._rebuild_path_tables()
+        return pid
+
+    def _rebuild_path_tables(self):
+        width = max(len(p) for p in self.paths)
+        wp = np.zeros((len(self.paths), width, 2))
+        cum = np.zeros((len(self.paths), width))
+        for i, p in enumerate(self.paths):
+            wp[i, :len(p)] = p
+            wp[i, len(p):] = p[-1]
+            c = path_cumulative_lengths(p)
+            cum[i, :len(c)] = c
+            cum[i, len(c):] = c[-1]
+        self._wp, self._cum = wp, cum
+        self._path_len = np.array([len(p) for p in self.paths], dtype="i8")
+
+    # ----- Targeting vector hóa -----
+    def _pick(self, mask, key, progress):
+        """Slot có key lớn nhất trong mask; hòa thì lấy enemy đi xa nhất (giống duyệt theo progress)."""
+        best = key[mask].max()
+        tied = mask & (key == best)
+        return int(np.argmax(np.where(tied, progress, -np.inf)))
+
+    def select_targets(self, cx: float, cy: float, half_w: float, half_h: float, priority: str):
+        """Tương đương Tower.acquire: trả về (enemy để aim, enemy để bắn) hoặc (None, None)."""
+        a = self.arrays
+        adx = np.abs(a["x"] - cx)
+        ady = np.abs(a["y"] - cy)
+        mask = self.used & a["alive"] & (ady <= half_h) & (adx <= half_w)
+        if not mask.any():
+            return None, None
+        progress = a["progress"]
+        nearest = self._pick(mask, -ady, progress)
+        if priority == "last":
+            key = -progress
+        elif priority == "strongest":
+            key = a["hp"]
+        elif priority == "closest":
+            key = -(adx * adx + ady * ady)
+        else:  # "first"
+            key = progress
+        target = self._pick(mask, key, progress)
+        return self.views[nearest], self.views[target]
+
+    # ----- Sát thương lan vector hóa -----
+    def apply_splash(self, cx: float, cy: float, radius: float, dmg: float, exclude,
+                     slow_mul: float, slow_time: float, poison_damage: float, poison_time: float):
+        """Tương đương Projectile.apply_splash: hit + apply_slow + apply_poison cho mọi enemy trong bán kính."""
+        a = self.arrays
+        dx = a["x"] - cx
+        dy = a["y"] - cy
+        m = self.used & a["alive"] & (dx * dx + dy * dy <= radius * radius)
+        if getattr(exclude, "_pool", None) is self:
+            m[exclude._slot] = False
+        if not m.any():
+            return
+        hp = a["hp"]
+        hp[m] -= dmg
+        died = m & (hp <= 0)
+        if died.any():
+            a["alive"][died] = False
+            self._report(died, "deaths")
+        if slow_time > 0:
+            # Giống Enemy.apply_slow, kể cả kháng slow của tank
+            resist = a["slow_resist"][m]
+            eff_mul = 1.0 - (1.0 - slow_mul) * (1.0 - resist)
+            eff_time = np.where(resist > 0, slow_time * (1.0 - resist * 0.5), slow_time)
+            a["slow_mul"][m] = np.minimum(a["slow_mul"][m], eff_mul)
+            a["slow_timer"][m] = np.maximum(a["slow_timer"][m], eff_time)
+        if poison_time > 0:
+            # Giống Enemy.apply_poison: đang bị độc thì lấy giá trị mạnh hơn, chưa thì gán mới
+            poisoned = a["poison_timer"][m] > 0
+            a["poison_damage"][m] = np.where(poisoned, np.maximum(a["poison_damage"][m], poison_damage), poison_damage)
+            a["poison_timer"][m] = np.where(poisoned, np.maximum(a["poison_timer"][m], poison_time), poison_time)
+            a["poison_tick_timer"][m] = 1.0
+
+    # ----- Cập nhật vector hóa -----
+    def update(self, dt: float):
+        """Tương đương gọi Enemy.update(dt) cho mọi enemy trong pool."""
+        a = self.arrays
+        act = self.used & a["alive"] & ~a["reached_end"]
+        if not act.any():
+            return
+        hp, max_hp = a["hp"], a["max_hp"]
+
+        # 🆕 Regeneration (commander)
+        m = act & (a["regen_rate"] > 0)
+        a["regen_timer"][m] -= dt
+        m &= (a["regen_timer"] <= 0) & (hp < max_hp) & (hp > 0)
+        hp[m] = np.minimum(max_hp[m], hp[m] + a["regen_rate"][m] * dt)
+
+        # Slow
+        m = act & (a["slow_timer"] > 0)
+        a["slow_timer"][m] -= dt
+        a["slow_mul"][m & (a["slow_timer"] <= 0)] = 1.0
+
+        # 🆕 Poison DoT - tick mỗi giây, có thể giết enemy (giống Enemy.hit)
+        m = act & (a["poison_timer"] > 0)
+        a["poison_timer"][m] -= dt
+        a["poison_tick_timer"][m] -= dt
+        tick = m & (a["poison_tick_timer"] <= 0)
+        if tick.any():
+            hp[tick] -= a["poison_damage"][tick]
+            died = tick & (hp <= 0)
+            if died.any():
+                a["alive"][died] = False
+                self._report(died, "deaths")
+            a["poison_tick_timer"][tick] = 1.0
+        done = m & (a["poison_timer"] <= 0)
+        a["poison_damage"][done] = 0.0
+        a["poison_tick_timer"][done] = 0.0
+
+        # Movement (giống Enemy._move: tối đa 1 waypoint mỗi frame)
+        pid, idx, reached = a["path_id"], a["idx"], a["reached_end"]
+        plen = self._path_len[pid]
+        ended = act & (idx >= plen)
+        reached[ended] = True
+        mv = act & ~ended
+        np.maximum(idx, 0, out=idx)
+        tgt = np.minimum(idx, plen - 1)
+        tx, ty = self._wp[pid, tgt, 0], self._wp[pid, tgt, 1]
+        x, y = a["x"], a["y"]
+        dx, dy = tx - x, ty - y
+        dist = np.hypot(dx, dy)
+
+        near = mv & (dist < 1e-6)
+        idx[near] += 1
+        reached[near & (idx >= plen)] = True
+
+        mv &= ~near
+        step = a["speed"] * a["slow_mul"] * dt
+        arrive = mv & (step >= dist)
+        x[arrive] = tx[arrive]
+        y[arrive] = ty[arrive]
+        idx[arrive] += 1
+        reached[arrive & (idx >= plen)] = True
+
+        go = mv & ~arrive
+        safe = np.where(go, dist, 1.0)
+        x[go] += dx[go] / safe[go] * step[go]
+        y[go] += dy[go] / safe[go] * step[go]
+
+        # Vừa tới cuối đường mà còn sống (chết vì độc ở trên thì không tính là thoát)
+        escaped = act & reached & a["alive"]
+        if escaped.any():
+            self._report(escaped, "escapes")
+
+        # 🆕 Junction switch chỉ cho enemy vừa tới waypoint mới (ít, xử lý bằng Python)
+        for slot in np.flatnonzero(arrive & ~reached):
+            view = self.views[slot]
+            if view.junction_paths:
+                view._check_junction_switch()
+
+        # Progress: độ dài cộng dồn tới waypoint đích trừ quãng còn lại
+        pid, idx = a["path_id"], a["idx"]
+        plen = self._path_len[pid]
+        upd = act & ~ended
+        tgt = np.minimum(idx, plen - 1)
+        rem = np.hypot(self._wp[pid, tgt, 0] - x, self._wp[pid, tgt, 1] - y)
+        raw = np.where(idx >= plen, self._cum[pid, plen - 1], self._cum[pid, tgt] - rem)
+        a["progress"][upd] = a["_progress_base"][upd] + raw[upd]
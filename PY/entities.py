@@ -1,11 +1,47 @@
 import math
 import random
-import pygame
 from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
+from collections import deque
+from typing import List, Tuple, Optional, Dict, Deque
 
-from config import PROJECTILE_SPEED, WIDTH, HEIGHT, TOWER_UPGRADE
+from config import (
+    PROJECTILE_SPEED, SPLASH_DAMAGE_MUL, WIDTH, HEIGHT, TOWER_UPGRADE, TILE, GRID_W, GRID_H, H_RANGE_PX,
+    TARGET_PRIORITIES, DEFAULT_TARGET_PRIORITY,
+)
 from utils import grid_to_px
+from particles import ParticleSystem, register_kind
+from game_log import get_logger
+
+path_log = get_logger("path")  # Enemy chuyển junction - trong vòng mô phỏng, mặc định tắt
+
+
+def path_cumulative_lengths(path: List[Tuple[float, float]]) -> List[float]:
+    """Độ dài cộng dồn từ waypoint đầu tới từng waypoint (cum[0] = 0)."""
+    cum = [0.0]
+    for (x1, y1), (x2, y2) in zip(path[:-1], path[1:]):
+        cum.append(cum[-1] + math.hypot(x2 - x1, y2 - y1))
+    return cum
+
+
+class EnemyEvents:
+    """Hàng đợi enemy vừa chết (hp về 0) / vừa thoát (tới cuối đường) kể từ lần xử lý trước.
+
+    Enemy.hit, Enemy.update (và EnemyPool khi cập nhật vector hóa) đẩy enemy vào đúng 1 lần lúc
+    đổi trạng thái. SimulationCore trả thưởng, trừ mạng và dọn list enemy theo các sự kiện này
+    thay vì duyệt toàn bộ enemy mỗi tick.
+    """
+    __slots__ = ("deaths", "escapes")
+
+    def __init__(self):
+        self.deaths: List["Enemy"] = []
+        self.escapes: List["Enemy"] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.deaths or self.escapes)
+
+    def clear(self):
+        self.deaths.clear()
+        self.escapes.clear()
 
 
 @dataclass
@@ -38,13 +74,47 @@ class Enemy:
     junction_paths: Optional[List[List[Tuple[float, float]]]] = None
     switch_count: int = 0       # Số lần đã chuyển path
     last_switch_idx: int = -1   # Waypoint cuối cùng đã switch để tránh switch liên tục
+
+    # 🆕 Path progress - quãng đường liên tục đã đi dọc theo path (px)
+    progress: float = 0.0
+    path_lengths: Optional[Dict[int, List[float]]] = None  # id(path) -> độ dài cộng dồn (từ WaveManager)
+    rng: Optional[random.Random] = None  # Nguồn random khi chuyển junction (None = module random)
+    events: Optional[EnemyEvents] = None  # Nơi báo chết/thoát (None = không báo)
+    # Vị trí ở tick trước - để vẽ nội suy giữa 2 tick mô phỏng
+    prev_x: float = 0.0
+    prev_y: float = 0.0
     
     def __post_init__(self):
         self.x, self.y = self.path[0]
+        self.prev_x, self.prev_y = self.x, self.y
         self.hp = self.max_hp
         self.idx = 1
         self.regen_timer = 1.0  # Bắt đầu regen sau 1 giây
         self.junction_paths = []
+        self._cum_path = None
+        self._cum: List[float] = []
+        self._progress_base = 0.0  # Bù khi chuyển junction để progress không bị nhảy
+        self.progress = 0.0
+
+    def _path_cum(self) -> List[float]:
+        """Độ dài cộng dồn của path hiện tại (lấy từ bảng precompute nếu có)."""
+        if self._cum_path is not self.path:
+            cum = self.path_lengths.get(id(self.path)) if self.path_lengths else None
+            self._cum = cum if cum is not None else path_cumulative_lengths(self.path)
+            self._cum_path = self.path
+        return self._cum
+
+    def _raw_progress(self) -> float:
+        # Đo theo khoảng cách còn lại tới waypoint đích: luôn tăng khi enemy tiến về phía nó
+        cum = self._path_cum()
+        if self.idx >= len(self.path):
+            return cum[-1]
+        i = max(self.idx, 0)
+        tx, ty = self.path[i]
+        return cum[i] - math.hypot(tx - self.x, ty - self.y)
+
+    def update_progress(self):
+        self.progress = self._progress_base + self._raw_progress()
     
     def set_junction_paths(self, junction_paths: List[List[Tuple[float, float]]]):
         """Thiết lập các đường junction mà enemy có thể chuyển sang"""
@@ -102,12 +172,13 @@ class Enemy:
                 best_distance = dist
         
         # Nếu tìm thấy junction phù hợp, thử chuyển
-        if best_junction and random.random() < switch_chance:
+        if best_junction and (self.rng or random).random() < switch_chance:
             i, junction_path, dist = best_junction
-            print(f"🔄 {self.etype.upper()} switching to junction path {i} (switch #{self.switch_count + 1}, dist: {dist:.1f})")
+            path_log.debug("%s switching to junction path %d (switch #%d, dist: %.1f)", self.etype, i, self.switch_count + 1, dist)
             
             # 🔧 SAFETY CHECK: Đảm bảo junction path hợp lệ
             if len(junction_path) >= 2:
+                old_progress = self._progress_base + self._raw_progress()
                 self.path = junction_path
                 # 🔧 Tìm waypoint gần nhất trong junction path thay vì hardcode idx=1
                 closest_idx = 0
@@ -124,10 +195,12 @@ class Enemy:
                 self.idx = min(closest_idx + 1, len(junction_path) - 1)
                 self.switch_count += 1
                 self.last_switch_idx = self.idx
+                # Giữ progress liên tục khi sang path mới
+                self._progress_base = old_progress - self._raw_progress()
                 
-                print(f"   → Started at waypoint {self.idx}/{len(junction_path)-1}, closest was {closest_idx}")
+                path_log.debug("Started at waypoint %d/%d, closest was %d", self.idx, len(junction_path) - 1, closest_idx)
             else:
-                print(f"   ❌ Junction path {i} too short ({len(junction_path)} waypoints), skipping")
+                path_log.debug("Junction path %d too short (%d waypoints), skipping", i, len(junction_path))
 
     def update(self, dt: float):
         if not self.alive or self.reached_end:
@@ -163,14 +236,18 @@ class Enemy:
                 
         # 🔧 MOVEMENT với safety checks
         if self.idx >= len(self.path):
-            self.reached_end = True
+            self._reach_end()
             return
-            
+        self._move(dt)
+        self.update_progress()
+
+    def _move(self, dt: float):
+        """Di chuyển về waypoint hiện tại, tối đa 1 waypoint mỗi lần gọi."""
         # 🔧 Đảm bảo idx không vượt quá path bounds
         if self.idx < 0:
             self.idx = 0
         if self.idx >= len(self.path):
-            self.reached_end = True
+            self._reach_end()
             return
             
         tx, ty = self.path[self.idx]
@@ -182,7 +259,7 @@ class Enemy:
             self.idx += 1
             # 🔧 Check bounds sau khi tăng idx
             if self.idx >= len(self.path):
-                self.reached_end = True
+                self._reach_end()
             return
             
         dirx, diry = dx / dist, dy / dist
@@ -198,18 +275,25 @@ class Enemy:
                 # 🆕 Check junction khi đến waypoint mới
                 self._check_junction_switch()
             else:
-                self.reached_end = True
+                self._reach_end()
         else:
             # Di chuyển về phía waypoint target
             self.x += dirx * step
             self.y += diry * step
 
+    def _reach_end(self):
+        self.reached_end = True
+        if self.alive and self.events is not None:  # Chết vì độc ngay trước đó thì không tính là thoát
+            self.events.escapes.append(self)
+
     def hit(self, dmg: float):
         if not self.alive:
             return False
         self.hp -= dmg
         if self.hp <= 0:
             self.alive = False
+            if self.events is not None:
+                self.events.deaths.append(self)
             return True
         return False
 
@@ -240,191 +324,174 @@ class Enemy:
     def pos(self) -> Tuple[float, float]:
         return self.x, self.y
 
+    def render_pos(self, alpha: float) -> Tuple[float, float]:
+        """Vị trí để vẽ: nội suy giữa tick trước (alpha=0) và tick hiện tại (alpha=1)."""
+        px, py = self.prev_x, self.prev_y
+        return px + (self.x - px) * alpha, py + (self.y - py) * alpha
 
-@dataclass 
-class DamageText:
-    """Hiệu ứng text sát thương bay lên"""
-    x: float
-    y: float
-    damage: int
-    max_duration: float = 1.0
-    time_left: float = 1.0
-    alive: bool = True
-    
-    def __post_init__(self):
-        self.time_left = self.max_duration
-        self.start_y = self.y
-        
-    def update(self, dt: float):
-        if not self.alive:
-            return
-            
-        self.time_left -= dt
-        if self.time_left <= 0:
-            self.alive = False
-            return
-            
-        # Text bay lên và mờ dần
-        self.y = self.start_y - (1 - self.time_left / self.max_duration) * 40
-        
-    def draw(self, screen):
-        if not self.alive:
-            return
-            
-        alpha_factor = self.time_left / self.max_duration
-        alpha = int(255 * alpha_factor)
-        
-        if alpha > 0:
-            # Chọn màu dựa trên sát thương
-            if self.damage >= 100:
-                color = (255, 100, 100)  # Đỏ cho sát thương cao
-            elif self.damage >= 50:
-                color = (255, 200, 100)  # Cam cho sát thương trung bình  
-            else:
-                color = (255, 255, 100)  # Vàng cho sát thương thấp
-                
-            # Vẽ text
-            font = pygame.font.Font(None, 24)
-            text_surface = font.render(str(self.damage), True, color)
-            screen.blit(text_surface, (int(self.x - text_surface.get_width()//2), int(self.y)))
+
+class SpatialGrid:
+    """Lưới bucket theo ô TILE để tra cứu nhanh enemy trong một vùng chữ nhật.
+
+    Build lại 1 lần mỗi frame trong Game.update; tower chỉ duyệt các ô
+    giao với hộp tầm bắn thay vì toàn bộ danh sách enemy.
+    """
+
+    def __init__(self, cell_size: int = TILE, cols: int = GRID_W, rows: int = GRID_H):
+        self.cell_size = cell_size
+        # Thêm 1 ô lề mỗi phía: enemy spawn ở x=-1 và thoát ra ở x=GRID_W
+        self.min_col, self.max_col = -1, cols
+        self.min_row, self.max_row = -1, rows
+        self.rows = [[[] for _ in range(cols + 2)] for _ in range(rows + 2)]
+        self._used: List[List[Enemy]] = []  # Các bucket có dữ liệu, để clear nhanh
+        self.count = 0
+
+    def _col(self, px: float) -> int:
+        c = int(px // self.cell_size)
+        return self.min_col if c < self.min_col else (self.max_col if c > self.max_col else c)
+
+    def _row(self, py: float) -> int:
+        r = int(py // self.cell_size)
+        return self.min_row if r < self.min_row else (self.max_row if r > self.max_row else r)
+
+    def clear(self):
+        for bucket in self._used:
+            bucket.clear()
+        self._used = []
+        self.count = 0
+
+    def rebuild(self, enemies):
+        """Xếp lại toàn bộ enemy còn sống vào bucket theo vị trí hiện tại."""
+        self.clear()
+        rows, used = self.rows, self._used
+        for e in enemies:
+            if not e.alive:
+                continue
+            bucket = rows[self._row(e.y) + 1][self._col(e.x) + 1]
+            if not bucket:
+                used.append(bucket)
+            bucket.append(e)
+        self.count = sum(len(b) for b in used)
+
+    def query_rect(self, cx: float, cy: float, half_w: float, half_h: float) -> List[Enemy]:
+        """Trả về enemy nằm trong các ô giao với hộp (cx±half_w, cy±half_h).
+
+        Kết quả là tập ứng viên (có thể dư) - caller vẫn phải kiểm tra tầm bắn chính xác.
+        """
+        c0, c1 = self._col(cx - half_w) + 1, self._col(cx + half_w) + 1
+        r0, r1 = self._row(cy - half_h) + 1, self._row(cy + half_h) + 1
+        found: List[Enemy] = []
+        for row in self.rows[r0:r1 + 1]:
+            for bucket in row[c0:c1 + 1]:
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+    def __iter__(self):
+        for bucket in self._used:
+            yield from bucket
+
+    def __len__(self):
+        return self.count
+
+
+# Vụn nổ khi địch chết theo loại: (số hạt, khoảng tốc độ, khoảng cỡ hạt, thời gian, màu gốc)
+DEATH_EFFECT_STYLES = {
+    "boss": (12, (80, 200), (3, 8), 1.5, (160, 100, 200)),   # Purple, boss chết lâu hơn
+    "tank": (8, (60, 160), (2, 6), 1.2, (200, 60, 60)),      # Red
+    "fast": (6, (100, 220), (2, 6), 0.8, (120, 200, 120)),   # Green, particles nhanh
+    "normal": (5, (50, 150), (2, 6), 1.0, (140, 140, 120)),  # Gray
+}
+# Hạt đục, màu chuyển dần sang trắng; boss có thêm viền sáng lóa
+DEATH_PARTICLE_KINDS = {
+    etype: register_kind("death_" + etype, [style[4]], style[2][1], fade="white", halo=2 if etype == "boss" else 0)
+    for etype, style in DEATH_EFFECT_STYLES.items()
+}
 
 
 @dataclass
 class DeathEffect:
-    """Hiệu ứng khi địch chết"""
+    """Hiệu ứng khi địch chết: phát 1 lần các hạt vào ParticleSystem dùng chung (hệ tự update/vẽ)."""
     x: float
     y: float
     enemy_type: str
-    max_duration: float = 1.0
-    time_left: float = 1.0
-    particles: Optional[List[dict]] = None
-    alive: bool = True
-    
-    def __post_init__(self):
-        self.time_left = self.max_duration
-        
-        # Tạo particles dựa trên loại địch với hiệu ứng đặc biệt
-        self.particles = []
-        if self.enemy_type == "boss":
-            num_particles = 12
-            speed_range = (80, 200)
-            self.max_duration = 1.5  # Boss chết lâu hơn
-        elif self.enemy_type == "tank":
-            num_particles = 8
-            speed_range = (60, 160)
-            self.max_duration = 1.2
-        elif self.enemy_type == "fast":
-            num_particles = 6
-            speed_range = (100, 220)  # Fast địch chết nhanh với particles nhanh
-            self.max_duration = 0.8
-        else:  # normal
-            num_particles = 5
-            speed_range = (50, 150)
-        
-        self.time_left = self.max_duration
-        
-        for _ in range(num_particles):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(*speed_range)
-            particle_size = random.uniform(3, 8) if self.enemy_type == "boss" else random.uniform(2, 6)
-            self.particles.append({
-                'x': self.x,
-                'y': self.y,
-                'vx': math.cos(angle) * speed,
-                'vy': math.sin(angle) * speed,
-                'life': 1.0,
-                'size': particle_size,
-                'rotation': random.uniform(0, 360),  # Để tạo hiệu ứng xoay
-                'rot_speed': random.uniform(-360, 360)
-            })
-    
-    def update(self, dt: float):
-        if not self.alive:
-            return
-            
-        self.time_left -= dt
-        if self.time_left <= 0:
-            self.alive = False
-            return
-            
-        # Update particles
-        if self.particles:
-            for particle in self.particles:
-                particle['x'] += particle['vx'] * dt
-                particle['y'] += particle['vy'] * dt
-                particle['vy'] += 200 * dt  # Gravity
-                particle['vx'] *= 0.98  # Friction
-                particle['life'] = self.time_left / self.max_duration
-                particle['rotation'] += particle['rot_speed'] * dt
-            
-    def draw(self, screen):
-        if not self.alive:
-            return
-            
-        # Chọn màu dựa trên loại địch
-        if self.enemy_type == "boss":
-            base_color = (160, 100, 200)  # Purple
-        elif self.enemy_type == "tank":
-            base_color = (200, 60, 60)    # Red
-        elif self.enemy_type == "fast":
-            base_color = (120, 200, 120)  # Green
-        else:
-            base_color = (140, 140, 120)  # Gray
-            
-        # Vẽ particles
-        if self.particles:
-            alpha_factor = self.time_left / self.max_duration
-            for particle in self.particles:
-                alpha = int(255 * alpha_factor * particle['life'])
-                if alpha > 0:
-                    size = max(1, int(particle['size'] * alpha_factor))
-                    color = (
-                        min(255, int(base_color[0] + (255 - base_color[0]) * (1 - alpha_factor))),
-                        min(255, int(base_color[1] + (255 - base_color[1]) * (1 - alpha_factor))),
-                        min(255, int(base_color[2] + (255 - base_color[2]) * (1 - alpha_factor)))
-                    )
-                    
-                    # Vẽ particle với hiệu ứng đặc biệt cho boss
-                    try:
-                        if self.enemy_type == "boss":
-                            # Boss có hiệu ứng sáng lóa
-                            pygame.draw.circle(screen, (255, 255, 255), 
-                                             (int(particle['x']), int(particle['y'])), size + 2)
-                        pygame.draw.circle(screen, color, 
-                                         (int(particle['x']), int(particle['y'])), size)
-                    except:
-                        pass  # Ignore if particle is out of screen
+    max_duration: Optional[float] = None  # None = theo loại địch
+
+    def emit(self, system: ParticleSystem):
+        count, speed_range, size_range, duration, _ = DEATH_EFFECT_STYLES.get(self.enemy_type, DEATH_EFFECT_STYLES["normal"])
+        kind = DEATH_PARTICLE_KINDS.get(self.enemy_type, DEATH_PARTICLE_KINDS["normal"])
+        system.emit_burst(kind, self.x, self.y, count, speed_range, size_range,
+                          self.max_duration or duration, gravity=200.0, drag=0.98)
+
+
+# Loại đạn có đuôi (trail) và số điểm trail tối đa
+TRAIL_TYPES = frozenset(("laser", "rocket", "electric", "ice"))
+TRAIL_LENGTH = 10
+# special_data mặc định của đạn điện (được chép vào dict riêng của mỗi đạn)
+ELECTRIC_CHAIN_DATA = {"chain_count": 0, "max_chains": 3}
 
 
-@dataclass
 class Projectile:
-    x: float
-    y: float
-    vx: float
-    vy: float
-    damage: float
-    target: Optional[Enemy]
-    splash: float = 0.0
-    slow_mul: float = 1.0
-    slow_time: float = 0.0
-    poison_damage: float = 0.0  # 🆕 Poison damage per second
-    poison_time: float = 0.0    # 🆕 Poison duration
-    alive: bool = True
-    # 🆕 Các thuộc tính mới cho hiệu ứng đặc biệt
-    projectile_type: str = "basic"  # basic, laser, rocket, electric, poison, flame, ice, etc.
-    trail_points: Optional[List] = None  # Để tạo đuôi đạn
-    rotation: float = 0.0  # Góc xoay của đạn
-    lifetime: float = 0.0  # Thời gian sống
-    max_lifetime: float = 3.0  # Thời gian sống tối đa
-    special_data: Optional[Dict] = None  # Dữ liệu đặc biệt cho từng loại đạn
-    
-    def __post_init__(self):
-        if self.trail_points is None:
-            self.trail_points = []
-        if self.special_data is None:
-            self.special_data = {}
+    """Đạn của tháp. Dùng __slots__ và được tái sử dụng qua ProjectilePool (reset thay vì tạo mới)."""
+
+    __slots__ = (
+        "x", "y", "vx", "vy", "damage", "target",
+        "prev_x", "prev_y",  # Vị trí ở tick trước (vẽ nội suy)
+        "splash", "slow_mul", "slow_time",
+        "poison_damage", "poison_time",  # 🆕 Poison damage per second / duration
+        "alive",
+        # 🆕 Các thuộc tính mới cho hiệu ứng đặc biệt
+        "projectile_type",  # basic, laser, rocket, electric, poison, flame, ice, etc.
+        "trail_points",     # Đuôi đạn: ring buffer (x, y, lifetime), tối đa TRAIL_LENGTH điểm
+        "rotation",         # Góc xoay của đạn
+        "lifetime",         # Thời gian sống
+        "max_lifetime",     # Thời gian sống tối đa
+        "special_data",     # Dữ liệu đặc biệt cho từng loại đạn
+    )
 
-    def update(self, dt: float, enemies: List[Enemy]):
+    def __init__(self, x: float, y: float, vx: float, vy: float, damage: float, target: Optional[Enemy],
+                 **kwargs):
+        self.trail_points: Deque[Tuple[float, float, float]] = deque(maxlen=TRAIL_LENGTH)
+        self.special_data: Dict = {}
+        self.reset(x, y, vx, vy, damage, target, **kwargs)
+
+    def reset(self, x: float, y: float, vx: float, vy: float, damage: float, target: Optional[Enemy],
+              splash: float = 0.0, slow_mul: float = 1.0, slow_time: float = 0.0,
+              poison_damage: float = 0.0, poison_time: float = 0.0, alive: bool = True,
+              projectile_type: str = "basic", rotation: float = 0.0,
+              lifetime: float = 0.0, max_lifetime: float = 3.0, special_data: Optional[Dict] = None):
+        """Gán lại toàn bộ trạng thái; trail và special_data được xóa và dùng lại (không cấp phát mới)."""
+        self.x, self.y, self.vx, self.vy = x, y, vx, vy
+        self.prev_x, self.prev_y = x, y
+        self.damage = damage
+        self.target = target
+        self.splash = splash
+        self.slow_mul = slow_mul
+        self.slow_time = slow_time
+        self.poison_damage = poison_damage
+        self.poison_time = poison_time
+        self.alive = alive
+        self.projectile_type = projectile_type
+        self.rotation = rotation
+        self.lifetime = lifetime
+        self.max_lifetime = max_lifetime
+        self.trail_points.clear()
+        self.special_data.clear()
+        if special_data:
+            self.special_data.update(special_data)
+        return self
+
+    def render_pos(self, alpha: float) -> Tuple[float, float]:
+        """Vị trí để vẽ, nội suy giữa 2 tick mô phỏng gần nhất."""
+        px, py = self.prev_x, self.prev_y
+        return px + (self.x - px) * alpha, py + (self.y - py) * alpha
+
+    def __repr__(self):
+        return "Projectile(x=%.1f, y=%.1f, type=%r, alive=%r)" % (self.x, self.y, self.projectile_type, self.alive)
+
+    def update(self, dt: float, enemies: List[Enemy], impacts: Optional[List["Projectile"]] = None):
+        """Di chuyển/hit target. Nếu truyền impacts, đạn splash chỉ được ghi lại để
+        resolve_impacts xử lý sát thương lan sau (thay vì duyệt enemy ngay tại đây)."""
         if not self.alive:
             return
             
@@ -439,11 +506,9 @@ class Projectile:
             self.rotation = math.atan2(self.vy, self.vx)
             
         # 🆕 Thêm điểm vào trail (đuôi đạn)
-        if self.projectile_type in ["laser", "rocket", "electric", "ice"] and self.trail_points is not None:
+        if self.projectile_type in TRAIL_TYPES:
+            # deque(maxlen=TRAIL_LENGTH) tự bỏ điểm cũ nhất
             self.trail_points.append((self.x, self.y, self.lifetime))
-            # Giữ tối đa 10 điểm trail
-            if len(self.trail_points) > 10:
-                self.trail_points.pop(0)
 
         # If target alive -> home to it
         if self.target and self.target.alive:
@@ -464,18 +529,11 @@ class Projectile:
                 if self.poison_time > 0:
                     self.target.apply_poison(self.poison_damage, self.poison_time)
                 if self.splash > 0:
-                    r2 = self.splash * self.splash
-                    for e in enemies:
-                        if e is self.target or not e.alive:
-                            continue
-                        ex, ey = e.pos()
-                        if (ex - tx) ** 2 + (ey - ty) ** 2 <= r2:
-                            e.hit(self.damage * 0.8)
-                            if self.slow_time > 0:
-                                e.apply_slow(self.slow_mul, self.slow_time)
-                            # 🆕 Apply poison to splash targets too
-                            if self.poison_time > 0:
-                                e.apply_poison(self.poison_damage, self.poison_time)
+                    self.x, self.y = tx, ty  # Điểm nổ
+                    if impacts is not None:
+                        impacts.append(self)  # 🔧 Gom lại, xử lý splash 1 lượt cuối frame
+                    else:
+                        self.apply_splash(enemies)
                 return
             dirx, diry = dx / dist, dy / dist
             self.vx, self.vy = dirx * spd, diry * spd
@@ -488,6 +546,82 @@ class Projectile:
         if not (0 <= self.x <= WIDTH and 0 <= self.y <= HEIGHT):
             self.alive = False
 
+    def apply_splash(self, enemies):
+        """Sát thương lan (x0.8) + slow/poison quanh điểm nổ (self.x, self.y), trừ target chính.
+
+        enemies có thể là EnemyPool (tính khoảng cách bằng numpy), SpatialGrid
+        (chỉ xét các ô quanh điểm nổ) hoặc list enemy thường.
+        """
+        dmg = self.damage * SPLASH_DAMAGE_MUL
+        pool_splash = getattr(enemies, "apply_splash", None)
+        if pool_splash is not None:
+            pool_splash(self.x, self.y, self.splash, dmg, self.target,
+                        self.slow_mul, self.slow_time, self.poison_damage, self.poison_time)
+            return
+        query = getattr(enemies, "query_rect", None)
+        if query is not None:
+            enemies = query(self.x, self.y, self.splash, self.splash)
+        tx, ty = self.x, self.y
+        r2 = self.splash * self.splash
+        for e in enemies:
+            if e is self.target or not e.alive:
+                continue
+            ex, ey = e.pos()
+            if (ex - tx) ** 2 + (ey - ty) ** 2 <= r2:
+                e.hit(dmg)
+                if self.slow_time > 0:
+                    e.apply_slow(self.slow_mul, self.slow_time)
+                # 🆕 Apply poison to splash targets too
+                if self.poison_time > 0:
+                    e.apply_poison(self.poison_damage, self.poison_time)
+
+
+def resolve_impacts(impacts: List[Projectile], enemies):
+    """Xử lý sát thương lan cho mọi đạn splash đã nổ trong frame (theo thứ tự nổ)."""
+    for p in impacts:
+        p.apply_splash(enemies)
+    impacts.clear()
+
+
+class ProjectilePool:
+    """Free list cho Projectile: đạn chết được trả về và tái sử dụng cho phát bắn sau."""
+
+    def __init__(self):
+        self._free: List[Projectile] = []
+        self.created = 0  # Số Projectile thực sự được cấp phát (debug)
+
+    def acquire(self, x: float, y: float, vx: float, vy: float, damage: float, target: Optional[Enemy],
+                **kwargs) -> Projectile:
+        if self._free:
+            return self._free.pop().reset(x, y, vx, vy, damage, target, **kwargs)
+        self.created += 1
+        return Projectile(x, y, vx, vy, damage, target, **kwargs)
+
+    def release(self, p: Projectile):
+        p.alive = False
+        p.target = None  # Không giữ enemy đã chết trong free list
+        self._free.append(p)
+
+    def compact(self, projectiles: List[Projectile]):
+        """Lọc đạn chết khỏi list tại chỗ (không tạo list mới) và trả chúng về pool."""
+        live = 0
+        for p in projectiles:
+            if p.alive:
+                projectiles[live] = p
+                live += 1
+            else:
+                self.release(p)
+        del projectiles[live:]
+
+
+# Hàm khóa cho từng kiểu ưu tiên: giá trị lớn hơn = được chọn (dx, dy là khoảng cách tới tower)
+PRIORITY_KEYS = {
+    "first": lambda e, dx, dy: e.progress,             # Đi xa nhất trên đường
+    "last": lambda e, dx, dy: -e.progress,             # Mới vào đường
+    "strongest": lambda e, dx, dy: e.hp,               # Máu nhiều nhất
+    "closest": lambda e, dx, dy: -(dx * dx + dy * dy),  # Gần tower nhất
+}
+
 
 @dataclass
 class Tower:
@@ -505,6 +639,8 @@ class Tower:
     slow_time: float = 0.0
     poison_damage: float = 0.0  # 🆕 Poison damage per second
     poison_time: float = 0.0    # 🆕 Poison duration
+    priority: str = DEFAULT_TARGET_PRIORITY  # Kiểu ưu tiên mục tiêu (first/last/strongest/closest)
+    target: Optional[Enemy] = None           # Mục tiêu đã chọn trong lượt acquire gần nhất
 
     def center(self) -> Tuple[float, float]:
         return grid_to_px(self.gx, self.gy)
@@ -512,42 +648,75 @@ class Tower:
     def update(self, dt: float):
         self.cooldown = max(0.0, self.cooldown - dt)
 
-    def aim(self, enemies):
+    def _candidates(self, enemies, cx: float, cy: float):
+        """Lấy danh sách enemy cần xét: từ SpatialGrid nếu có, ngược lại là list gốc."""
+        if isinstance(enemies, SpatialGrid):
+            return enemies.query_rect(cx, cy, H_RANGE_PX, self.range)
+        return enemies
+
+    def acquire(self, enemies):
+        """Một lượt duyệt duy nhất mỗi frame: cập nhật góc aim và chọn mục tiêu bắn.
+
+        Góc aim hướng về enemy gần nhất theo trục y (như cũ), mục tiêu bắn chọn theo
+        self.priority. Kết quả được cache ở self.target để try_fire dùng lại.
+        """
         cx, cy = self.center()
+        select = getattr(enemies, "select_targets", None)
+        if select is not None:
+            # EnemyPool (NumPy): lọc tầm bắn và chọn mục tiêu bằng phép toán vector
+            nearest, target = select(cx, cy, H_RANGE_PX, self.range, self.priority)
+            if nearest:
+                self.angle = math.atan2(nearest.y - cy, nearest.x - cx)
+            self.target = target
+            return target
+        rng = self.range
+        key_fn = PRIORITY_KEYS.get(self.priority, PRIORITY_KEYS[DEFAULT_TARGET_PRIORITY])
         nearest = None
         best_dy = float("inf")
-        from config import H_RANGE_PX
-        for e in enemies:
+        target = None
+        best_key = None
+        for e in self._candidates(enemies, cx, cy):
             if not e.alive:
                 continue
-            ex, ey = e.pos()
-            dy = abs(ey - cy)
-            dx = abs(ex - cx)
-            if dy <= self.range and dx <= H_RANGE_PX and dy < best_dy:
+            dy = abs(e.y - cy)
+            dx = abs(e.x - cx)
+            if dy > rng or dx > H_RANGE_PX:
+                continue
+            if dy < best_dy:
                 best_dy = dy
-                nearest = (ex, ey)
+                nearest = e
+            k = key_fn(e, dx, dy)
+            if best_key is None or k > best_key:
+                best_key = k
+                target = e
         if nearest:
-            ex, ey = nearest
-            self.angle = math.atan2(ey - cy, ex - cx)
+            self.angle = math.atan2(nearest.y - cy, nearest.x - cx)
+        self.target = target
+        return target
+
+    def aim(self, enemies):
+        self.acquire(enemies)
 
-    def try_fire(self, enemies):
+    def cycle_priority(self) -> str:
+        """Chuyển sang kiểu ưu tiên mục tiêu tiếp theo."""
+        i = TARGET_PRIORITIES.index(self.priority) if self.priority in TARGET_PRIORITIES else -1
+        self.priority = TARGET_PRIORITIES[(i + 1) % len(TARGET_PRIORITIES)]
+        return self.priority
+
+    def try_fire(self, enemies=None, pool: Optional["ProjectilePool"] = None):
+        """Bắn vào mục tiêu đã chọn. Nếu truyền enemies thì chọn lại mục tiêu trước.
+
+        Có pool thì đạn được lấy từ free list của ProjectilePool thay vì tạo mới.
+        """
         if self.cooldown > 0:
             return None
+        if enemies is not None:
+            self.acquire(enemies)
+        target = self.target
+        if target is not None and not target.alive:
+            target = None
         cx, cy = self.center()
 
-        target = None
-        best_prog = -1
-        for e in enemies:
-            if not e.alive:
-                continue
-            ex, ey = e.pos()
-            from config import H_RANGE_PX
-            if abs(ey - cy) <= self.range and abs(ex - cx) <= H_RANGE_PX:
-                prog = e.idx
-                if prog > best_prog:
-                    best_prog = prog
-                    target = e
-
         if not target:
             return None
 
@@ -559,7 +728,7 @@ class Tower:
         speed = PROJECTILE_SPEED
         projectile_type = "basic"
         max_lifetime = 3.0
-        special_data = {}
+        special_data = None
         
         if self.ttype == "sniper":
             speed = PROJECTILE_SPEED * 1.1
@@ -575,7 +744,7 @@ class Tower:
         elif self.ttype == "electric":
             speed = PROJECTILE_SPEED * 1.3
             projectile_type = "electric"
-            special_data = {"chain_count": 0, "max_chains": 3}
+            special_data = ELECTRIC_CHAIN_DATA
         elif self.ttype == "poison":
             speed = PROJECTILE_SPEED * 0.9
             projectile_type = "poison"
@@ -596,11 +765,12 @@ class Tower:
         vx, vy = (dx / dist) * speed, (dy / dist) * speed
         self.cooldown = 1.0 / self.fire_rate
         
-        return Projectile(
+        make = pool.acquire if pool is not None else Projectile
+        return make(
             cx, cy, vx, vy, self.damage, target,
             splash=self.splash, slow_mul=self.slow_mul, slow_time=self.slow_time,
             poison_damage=self.poison_damage, poison_time=self.poison_time,  # 🆕 Poison data
-            projectile_type=projectile_type, trail_points=[], rotation=0.0,
+            projectile_type=projectile_type, rotation=0.0,
             lifetime=0.0, max_lifetime=max_lifetime, special_data=special_data
         )
 
@@ -0,0 +1,143 @@
+"""Số sát thương bay lên: pool dung lượng cố định, ghép số từ dải glyph chữ số dựng sẵn.
+
+Mỗi màu (theo mức sát thương) có 1 dải glyph '0'..'9' render 1 lần từ font mặc định. Khi trúng
+đòn, số được ghép từ các glyph vào Surface riêng của 1 slot (tạo 1 lần, dùng lại mãi) - không
+render font, không tạo object nào. Mỗi frame chỉ 1 lần Surface.blits cho mọi số.
+
+Mọi số sống cùng 1 khoảng thời gian nên hết hạn đúng theo thứ tự sinh ra: pool là ring buffer,
+số cũ nhất ở head. Pool đầy thì số cũ nhất nhường chỗ cho số mới.
+"""
+from typing import Iterator, List, Optional, Tuple
+
+import pygame
+
+from config import DAMAGE_TEXT_CAPACITY, DAMAGE_TEXT_DURATION, DAMAGE_TEXT_MAX_DIGITS
+from text_cache import get_default_font
+
+DAMAGE_TEXT_FONT_SIZE = 24
+DAMAGE_TEXT_RISE = 40  # px bay lên trong suốt thời gian sống
+# (sát thương tối thiểu, màu) - xét từ trên xuống
+DAMAGE_TEXT_TIERS = (
+    (100, (255, 100, 100)),  # Đỏ cho sát thương cao
+    (50, (255, 200, 100)),   # Cam cho sát thương trung bình
+    (0, (255, 255, 100)),    # Vàng cho sát thương thấp
+)
+MAX_VALUE = 10 ** DAMAGE_TEXT_MAX_DIGITS - 1
+
+
+class DigitStrip:
+    """'0'..'9' của 1 màu trong 1 Surface; area[d] là vùng của chữ số d trên dải."""
+    __slots__ = ("surface", "area", "height")
+
+    def __init__(self, font: pygame.font.Font, color: Tuple[int, int, int]):
+        glyphs = [font.render(str(d), True, color) for d in range(10)]
+        self.height = max(g.get_height() for g in glyphs)
+        self.surface = pygame.Surface((sum(g.get_width() for g in glyphs), self.height), pygame.SRCALPHA)
+        self.area: List[pygame.Rect] = []
+        x = 0
+        for g in glyphs:
+            self.surface.blit(g, (x, 0))
+            self.area.append(pygame.Rect(x, 0, g.get_width(), g.get_height()))
+            x += g.get_width()
+
+
+_strips: List[DigitStrip] = []  # Theo thứ tự DAMAGE_TEXT_TIERS, tạo khi số đầu tiên xuất hiện
+
+
+def _get_strips() -> List[DigitStrip]:
+    if not _strips:
+        font = get_default_font(DAMAGE_TEXT_FONT_SIZE).font
+        _strips.extend(DigitStrip(font, color) for _, color in DAMAGE_TEXT_TIERS)
+    return _strips
+
+
+class DamageTextPool:
+    def __init__(self, capacity: int = DAMAGE_TEXT_CAPACITY, duration: float = DAMAGE_TEXT_DURATION):
+        self.capacity = capacity
+        self.duration = duration
+        self.head = 0   # Slot của số cũ nhất
+        self.count = 0
+        self.x = [0.0] * capacity
+        self.start_y = [0.0] * capacity
+        self.time_left = [0.0] * capacity
+        self.surfaces: List[Optional[pygame.Surface]] = [None] * capacity  # Tạo khi slot được dùng lần đầu
+        self.areas = [pygame.Rect(0, 0, 0, 0) for _ in range(capacity)]   # Phần đã ghép số trên Surface slot
+        self._batch: list = []
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.head = self.count = 0
+
+    def spawn(self, x: float, y: float, damage: int):
+        value = min(max(int(damage), 0), MAX_VALUE)
+        strips = _get_strips()
+        strip = strips[-1]
+        for (threshold, _), s in zip(DAMAGE_TEXT_TIERS, strips):
+            if value >= threshold:
+                strip = s
+                break
+        cap = self.capacity
+        if self.count == cap:  # Đầy: bỏ số cũ nhất
+            self.head = self.head + 1 if self.head + 1 < cap else 0
+            self.count -= 1
+        i = self.head + self.count
+        if i >= cap:
+            i -= cap
+        self.count += 1
+        self.x[i], self.start_y[i], self.time_left[i] = x, y, self.duration
+
+        surf = self.surfaces[i]
+        if surf is None:
+            surf = self.surfaces[i] = pygame.Surface(
+                (max(a.width for a in strip.area) * DAMAGE_TEXT_MAX_DIGITS, strip.height), pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 0))
+        # Ghép từ phải sang trái: tính bề rộng trước rồi đặt từng chữ số
+        width, v = 0, value
+        while True:
+            v, d = divmod(v, 10)
+            width += strip.area[d].width
+            if not v:
+                break
+        right, v = width, value
+        while True:
+            v, d = divmod(v, 10)
+            right -= strip.area[d].width
+            surf.blit(strip.surface, (right, 0), strip.area[d])
+            if not v:
+                break
+        area = self.areas[i]
+        area.width, area.height = width, strip.height
+
+    def update(self, dt: float):
+        n = self.count
+        if not n:
+            return
+        cap, time_left = self.capacity, self.time_left
+        i = self.head
+        for _ in range(n):
+            time_left[i] -= dt
+            i = i + 1 if i + 1 < cap else 0
+        while self.count and time_left[self.head] <= 0:
+            self.head = self.head + 1 if self.head + 1 < cap else 0
+            self.count -= 1
+
+    def positions(self) -> Iterator[Tuple[float, float]]:
+        """(x tâm, y trên) của từng số đang bay, cũ trước mới sau."""
+        cap, rise, duration = self.capacity, DAMAGE_TEXT_RISE, self.duration
+        i = self.head
+        for _ in range(self.count):
+            yield self.x[i], self.start_y[i] - (1 - self.time_left[i] / duration) * rise
+            i = i + 1 if i + 1 < cap else 0
+
+    def draw(self, target: pygame.Surface):
+        if not self.count:
+            return
+        batch, surfaces, areas = self._batch, self.surfaces, self.areas
+        i = self.head
+        for x, y in self.positions():
+            batch.append((surfaces[i], (int(x - areas[i].width // 2), int(y)), areas[i]))
+            i = i + 1 if i + 1 < self.capacity else 0
+        target.blits(batch, doreturn=False)
+        batch.clear()
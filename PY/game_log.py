@@ -0,0 +1,106 @@
+"""Log theo nhóm (category) thay cho print() rải rác trong game.
+
+Mỗi module lấy logger của nhóm mình: log = get_logger("spawn") rồi gọi log.debug("... %s", x)
+(format kiểu %, chỉ ghép chuỗi khi nhóm đang bật). Nhóm bị tắt chỉ tốn 1 lần kiểm tra level.
+
+Chưa gọi configure() (headless, batch_sim, import để test) thì chỉ WARNING trở lên được in ra
+(mặc định của module logging). configure() - gọi trong main() của game - đặt level từng nhóm theo
+config/biến môi trường và chuyển việc ghi sang thread riêng (QueueHandler -> QueueListener),
+nên vòng lặp game không bao giờ chờ console/file.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Dict, Optional, Tuple
+
+from config import LOG_DEFAULT_LEVEL, LOG_CATEGORY_LEVELS, LOG_ENV_VAR, LOG_FILE
+
+ROOT = "td"
+CATEGORIES = ("waves", "spawn", "path", "level", "assets", "save", "audio", "game")
+OFF = logging.CRITICAL + 10  # Cao hơn mọi mức -> nhóm không ghi gì
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_atexit_registered = False
+
+
+def get_logger(category: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT}.{category}")
+
+
+def _level(name: str) -> int:
+    name = name.strip().upper()
+    if name == "OFF":
+        return OFF
+    level = logging.getLevelName(name)
+    if not isinstance(level, int):
+        raise ValueError(f"Mức log không hợp lệ: {name}")
+    return level
+
+
+def parse_spec(spec: str, default: str, levels: Dict[str, str]) -> Tuple[str, Dict[str, str]]:
+    """'debug' hoặc 'info,spawn=debug,waves=off' -> (mức mặc định, mức từng nhóm)."""
+    levels = dict(levels)
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" in part:
+            category, _, level = part.partition("=")
+            levels[category.strip()] = level
+        else:
+            default = part
+            levels = {}  # Mức chung ghi đè cả mức riêng trong config
+    return default, levels
+
+
+def _utf8_stream(stream):
+    """Console Windows (cp1252...) không in được tiếng Việt: ghi UTF-8 thẳng vào fd, ký tự lỗi thì thay thế."""
+    encoding = (getattr(stream, "encoding", None) or "").lower().replace("-", "")
+    if encoding == "utf8":
+        return stream
+    try:
+        return open(stream.fileno(), "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+    except (AttributeError, OSError, ValueError):
+        return stream
+
+
+def configure(spec: Optional[str] = None, stream=None, path: Optional[str] = LOG_FILE):
+    """Bật log cho game. spec None = đọc biến môi trường LOG_ENV_VAR (bỏ trống = theo config)."""
+    global _listener, _atexit_registered
+    if spec is None:
+        spec = os.environ.get(LOG_ENV_VAR, "")
+    default, levels = parse_spec(spec, LOG_DEFAULT_LEVEL, LOG_CATEGORY_LEVELS)
+
+    root = logging.getLogger(ROOT)
+    root.setLevel(_level(default))
+    for category in set(CATEGORIES) | set(levels):
+        get_logger(category).setLevel(_level(levels[category]) if category in levels else logging.NOTSET)
+
+    shutdown()
+    handlers = [logging.StreamHandler(_utf8_stream(stream or sys.stderr))]
+    if path:
+        handlers.append(logging.FileHandler(path, encoding="utf-8"))
+    formatter = logging.Formatter("%(asctime)s.%(msecs)03d %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S")
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root.handlers[:] = [logging.handlers.QueueHandler(records)]
+    root.propagate = False
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(shutdown)
+        _atexit_registered = True
+
+
+def shutdown():
+    """Ghi nốt các dòng còn trong queue rồi dừng thread ghi log."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,180 @@
+"""Chạy mô phỏng 1 level không cần cửa sổ, âm thanh hay asset (cân bằng game / kiểm tra hồi quy).
+
+Ví dụ:
+    python headless.py --level 5 --mode Normal --auto gun:6 --auto slow:2
+    python headless.py --level 3 --tower sniper:4,3 --tower gun:5,4@3 --runs 20
+    python headless.py --level 8 --layout layout.json
+
+layout.json là list các tower: [{"type": "gun", "x": 4, "y": 3, "level": 2, "priority": "first"}, ...]
+(hoặc {"towers": [...]}). Tower được đặt ngay từ đầu, trừ tiền như khi chơi thật;
+tower không đủ tiền / đặt sai chỗ sẽ bị bỏ qua và được báo trong kết quả.
+"""
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+from config import GRID_W, GRID_H, MODES, MODE_PARAMS, TOWER_DEFS, TARGET_PRIORITIES, SIM_DT
+from simulation import SimulationCore, make_tower, compute_stars
+import game_log
+
+
+class HeadlessGame(SimulationCore):
+    """Game không display: chỉ có thế giới mô phỏng, chạy _sim_step liên tục nhanh nhất có thể."""
+
+    def __init__(self, mode_name: str = "Normal", level: int = 1, seed: Optional[int] = None):
+        self._init_world(mode_name, level, seed)
+        self.skipped_towers: List[Dict] = []
+
+    def place_tower(self, gx: int, gy: int, ttype: str, level: int = 1, priority: Optional[str] = None) -> bool:
+        """Đặt (và nâng cấp) tower như người chơi; trả về False nếu ô không hợp lệ hoặc thiếu tiền."""
+        cell = (gx, gy)
+        if ttype not in TOWER_DEFS or not (0 <= gx < GRID_W and 0 <= gy < GRID_H):
+            return False
+        if cell in self.path_cells or cell in self.occupied:
+            return False
+        cost = TOWER_DEFS[ttype]["cost"]
+        if self.money < cost:
+            return False
+        self.money -= cost; self.money_spent += cost
+        t = make_tower(gx, gy, ttype)
+        if priority in TARGET_PRIORITIES:
+            t.priority = priority
+        while t.level < level and t.can_upgrade() and self.money >= t.upgrade_cost():
+            up = t.upgrade_cost()
+            self.money -= up; self.money_spent += up
+            t.apply_upgrade()
+        self.towers.append(t); self.occupied.add(cell); self.towers_built += 1
+        return True
+
+    def place_layout(self, layout: List[Dict]):
+        for spec in layout:
+            ok = self.place_tower(int(spec["x"]), int(spec["y"]), spec["type"],
+                                  int(spec.get("level", 1)), spec.get("priority"))
+            if not ok:
+                self.skipped_towers.append(spec)
+
+    def auto_cells(self) -> List[tuple]:
+        """Các ô trống sát đường đi, theo thứ tự cột (gần cổng vào trước) - dùng cho --auto."""
+        cells = []
+        for x in range(GRID_W):
+            for y in range(GRID_H):
+                if (x, y) in self.path_cells or (x, y) in self.occupied:
+                    continue
+                if any((x + dx, y + dy) in self.path_cells for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))):
+                    cells.append((x, y))
+        return cells
+
+    def run(self, max_ticks: int) -> Dict:
+        """Bỏ qua setup phase, chạy tới khi thắng/thua hoặc hết max_ticks."""
+        max_lives = MODE_PARAMS[self.mode_name]["lives"]
+        self.wave_mgr.start_next_wave()
+        ticks = 0
+        t0 = time.perf_counter()
+        while ticks < max_ticks and not self._sim_stopped():
+            self._sim_step(SIM_DT)
+            ticks += 1
+        wall = time.perf_counter() - t0
+        if self.lives <= 0:
+            result = "lose"
+        elif self.win_level:
+            result = "win"
+        else:
+            result = "timeout"
+        return {
+            "level": self.level,
+            "mode": self.mode_name,
+            "seed": self.match_seed,
+            "result": result,
+            "reason": self.game_over_reason,
+            "wave": self.wave_mgr.wave_no,
+            "max_waves": self.max_waves,
+            "kills": self.kills,
+            "lives_lost": max_lives - max(0, self.lives),
+            "money": self.money,
+            "money_spent": self.money_spent,
+            "towers": len(self.towers),
+            "skipped_towers": len(self.skipped_towers),
+            "stars": compute_stars(self.lives, max_lives) if result == "win" else 0,
+            "ticks": ticks,
+            "sim_seconds": round(ticks * SIM_DT, 2),
+            "wall_seconds": round(wall, 4),
+            "ticks_per_sec": round(ticks / wall) if wall > 0 else 0,
+        }
+
+
+def _parse_tower(text: str) -> Dict:
+    """'gun:4,3' hoặc 'gun:4,3@2' (cấp 2) -> dict layout."""
+    ttype, _, rest = text.partition(":")
+    pos, _, lvl = rest.partition("@")
+    x, y = (int(v) for v in pos.split(","))
+    return {"type": ttype, "x": x, "y": y, "level": int(lvl or 1)}
+
+
+def load_layout(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["towers"] if isinstance(data, dict) else data
+
+
+def simulate(level: int, mode: str = "Normal", layout: Optional[List[Dict]] = None,
+             auto: Optional[List[str]] = None, max_minutes: float = 30.0,
+             seed: Optional[int] = None, verbose: bool = False) -> Dict:
+    """Chạy 1 trận headless và trả về dict kết quả (kills, lives_lost, money, ticks/s...)."""
+    # Log debug của game (spawn, junction...) chỉ bật khi cần - mặc định chỉ in WARNING
+    if verbose:
+        game_log.configure("debug")
+    game = HeadlessGame(mode, level, seed)
+    game.place_layout(layout or [])
+    for item in auto or []:
+        ttype, _, count = item.partition(":")
+        cells = game.auto_cells()
+        game.place_layout([{"type": ttype, "x": x, "y": y} for x, y in cells[:int(count or 1)]])
+    return game.run(int(max_minutes * 60 / SIM_DT))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Chạy mô phỏng tower defense không cửa sổ.")
+    ap.add_argument("--level", type=int, default=1)
+    ap.add_argument("--mode", choices=MODES, default="Normal")
+    ap.add_argument("--layout", help="file JSON danh sách tower")
+    ap.add_argument("--tower", action="append", default=[], metavar="TYPE:X,Y[@LV]",
+                    help="đặt 1 tower (lặp lại được)")
+    ap.add_argument("--auto", action="append", default=[], metavar="TYPE:N",
+                    help="đặt N tower loại TYPE vào các ô sát đường đi")
+    ap.add_argument("--runs", type=int, default=1)
+    ap.add_argument("--seed", type=int, help="match seed cho run đầu (run i dùng seed + i); bỏ trống = ngẫu nhiên")
+    ap.add_argument("--max-minutes", type=float, default=30.0, help="giới hạn thời gian game mỗi run")
+    ap.add_argument("--verbose", action="store_true", help="giữ log debug của game")
+    args = ap.parse_args(argv)
+
+    layout = load_layout(args.layout) if args.layout else []
+    layout += [_parse_tower(t) for t in args.tower]
+
+    results = []
+    for i in range(args.runs):
+        seed = None if args.seed is None else args.seed + i
+        res = simulate(args.level, args.mode, layout, args.auto, args.max_minutes, seed, args.verbose)
+        results.append(res)
+        print(json.dumps(res, ensure_ascii=False))
+
+    if args.runs > 1:
+        n = len(results)
+        summary = {
+            "runs": n,
+            "win_rate": sum(r["result"] == "win" for r in results) / n,
+            "avg_kills": sum(r["kills"] for r in results) / n,
+            "avg_lives_lost": sum(r["lives_lost"] for r in results) / n,
+            "avg_money": sum(r["money"] for r in results) / n,
+            "avg_ticks_per_sec": sum(r["ticks_per_sec"] for r in results) / n,
+        }
+        print(json.dumps(summary, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""Dữ liệu và hàm tạo map (đường đi theo lưới) - không cần display/âm thanh/asset.
+
+Dùng chung cho Game (tower_defense.py) và chế độ chạy không cửa sổ (headless.py).
+"""
+import random
+from functools import lru_cache
+from typing import List, Tuple, Set
+
+from config import GRID_W, GRID_H
+from utils import grid_to_px
+
+
+def make_map(level: int):
+    """
+    Trả về 1 map theo LEVEL với số đường vào tăng dần.
+    - Level 1-3: 2 đường vào (cải thiện từ 1)
+    - Level 4-6: 3 đường vào (cải thiện từ 2)
+    - Level 7-9: 4 đường vào (cải thiện từ 3)
+    - Level 10+: 4+ đường vào
+    
+    Mỗi map là list các path; mỗi path là list node (x,y) đi ngang/dọc theo lưới.
+    - Lối vào đặt ở x = -1 (bên trái), lối ra ở x = GRID_W (bên phải) để quái vào/ra mượt.
+    - Các node còn lại nằm trong 0..GRID_W-1 (x) và 0..GRID_H-1 (y).
+    - Địch sẽ spawn ngẫu nhiên từ các path khác nhau tạo thêm thử thách.
+    """
+    
+    # Định nghĩa map theo số đường vào
+    LEVEL_MAPS = {}
+    
+    # Level 1-3: Network paths - có điểm giao để địch có thể phân nhánh ra nhiều exit
+    LEVEL_MAPS[1] = [
+        [(-1, 2), (6, 2), (6, 5), (GRID_W, 5)],     # Path 1: vào trên, có thể ra giữa
+        [(-1, 7), (6, 7), (6, 5), (GRID_W, 5)],     # Path 2: vào dưới, gặp path 1 tại (6,5)
+        [(6, 5), (10, 5), (10, 2), (GRID_W, 2)],    # Path 3: từ junction ra trên
+        [(6, 5), (10, 5), (10, 8), (GRID_W, 8)]     # Path 4: từ junction ra dưới
+    ]
+    LEVEL_MAPS[2] = [
+        [(-1, 1), (5, 1), (5, 4), (GRID_W, 4)],     # Path 1: vào trên, ra giữa
+        [(-1, 8), (5, 8), (5, 4), (GRID_W, 4)],     # Path 2: vào dưới, gặp tại (5,4)
+        [(5, 4), (9, 4), (9, 1), (GRID_W, 1)],      # Path 3: từ junction ra trên
+        [(5, 4), (9, 4), (9, 7), (GRID_W, 7)]       # Path 4: từ junction ra dưới
+    ]  
+    LEVEL_MAPS[3] = [
+        [(-1, 3), (4, 3), (7, 3), (7, 5), (GRID_W, 5)],     # Path chính ngang
+        [(-1, 6), (4, 6), (7, 6), (7, 5), (GRID_W, 5)],     # Path gặp nhau tại (7,5)
+        [(7, 5), (11, 5), (11, 2), (GRID_W, 2)],            # Nhánh ra trên
+        [(7, 5), (11, 5), (11, 8), (GRID_W, 8)]             # Nhánh ra dưới
+    ]
+    
+    # Level 4-6: Network paths với nhiều junction
+    LEVEL_MAPS[4] = [
+        [(-1, 1), (5, 1), (8, 1), (8, 4), (GRID_W, 4)],     # Entrance path 1
+        [(-1, 5), (5, 5), (8, 5), (8, 4), (GRID_W, 4)],     # Entrance path 2 - gặp nhau tại (8,4)
+        [(-1, 9), (5, 9), (8, 9), (8, 4), (GRID_W, 4)],     # Entrance path 3 - gặp nhau tại (8,4)
+        [(8, 4), (11, 4), (11, 1), (GRID_W, 1)],            # Junction - ra trên
+        [(8, 4), (11, 4), (11, 7), (GRID_W, 7)],            # Junction - ra dưới
+        [(8, 4), (13, 4), (13, 5), (GRID_W, 5)]             # Junction - ra giữa
+    ]
+    LEVEL_MAPS[5] = [
+        [(-1, 2), (4, 2), (7, 2), (7, 5), (GRID_W, 5)],     # Entrance path 1
+        [(-1, 6), (4, 6), (7, 6), (7, 5), (GRID_W, 5)],     # Entrance path 2 - gặp tại (7,5)
+        [(-1, 8), (4, 8), (7, 8), (7, 5), (GRID_W, 5)],     # Entrance path 3 - gặp tại (7,5)
+        [(7, 5), (10, 5), (10, 2), (GRID_W, 2)],            # Junction - ra trên
+        [(7, 5), (10, 5), (10, 8), (GRID_W, 8)],            # Junction - ra dưới
+        [(7, 5), (12, 5), (12, 6), (GRID_W, 6)]             # Junction - ra giữa
+    ]
+    LEVEL_MAPS[6] = [
+        [(-1, 1), (3, 1), (6, 1), (6, 4), (9, 4), (GRID_W, 4)],    # Main path ngang
+        [(-1, 7), (3, 7), (6, 7), (6, 4), (9, 4), (GRID_W, 4)],    # Path gặp tại (6,4) và (9,4)
+        [(6, 4), (6, 8), (10, 8), (GRID_W, 8)],                    # Junction từ (6,4) ra dưới
+        [(9, 4), (12, 4), (12, 1), (GRID_W, 1)],                   # Junction từ (9,4) ra trên
+        [(9, 4), (12, 4), (12, 7), (GRID_W, 7)]                    # Junction từ (9,4) ra dưới
+    ]
+    
+    # Level 7-9: 4 đường vào (tăng từ 3 lên 4)
+    LEVEL_MAPS[7] = [
+        [(-1, 1), (4, 1), (4, 5), (8, 5), (8, 8), (GRID_W, 8)],
+        [(-1, 3), (6, 3), (6, 7), (11, 7), (11, 2), (GRID_W, 2)],
+        [(-1, 6), (3, 6), (3, 9), (12, 9), (12, 4), (GRID_W, 4)],
+        [(-1, 9), (9, 9), (9, 6), (GRID_W, 6)]
+    ]
+    LEVEL_MAPS[8] = [
+        [(-1, 1), (5, 1), (5, 6), (9, 6), (9, 3), (GRID_W, 3)],
+        [(-1, 4), (7, 4), (7, 8), (12, 8), (12, 1), (GRID_W, 1)],
+        [(-1, 7), (2, 7), (2, 2), (14, 2), (14, 9), (GRID_W, 9)],
+        [(-1, 9), (10, 9), (10, 5), (GRID_W, 5)]
+    ]
+    LEVEL_MAPS[9] = [
+        [(-1, 1), (3, 1), (3, 4), (8, 4), (8, 8), (GRID_W, 8)],
+        [(-1, 3), (6, 3), (6, 7), (11, 7), (11, 2), (GRID_W, 2)],
+        [(-1, 6), (4, 6), (4, 9), (13, 9), (13, 5), (GRID_W, 5)],
+        [(-1, 8), (9, 8), (9, 1), (GRID_W, 1)]
+    ]
+    
+    # Level 10+: 4 đường vào
+    LEVEL_MAPS[10] = [
+        [(-1, 1), (4, 1), (4, 4), (8, 4), (8, 7), (GRID_W, 7)],
+        [(-1, 3), (6, 3), (6, 8), (11, 8), (11, 2), (GRID_W, 2)],
+        [(-1, 6), (2, 6), (2, 9), (9, 9), (9, 5), (GRID_W, 5)],
+        [(-1, 9), (13, 9), (13, 6), (GRID_W, 6)]
+    ]
+    LEVEL_MAPS[11] = [
+        [(-1, 2), (3, 2), (3, 7), (7, 7), (7, 1), (11, 1), (11, 8), (GRID_W, 8)],
+        [(-1, 5), (5, 5), (5, 3), (9, 3), (9, 6), (13, 6), (13, 4), (GRID_W, 4)],
+        [(-1, 8), (8, 8), (8, 5), (12, 5), (12, 9), (GRID_W, 9)],
+        [(-1, 1), (6, 1), (6, 4), (10, 4), (10, 2), (GRID_W, 2)]
+    ]
+    LEVEL_MAPS[12] = [
+        [(-1, 3), (4, 3), (4, 6), (8, 6), (8, 2), (GRID_W, 2)],
+        [(-1, 1), (7, 1), (7, 8), (12, 8), (12, 5), (GRID_W, 5)],
+        [(-1, 7), (2, 7), (2, 4), (10, 4), (10, 9), (GRID_W, 9)],
+        [(-1, 9), (5, 9), (5, 1), (GRID_W, 1)]
+    ]
+    LEVEL_MAPS[13] = [
+        [(-1, 2), (6, 2), (6, 5), (9, 5), (9, 8), (GRID_W, 8)],
+        [(-1, 4), (3, 4), (3, 1), (11, 1), (11, 7), (GRID_W, 7)],
+        [(-1, 6), (8, 6), (8, 3), (13, 3), (13, 9), (GRID_W, 9)],
+        [(-1, 8), (4, 8), (4, 6), (GRID_W, 6)]
+    ]
+    LEVEL_MAPS[14] = [
+        [(-1, 1), (5, 1), (5, 7), (9, 7), (9, 3), (GRID_W, 3)],
+        [(-1, 4), (7, 4), (7, 9), (12, 9), (12, 2), (GRID_W, 2)],
+        [(-1, 6), (2, 6), (2, 2), (10, 2), (10, 8), (GRID_W, 8)],
+        [(-1, 9), (6, 9), (6, 5), (14, 5), (14, 4), (GRID_W, 4)]
+    ]
+    LEVEL_MAPS[15] = [
+        [(-1, 2), (4, 2), (4, 8), (8, 8), (8, 1), (12, 1), (12, 6), (GRID_W, 6)],
+        [(-1, 5), (6, 5), (6, 3), (10, 3), (10, 9), (14, 9), (14, 7), (GRID_W, 7)],
+        [(-1, 7), (3, 7), (3, 4), (11, 4), (11, 2), (GRID_W, 2)],
+        [(-1, 9), (7, 9), (7, 6), (13, 6), (13, 8), (GRID_W, 8)]
+    ]
+    
+    # Cho level > 15: Tạo map tự động với 4 đường vào
+    if level > 15:
+        return generate_procedural_map(level)
+    
+    # Trả về map cho level, nếu không có thì dùng map level 1
+    return LEVEL_MAPS.get(level, LEVEL_MAPS[1])
+
+
+def generate_procedural_map(level: int):
+    """
+    Tạo map tự động cho level > 15 với 4 đường vào.
+    Độ khó tăng dần theo level.
+    """
+    # Kết quả chỉ phụ thuộc level nên được cache; trả về list mới để caller sửa thoải mái
+    return [list(path) for path in _procedural_map_nodes(level)]
+
+
+@lru_cache(maxsize=None)
+def _procedural_map_nodes(level: int) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    # Sử dụng level làm seed để tạo map nhất quán (RNG riêng, không đụng random toàn cục)
+    rng = random.Random(level * 42)
+    
+    # Level > 15 luôn có 4 đường vào để duy trì độ khó cao
+    num_paths = 4
+    
+    paths = []
+    
+    # Định nghĩa các vị trí y cố định cho 4 đường để tránh trùng lặp
+    y_positions = [1, 3, 6, 8]  # Phân bố đều trên map
+    
+    for i in range(num_paths):
+        start_y = y_positions[i]
+        
+        # Tạo path với độ phức tạp tăng theo level
+        complexity = min((level - 15) // 3 + 2, 6)  # 2-6 turns, tăng dần
+        path = generate_single_path(start_y, complexity, rng)
+        paths.append(tuple(path))
+    
+    return tuple(paths)
+
+
+def generate_single_path(start_y: int, complexity: int, rng):
+    """
+    Tạo một đường đi với số lượng rẽ được chỉ định.
+    """
+    path = [(-1, start_y)]  # Điểm bắt đầu
+    
+    current_x = 0
+    current_y = start_y
+    
+    for turn in range(complexity):
+        # Di chuyển một đoạn theo x
+        next_x = current_x + rng.randint(2, 5)
+        next_x = min(next_x, GRID_W - 2)
+        path.append((next_x, current_y))
+        
+        # Rẽ theo y
+        direction = rng.choice([-1, 1])
+        next_y = current_y + direction * rng.randint(2, 4)
+        next_y = max(1, min(next_y, GRID_H - 2))
+        path.append((next_x, next_y))
+        
+        current_x = next_x
+        current_y = next_y
+    
+    # Đến cuối màn hình
+    if current_x < GRID_W - 1:
+        path.append((GRID_W - 1, current_y))
+    
+    # Điểm kết thúc
+    path.append((GRID_W, current_y))
+    
+    return path
+
+
+def make_maps():
+    """Trả về list map cho tất cả level (không còn giới hạn 15 map)."""
+    # Không cần tạo list cố định nữa vì mỗi level có map riêng
+    # Hàm này giữ lại để tương thích nhưng không dùng nhiều
+    return [make_map(i) for i in range(1, 16)]
+
+
+# Dữ liệu map dùng cho game - giờ sẽ load động theo level
+MAPS = make_maps()  # Giữ lại để tương thích với code cũ
+
+
+def make_permanent_map() -> List[List[Tuple[int,int]]]:
+    """Tạo 1 map chơi vĩnh viễn (special) với theme snow và nhiều ô đặt trụ.
+    Map này có ít đường đi để tối đa hóa không gian cho tower.
+    Trả về list các path (mỗi path là list of nodes).
+    """
+    # Thiết kế map Snow: 3 đường chính đơn giản để tối đa hóa tower slots
+    paths = []
+
+    # Đường 1: Trên cùng - đường thẳng đơn giản
+    paths.append([(-1, 2), (2, 2), (6, 2), (10, 2), (14, 2), (GRID_W, 2)])
+    
+    # Đường 2: Giữa - có một curve nhẹ
+    paths.append([(-1, 5), (3, 5), (6, 5), (6, 7), (9, 7), (12, 7), (GRID_W, 7)])
+    
+    # Đường 3: Dưới cùng - đường zigzag nhẹ  
+    paths.append([(-1, 9), (4, 9), (7, 9), (7, 6), (10, 6), (13, 6), (GRID_W, 6)])
+
+    return paths
+
+def grid_nodes_to_px(nodes: List[Tuple[int, int]]) -> List[Tuple[float, float]]:
+    return [grid_to_px(x, y) for x, y in nodes]
+
+def expand_path_cells(multipath_nodes: List[List[Tuple[int,int]]]) -> Set[Tuple[int,int]]:
+    cells: Set[Tuple[int, int]] = set()
+    for nodes in multipath_nodes:
+        for (x1, y1), (x2, y2) in zip(nodes[:-1], nodes[1:]):
+            if x1 == x2:
+                for y in range(min(y1, y2), max(y1, y2) + 1):
+                    if 0 <= x1 < GRID_W and 0 <= y < GRID_H:
+                        cells.add((x1, y))
+            elif y1 == y2:
+                for x in range(min(x1, x2), max(x1, x2) + 1):
+                    if 0 <= x < GRID_W and 0 <= y1 < GRID_H:
+                        cells.add((x, y1))
+    return cells
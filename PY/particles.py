@@ -0,0 +1,200 @@
+"""Hệ particle dạng mảng (NumPy) dung lượng cố định cho hiệu ứng trang trí (cổng, vụn khi địch chết).
+
+Mỗi hạt chỉ là 1 dòng trong các mảng x/y/vx/vy/life...; update là vài phép toán vector cho
+cả hệ, draw là 1 lần Surface.blits. Hình hạt được bake sẵn theo (loại, biến thể màu, cỡ, frame
+mờ dần) và dùng lại mãi - không tạo Surface nào trong lúc chơi. Hệ đầy thì hạt cũ nhất bị
+thay bằng hạt mới nên chi phí luôn bị chặn bởi capacity.
+NumPy là tùy chọn: nếu không có thì emit bỏ qua (chỉ mất hiệu ứng, không ảnh hưởng gameplay).
+"""
+from bisect import bisect_right
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy không bắt buộc
+    np = None
+
+import pygame
+
+from config import PARTICLE_FRAMES
+
+HAS_NUMPY = np is not None
+_rng = np.random.default_rng() if HAS_NUMPY else None  # Random của hiệu ứng (không ảnh hưởng gameplay)
+
+# Các cột của 1 hạt: tên -> dtype
+PARTICLE_FIELDS = {
+    "x": "f8", "y": "f8", "vx": "f8", "vy": "f8",
+    "life": "f8", "max_life": "f8", "gravity": "f8", "drag": "f8", "size0": "f8",
+    "sprite": "i8",  # Chỉ số sprite (frame đầy đủ nhất, cỡ 0) của loại + biến thể màu
+    "pad": "i8",     # Viền sáng quanh hạt (px) - sprite lớn hơn bán kính hạt
+    "group": "i8",   # Nhóm phát (1 cổng / 1 lần nổ) để đánh dấu vùng bẩn theo từng cụm
+}
+
+
+class ParticleKind:
+    """1 kiểu hạt: các biến thể màu, cỡ tối đa và cách mờ dần khi hết đời."""
+    __slots__ = ("name", "colors", "max_size", "fade", "halo", "base")
+
+    def __init__(self, name: str, colors: Sequence[Tuple[int, int, int]], max_size: int,
+                 fade: str = "alpha", halo: int = 0):
+        self.name = name
+        self.colors = list(colors)
+        self.max_size = max_size
+        self.fade = fade  # "alpha": trong suốt dần; "white": đục, màu nhạt dần về trắng
+        self.halo = halo  # > 0: có viền trắng dày halo px (hạt của boss)
+        self.base = 0
+
+    def variant_base(self, variant: int) -> int:
+        return self.base + variant * (self.max_size + 1) * PARTICLE_FRAMES
+
+
+# Bảng sprite dùng chung cho mọi ParticleSystem; mỗi kind chiếm 1 đoạn liên tục, bake khi dùng lần đầu
+_KINDS: List[ParticleKind] = []
+_BASES: List[int] = []
+_SPRITES: List[Optional[pygame.Surface]] = []
+
+
+def register_kind(name: str, colors: Sequence[Tuple[int, int, int]], max_size: int,
+                  fade: str = "alpha", halo: int = 0) -> ParticleKind:
+    kind = ParticleKind(name, colors, max_size, fade, halo)
+    kind.base = len(_SPRITES)
+    _KINDS.append(kind)
+    _BASES.append(kind.base)
+    _SPRITES.extend([None] * (len(kind.colors) * (max_size + 1) * PARTICLE_FRAMES))
+    return kind
+
+
+def _bake(index: int) -> pygame.Surface:
+    kind = _KINDS[bisect_right(_BASES, index) - 1]
+    rel = index - kind.base
+    frame = rel % PARTICLE_FRAMES
+    rel //= PARTICLE_FRAMES
+    size, variant = rel % (kind.max_size + 1), rel // (kind.max_size + 1)
+    f = frame / (PARTICLE_FRAMES - 1)  # Phần đời còn lại 0..1
+    color = kind.colors[variant]
+    if kind.fade == "alpha":
+        rgb, alpha = color, int(255 * f)
+    else:
+        rgb = tuple(min(255, int(c + (255 - c) * (1 - f))) for c in color)
+        alpha = 255 if int(255 * f * f) > 0 else 0  # Cuối đời thì biến mất hẳn
+    r = max(1, size) + kind.halo
+    surf = pygame.Surface((r * 2, r * 2), pygame.SRCALPHA)
+    if alpha and size:
+        if kind.halo:
+            pygame.draw.circle(surf, (255, 255, 255), (r, r), size + kind.halo)
+        pygame.draw.circle(surf, (rgb[0], rgb[1], rgb[2], alpha), (r, r), size)
+    _SPRITES[index] = surf
+    return surf
+
+
+class ParticleSystem:
+    """Tối đa `capacity` hạt; các hạt còn sống luôn nằm liền nhau ở đầu mảng, cũ trước mới sau."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.count = 0
+        self._next_group = 0
+        self.arrays = ({name: np.zeros(capacity, dtype=dt) for name, dt in PARTICLE_FIELDS.items()}
+                       if HAS_NUMPY else {})
+
+    def new_group(self) -> int:
+        self._next_group += 1
+        return self._next_group
+
+    def clear(self):
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def emit(self, kind: ParticleKind, xs, ys, vxs, vys, life: float, size=1.0, variant=0,
+             gravity: float = 0.0, drag: float = 1.0, group: int = 0):
+        """Thêm len(xs) hạt. xs/ys/vxs/vys là list/mảng cùng độ dài; size/variant là số hoặc list/mảng."""
+        n = len(xs)
+        if not HAS_NUMPY or n == 0:
+            return
+        if n > self.capacity:
+            xs, ys, vxs, vys = xs[-self.capacity:], ys[-self.capacity:], vxs[-self.capacity:], vys[-self.capacity:]
+            size = size[-self.capacity:] if np.ndim(size) else size
+            variant = variant[-self.capacity:] if np.ndim(variant) else variant
+            n = self.capacity
+        a = self.arrays
+        overflow = self.count + n - self.capacity
+        if overflow > 0:  # Đầy: bỏ các hạt cũ nhất ở đầu mảng
+            for arr in a.values():
+                arr[:self.count - overflow] = arr[overflow:self.count]
+            self.count -= overflow
+        s = slice(self.count, self.count + n)
+        a["x"][s] = xs
+        a["y"][s] = ys
+        a["vx"][s] = vxs
+        a["vy"][s] = vys
+        a["life"][s] = life
+        a["max_life"][s] = life
+        a["gravity"][s] = gravity
+        a["drag"][s] = drag
+        a["size0"][s] = size
+        a["sprite"][s] = kind.base + np.asarray(variant) * ((kind.max_size + 1) * PARTICLE_FRAMES)
+        a["pad"][s] = kind.halo
+        a["group"][s] = group
+        self.count += n
+
+    def emit_burst(self, kind: ParticleKind, x: float, y: float, count: int, speed: Tuple[float, float],
+                   size: Tuple[float, float], life: float, gravity: float = 0.0, drag: float = 1.0):
+        """count hạt bắn tỏa đều mọi hướng từ (x, y), tốc độ/cỡ ngẫu nhiên trong khoảng - 1 nhóm phát mới."""
+        if not HAS_NUMPY or count <= 0:
+            return
+        angle = _rng.uniform(0.0, 2 * np.pi, count)
+        spd = _rng.uniform(speed[0], speed[1], count)
+        self.emit(kind, np.full(count, x), np.full(count, y), np.cos(angle) * spd, np.sin(angle) * spd,
+                  life, size=_rng.uniform(size[0], size[1], count), gravity=gravity, drag=drag,
+                  group=self.new_group())
+
+    def update(self, dt: float):
+        n = self.count
+        if not n:
+            return
+        a = self.arrays
+        life = a["life"][:n]
+        life -= dt
+        a["x"][:n] += a["vx"][:n] * dt
+        a["y"][:n] += a["vy"][:n] * dt
+        a["vy"][:n] += a["gravity"][:n] * dt
+        a["vx"][:n] *= a["drag"][:n]
+        keep = life > 0
+        if not keep.all():  # Dồn hạt còn sống lên đầu, giữ nguyên thứ tự cũ -> mới
+            alive = int(keep.sum())
+            for arr in a.values():
+                arr[:alive] = arr[:n][keep]
+            self.count = alive
+
+    def draw(self, target: pygame.Surface):
+        n = self.count
+        if not n:
+            return
+        a = self.arrays
+        frac = np.clip(a["life"][:n] / a["max_life"][:n], 0.0, 1.0)
+        size = np.maximum(1, (a["size0"][:n] * frac).astype(np.int64))
+        index = (a["sprite"][:n] + size * PARTICLE_FRAMES
+                 + (frac * (PARTICLE_FRAMES - 1) + 0.5).astype(np.int64)).tolist()
+        radius = size + a["pad"][:n]
+        xs = (a["x"][:n].astype(np.int64) - radius).tolist()
+        ys = (a["y"][:n].astype(np.int64) - radius).tolist()
+        sprites = _SPRITES
+        for i in set(index):
+            if sprites[i] is None:
+                _bake(i)
+        target.blits([(sprites[i], (x, y)) for i, x, y in zip(index, xs, ys)], doreturn=False)
+
+    def group_bounds(self) -> List[Tuple[float, float, float, float]]:
+        """(min_x, min_y, max_x, max_y) của từng nhóm phát còn hạt - cho DirtyRectTracker."""
+        n = self.count
+        if not n:
+            return []
+        a = self.arrays
+        order = np.argsort(a["group"][:n], kind="stable")
+        groups = a["group"][:n][order]
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        xs, ys = a["x"][:n][order], a["y"][:n][order]
+        return list(zip(np.minimum.reduceat(xs, starts).tolist(), np.minimum.reduceat(ys, starts).tolist(),
+                        np.maximum.reduceat(xs, starts).tolist(), np.maximum.reduceat(ys, starts).tolist()))
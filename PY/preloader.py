@@ -0,0 +1,80 @@
+"""Tải trước asset trên worker thread để cửa sổ không bị đứng lúc khởi động.
+
+Worker chỉ đọc + decode file (pygame.image.load / mixer.Sound nhả GIL khi giải nén),
+main thread gọi pump() mỗi frame để convert dần trong 1 ngân sách thời gian nhỏ,
+nên scene loading vẫn vẽ và nhận sự kiện bình thường.
+"""
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+from asset_manager import AssetManager, assets
+
+# (đường dẫn, kích thước hoặc None, alpha, smooth) - giống tham số của AssetManager.image
+ImageJob = Tuple[str, Optional[Tuple[int, int]], bool, bool]
+
+
+class AssetPreloader:
+    def __init__(self, images: List[ImageJob], sounds: List[str] = (), manager: AssetManager = assets):
+        self.manager = manager
+        self.sounds = list(sounds)
+        images = [job for job in images if manager.needs_load(*job)]  # Atlas/cache có sẵn thì bỏ qua
+        self._jobs_by_path: Dict[str, List[ImageJob]] = {}
+        for job in images:
+            self._jobs_by_path.setdefault(job[0], []).append(job)
+        self._ready: "queue.Queue[Tuple[str, object]]" = queue.Queue()
+        self._pending: List[ImageJob] = []  # Ảnh đã decode, chờ convert trên main thread
+        self._total = len(self.sounds) + len(self._jobs_by_path) + len(images)
+        self._done = 0
+        self._thread = threading.Thread(target=self._worker, name="asset-preload", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _worker(self):
+        for path in self.sounds:
+            try:
+                snd = pygame.mixer.Sound(path) if pygame.mixer.get_init() else None
+            except Exception:
+                snd = None
+            self._ready.put((path, snd))
+        for path in self._jobs_by_path:
+            try:
+                surf = pygame.image.load(path)
+            except Exception:
+                surf = None
+            self._ready.put((path, surf))
+
+    def pump(self, budget_ms: float) -> bool:
+        """Nhận kết quả từ worker và convert tới khi hết budget_ms; True khi đã xong hết."""
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        while self._done < self._total and time.perf_counter() < deadline:
+            if self._pending:
+                path, size, alpha, smooth = self._pending.pop(0)
+                self.manager.image(path, size, alpha, smooth)
+                self._done += 1
+                continue
+            try:
+                path, obj = self._ready.get_nowait()
+            except queue.Empty:
+                break  # Worker chưa decode xong file tiếp theo - để frame sau
+            if path in self._jobs_by_path:
+                self.manager.provide(path, obj)
+                self._pending.extend(self._jobs_by_path[path])
+            else:
+                self.manager.provide_sound(path, obj)
+            self._done += 1
+        if self.done:
+            self.manager.drop_decoded()
+        return self.done
+
+    @property
+    def done(self) -> bool:
+        return self._done >= self._total
+
+    @property
+    def progress(self) -> float:
+        return self._done / self._total if self._total else 1.0
@@ -0,0 +1,128 @@
+"""Đo thời gian từng phase của Game.update (tick mô phỏng) và từng lớp vẽ của draw_game.
+
+Code được đo gọi begin() ở đầu đoạn rồi lap("tên phase") sau mỗi bước: thời gian từ lần
+begin/lap trước được cộng vào phase đó của frame hiện tại (nhiều tick mô phỏng trong 1 frame
+thì cộng dồn). Cuối frame Game.run gọi end_frame(counts) để lưu frame vào lịch sử cùng số
+lượng enemy/đạn/tower... Khi tắt (mặc định), begin/lap chỉ là 1 phép kiểm tra cờ.
+
+Lịch sử giữ PROFILER_HISTORY_FRAMES frame gần nhất: overlay hiện min/avg/p99 mỗi phase,
+export() ghi từng frame ra CSV và bảng tổng hợp ra JSON.
+"""
+import csv
+import json
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+from config import PROFILER_HISTORY_FRAMES, PROFILER_OVERLAY_REFRESH
+from text_cache import get_font
+
+PhaseStats = Tuple[float, float, float, float]  # (min, avg, p99, max) tính bằng ms
+
+
+class FrameProfiler:
+    def __init__(self, history: int = PROFILER_HISTORY_FRAMES):
+        self.enabled = False
+        self.history: "deque[Tuple[Dict[str, float], Dict[str, int]]]" = deque(maxlen=history)
+        self.phases: List[str] = []  # Theo thứ tự gặp lần đầu (overlay/CSV giữ đúng thứ tự chạy)
+        self._current: Dict[str, float] = {}
+        self._last = 0.0
+        self._overlay: Optional[pygame.Surface] = None
+        self._overlay_time = 0.0
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        self.history.clear()
+        self._current = {}
+        self._overlay = None
+
+    # ----- Đo -----
+    def begin(self):
+        if self.enabled:
+            self._last = time.perf_counter()
+
+    def lap(self, name: str):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._current[name] = self._current.get(name, 0.0) + (now - self._last) * 1000.0
+        self._last = now
+
+    def record(self, name: str, ms: float):
+        if self.enabled:
+            self._current[name] = self._current.get(name, 0.0) + ms
+
+    def end_frame(self, counts: Dict[str, int]):
+        if not self.enabled:
+            return
+        for name in self._current:
+            if name not in self.phases:
+                self.phases.append(name)
+        self.history.append((self._current, counts))
+        self._current = {}
+
+    def discard_frame(self):
+        """Bỏ số đo của frame đang dở (frame không thuộc màn chơi)."""
+        self._current = {}
+
+    # ----- Tổng hợp -----
+    def stats(self) -> Dict[str, PhaseStats]:
+        result = {}
+        for name in self.phases:
+            values = sorted(frame[name] for frame, _ in self.history if name in frame)
+            if values:
+                p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+                result[name] = (values[0], sum(values) / len(values), p99, values[-1])
+        return result
+
+    def latest_counts(self) -> Dict[str, int]:
+        return self.history[-1][1] if self.history else {}
+
+    def export(self, directory: str) -> Tuple[str, str]:
+        """Ghi profile_<thời gian>.csv (mỗi frame 1 dòng) + .json (min/avg/p99/max); trả về 2 đường dẫn."""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, time.strftime("profile_%Y%m%d_%H%M%S"))
+        count_names = sorted({name for _, counts in self.history for name in counts})
+        with open(base + ".csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + [f"{name}_ms" for name in self.phases] + count_names)
+            for i, (frame, counts) in enumerate(self.history):
+                writer.writerow([i] + [round(frame.get(name, 0.0), 4) for name in self.phases]
+                                + [counts.get(name, 0) for name in count_names])
+        summary = {
+            "frames": len(self.history),
+            "phases": {name: dict(zip(("min_ms", "avg_ms", "p99_ms", "max_ms"), (round(v, 4) for v in s)))
+                       for name, s in self.stats().items()},
+            "counts_last": self.latest_counts(),
+            "counts_max": {name: max(counts.get(name, 0) for _, counts in self.history) for name in count_names},
+        }
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return base + ".csv", base + ".json"
+
+    # ----- Overlay -----
+    def overlay(self) -> pygame.Surface:
+        """Bảng min/avg/p99 từng phase; chỉ render lại mỗi PROFILER_OVERLAY_REFRESH giây."""
+        now = time.perf_counter()
+        if self._overlay is not None and now - self._overlay_time < PROFILER_OVERLAY_REFRESH:
+            return self._overlay
+        # Font gốc (không qua text cache vì số đổi liên tục), đơn cách để các cột thẳng hàng
+        font = get_font(15, names=("consolas", "dejavusansmono", "couriernew", "monospace")).font
+        lines = [f"{'phase':<18}{'min':>7}{'avg':>7}{'p99':>7}  ms  ({len(self.history)} frames)"]
+        for name, (lo, avg, p99, _) in self.stats().items():
+            lines.append(f"{name:<18}{lo:7.2f}{avg:7.2f}{p99:7.2f}")
+        counts = self.latest_counts()
+        if counts:
+            lines.append("  ".join(f"{name} {value}" for name, value in counts.items()))
+        rendered = [font.render(line, True, (230, 230, 230)) for line in lines]
+        line_h = font.get_linesize()
+        width = max(s.get_width() for s in rendered) + 12
+        surf = pygame.Surface((width, line_h * len(rendered) + 10), pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 170))
+        for i, s in enumerate(rendered):
+            surf.blit(s, (6, 5 + i * line_h))
+        self._overlay, self._overlay_time = surf, now
+        return surf
@@ -0,0 +1,73 @@
+"""Mức đồ họa của màn chơi: bật/tắt các lớp hiệu ứng (glow, đuôi đạn, tia lửa, bong bóng độc,
+tên enemy, particle) theo tier trong config.QUALITY_TIERS.
+
+Chế độ "auto": Game.run gửi thời gian update + draw của mỗi frame vào record() - không tính lúc
+Clock ngủ chờ FPS lẫn lúc flip chờ vsync. Cứ QUALITY_WINDOW_FRAMES frame lấy trung bình 1 lần:
+vượt ngân sách thì hạ 1 mức ngay, dư nhiều trong vài lần liên tiếp mới nâng lại 1 mức. Nếu vừa
+nâng đã phải hạ thì lần nâng sau phải chờ lâu gấp đôi, tránh nhảy qua lại giữa 2 mức.
+"""
+from collections import deque
+
+from config import (
+    FPS, QUALITY_ORDER, QUALITY_TIERS, QUALITY_WINDOW_FRAMES,
+    QUALITY_DOWNGRADE_RATIO, QUALITY_UPGRADE_RATIO, QUALITY_UPGRADE_WINDOWS,
+)
+
+QUALITY_SETTINGS = ("auto",) + tuple(reversed(QUALITY_ORDER))  # Thứ tự khi bấm đổi trong Cài đặt
+
+
+class QualityManager:
+    def __init__(self, setting: str = "auto", budget_ms: float = 1000.0 / FPS):
+        self.budget_ms = budget_ms
+        self.samples = deque(maxlen=QUALITY_WINDOW_FRAMES)
+        self.configure(setting)
+
+    def configure(self, setting: str):
+        """setting: "auto" hoặc tên 1 tier (cố định, không tự đổi)."""
+        if setting not in QUALITY_TIERS:
+            setting = "auto"
+        self.setting = setting
+        self.auto = setting == "auto"
+        self._upgrade_windows = QUALITY_UPGRADE_WINDOWS
+        self._last_change = None
+        self.set_tier(QUALITY_ORDER[-1] if self.auto else setting)
+
+    def set_tier(self, tier: str):
+        self.tier = tier
+        self.flags = QUALITY_TIERS[tier]
+        self.samples.clear()
+        self._calm_windows = 0
+
+    def enabled(self, effect: str) -> bool:
+        return self.flags.get(effect, True)
+
+    def reset_samples(self):
+        """Bỏ số đo cũ (vào trận mới / vừa chuyển scene: frame đầu thường chậm bất thường)."""
+        self.samples.clear()
+        self._calm_windows = 0
+
+    def record(self, frame_ms: float) -> bool:
+        """Ghi thời gian 1 frame; True nếu tier vừa đổi."""
+        if not self.auto:
+            return False
+        self.samples.append(frame_ms)
+        if len(self.samples) < QUALITY_WINDOW_FRAMES:
+            return False
+        avg = sum(self.samples) / len(self.samples)
+        self.samples.clear()
+        idx = QUALITY_ORDER.index(self.tier)
+        if avg > self.budget_ms * QUALITY_DOWNGRADE_RATIO and idx > 0:
+            if self._last_change == "up":  # Mức vừa nâng lên không giữ nổi
+                self._upgrade_windows = min(self._upgrade_windows * 2, QUALITY_UPGRADE_WINDOWS * 8)
+            self._last_change = "down"
+            self.set_tier(QUALITY_ORDER[idx - 1])
+            return True
+        if avg < self.budget_ms * QUALITY_UPGRADE_RATIO and idx < len(QUALITY_ORDER) - 1:
+            self._calm_windows += 1
+            if self._calm_windows >= self._upgrade_windows:
+                self._last_change = "up"
+                self.set_tier(QUALITY_ORDER[idx + 1])
+                return True
+        else:
+            self._calm_windows = 0
+        return False
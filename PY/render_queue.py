@@ -0,0 +1,70 @@
+"""Gom blit theo lớp vẽ: các pass đẩy (surface, dest[, area[, flags]]) vào RenderQueue, cuối lớp
+đẩy lên màn hình bằng 1 lần Surface.blits thay vì hàng trăm lần screen.blit.
+
+Kèm cache Surface hình tròn (disc) theo bán kính/màu/alpha cho particle, đạn, glow: trước đây
+mỗi particle tạo 1 Surface SRCALPHA + draw.circle mới mỗi frame. Disc blit ra giống hệt
+pygame.draw.circle cùng tâm/bán kính.
+"""
+from collections import OrderedDict
+from typing import Tuple
+
+import pygame
+
+from config import RENDER_DISC_CACHE_SIZE
+
+
+class RenderQueue:
+    __slots__ = ("items",)
+
+    def __init__(self):
+        self.items = []
+
+    def add(self, surface: pygame.Surface, dest, area=None, flags: int = 0):
+        if flags:
+            self.items.append((surface, dest, area, flags))
+        elif area is not None:
+            self.items.append((surface, dest, area))
+        else:
+            self.items.append((surface, dest))
+
+    def add_disc(self, x: float, y: float, radius: int, color, alpha: int = 255):
+        """Hình tròn tâm (x, y) - thay cho pygame.draw.circle(screen, color, (x, y), radius)."""
+        if radius < 1:
+            return
+        self.items.append((disc(radius, color, alpha), (int(x) - radius, int(y) - radius)))
+
+    def flush(self, target: pygame.Surface):
+        if self.items:
+            target.blits(self.items, doreturn=False)
+            self.items.clear()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+_discs: "OrderedDict[Tuple, pygame.Surface]" = OrderedDict()
+
+
+def disc(radius: int, color, alpha: int = 255) -> pygame.Surface:
+    """Surface (2r x 2r) có hình tròn màu color; dùng chung - không sửa trực tiếp."""
+    key = (radius, color[0], color[1], color[2], alpha)
+    surf = _discs.get(key)
+    if surf is not None:
+        _discs.move_to_end(key)
+        return surf
+    surf = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(surf, (color[0], color[1], color[2], alpha), (radius, radius), radius)
+    _discs[key] = surf
+    if len(_discs) > RENDER_DISC_CACHE_SIZE:
+        _discs.popitem(last=False)
+    return surf
+
+
+def quantize(value: float, steps: int = 16) -> int:
+    """Làm tròn giá trị màu/alpha 0..255 về `steps` mức (0 và 255 vẫn giữ nguyên) để cache disc trúng nhiều hơn."""
+    step = 255 / (steps - 1)
+    return int(round(int(value) / step) * step + 0.5) if value > 0 else 0
+
+
+def quantize_color(color, steps: int = 16) -> Tuple[int, int, int]:
+    return (quantize(color[0], steps), quantize(color[1], steps), quantize(color[2], steps))
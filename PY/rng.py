@@ -0,0 +1,34 @@
+"""RNG có seed cho từng trận: mỗi hệ thống (wave, junction...) có random.Random riêng.
+
+Tất cả stream được suy ra từ 1 match seed duy nhất, nên cùng seed + cùng thao tác
+sẽ cho ra đúng cùng một trận (replay), và nhiều trận chạy song song không dùng chung
+trạng thái của module random toàn cục.
+"""
+import hashlib
+import random
+from typing import Dict
+
+
+def derive_seed(match_seed: int, stream: str) -> int:
+    """Seed 64-bit ổn định cho 1 stream, suy ra từ match seed (không phụ thuộc PYTHONHASHSEED)."""
+    digest = hashlib.sha256(f"{match_seed}:{stream}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def new_match_seed() -> int:
+    """Seed ngẫu nhiên cho trận mới (khi không chỉ định seed)."""
+    return random.SystemRandom().randrange(1 << 32)
+
+
+class MatchRNG:
+    """Tập các stream random.Random của 1 trận, tạo lười theo tên."""
+
+    def __init__(self, match_seed: int):
+        self.match_seed = match_seed
+        self._streams: Dict[str, random.Random] = {}
+
+    def stream(self, name: str) -> random.Random:
+        rng = self._streams.get(name)
+        if rng is None:
+            rng = self._streams[name] = random.Random(derive_seed(self.match_seed, name))
+        return rng
@@ -0,0 +1,273 @@
+"""Lõi mô phỏng trận đấu dùng chung cho Game (có cửa sổ) và HeadlessGame (headless.py).
+
+SimulationCore chỉ chứa logic: map, wave, enemy, tower, projectile, tiền/mạng.
+Không tạo cửa sổ, không âm thanh, không load asset. Phần hiển thị (hiệu ứng chết,
+damage text, âm thanh, thông báo) được Game gắn vào qua các hook _on_*.
+"""
+from typing import List, Optional
+
+from config import (
+    MODE_PARAMS, TOWER_DEFS, PERMANENT_MAP_LEVEL, USE_ENEMY_POOL, waves_in_level,
+    SIM_DT, SIM_MAX_FRAME_TIME, SIM_MAX_CATCHUP_STEPS,
+)
+from utils import grid_to_px
+from maps import make_map, make_permanent_map, expand_path_cells
+from rng import MatchRNG, new_match_seed
+from entities import (
+    Enemy, EnemyEvents, Projectile, ProjectilePool, Tower, SpatialGrid, resolve_impacts,
+)
+from wave_manager import WaveManager
+from enemy_pool import EnemyPool, HAS_NUMPY
+from profiler import FrameProfiler
+
+
+def compute_stars(lives: int, max_lives: int) -> int:
+    """Số sao khi qua màn: 3 sao nếu không mất mạng, giảm 1 sao mỗi mạng mất, tối thiểu 1 sao."""
+    if lives <= 0:
+        return 1  # Nếu game over, chỉ được 1 sao
+    return max(1, 3 - (max_lives - lives))
+
+
+def make_tower(gx: int, gy: int, ttype: str) -> Tower:
+    """Tạo tower cấp 1 theo thông số trong TOWER_DEFS."""
+    spec = TOWER_DEFS[ttype]
+    return Tower(gx, gy, ttype=ttype,
+                 range=spec["range"], fire_rate=spec["firerate"], damage=spec.get("damage", 20),
+                 splash=spec.get("splash", 0.0), slow_mul=spec.get("slow", 1.0), slow_time=spec.get("slow_time", 0.0),
+                 poison_damage=spec.get("poison_damage", 0.0), poison_time=spec.get("poison_time", 0.0))  # Poison support
+
+
+class SimulationCore:
+    """Mixin chứa trạng thái thế giới và 1 tick mô phỏng cố định (_sim_step)."""
+
+    profiler = FrameProfiler()  # Mặc định tắt; Game gán profiler riêng (F3) để đo từng phase của tick
+
+    def _init_world(self, mode_name: str, level: int, seed: Optional[int] = None):
+        """Thiết lập lại thế giới của 1 ván: tham số mode, tiền/mạng, map, wave manager, pool.
+
+        seed là match seed: cùng seed (và cùng thao tác) thì trận diễn ra y hệt. None = seed mới.
+        """
+        self.match_seed = seed if seed is not None else new_match_seed()
+        self.rng = MatchRNG(self.match_seed)
+        # Mode & tham số
+        self.mode_name = mode_name
+        mp = MODE_PARAMS[self.mode_name]
+        self.level = level
+        self.max_waves = waves_in_level(self.level)
+        self.is_permanent_map = (PERMANENT_MAP_LEVEL is not None and self.level == PERMANENT_MAP_LEVEL)
+        if self.is_permanent_map:
+            # Permanent map: fixed 5 waves as requested
+            self.max_waves = 5
+
+        # Trạng thái người chơi / trận
+        self.money = mp["money"]
+        self.lives = mp["lives"]
+        self.speed_scale = 1.0
+        self.sim_accumulator = 0.0  # Thời gian game chưa được mô phỏng (< SIM_DT)
+        self.sim_alpha = 1.0        # Hệ số nội suy khi vẽ giữa 2 tick gần nhất
+        self.win_level = False
+        self.game_over_reason = None  # Lý do thua game ("boss_escaped" hoặc "no_lives")
+        self.kills = 0
+        self.towers_built = 0
+        self.money_spent = 0
+
+        # World rỗng
+        self.towers: List[Tower] = []
+        self.projectiles: List[Projectile] = []
+        self.projectile_pool = ProjectilePool()
+        self.enemies: List[Enemy] = []
+        self.enemy_events = EnemyEvents()  # Enemy chết/thoát chưa xử lý (thưởng, mạng, dọn list)
+        self.occupied = set()
+        self.enemy_grid = SpatialGrid()  # Spatial index cho targeting của tower
+
+        # Đường đi theo level hiện tại
+        if self.is_permanent_map:
+            multipath_grid = make_permanent_map()
+        else:
+            multipath_grid = make_map(self.level)  # Load map theo level, không phải index
+        self.paths_grid = multipath_grid
+        self.paths_px = [[grid_to_px(x, y) for (x, y) in path] for path in multipath_grid]
+        # Tập ô thuộc đường đi (để chặn đặt trụ)
+        self.path_cells = expand_path_cells(multipath_grid)
+        self.exit_cells = [p[-1] for p in multipath_grid]
+
+        # Wave manager (không tự động start, chờ setup phase)
+        self.wave_mgr = WaveManager(
+            [[grid_to_px(x, y) for (x, y) in path] for path in multipath_grid],
+            mp["hp_mul"], mp["spd_mul"],
+            level=self.level,
+            special_mode=('permanent' if self.is_permanent_map else None),
+            rng=self.rng.stream("waves"), junction_rng=self.rng.stream("junction"),
+        )
+        # 🆕 Enemy pool dạng mảng (NumPy) để cập nhật toàn bộ enemy trong 1 lần gọi
+        self.enemy_pool = EnemyPool(events=self.enemy_events) if (USE_ENEMY_POOL and HAS_NUMPY) else None
+        self.wave_mgr.enemy_pool = self.enemy_pool
+        self.wave_mgr.events = self.enemy_events
+
+    # ----- Hook cho phần hiển thị (Game override, headless để trống) -----
+    def notice(self, text, time_sec=2.0):
+        pass
+
+    def handle_level_clear(self):
+        self.win_level = True
+
+    def _on_shot(self, tower: Tower, projectile: Projectile):
+        pass
+
+    def _on_hit(self, enemy: Enemy, x: float, y: float, damage: int):
+        pass
+
+    def _on_enemy_escaped(self, enemy: Enemy):
+        pass
+
+    def _on_enemy_killed(self, enemy: Enemy):
+        pass
+
+    def _on_boss_wave(self):
+        pass
+
+    def _update_effects(self, sdt: float):
+        pass
+
+    # ----- Vòng mô phỏng -----
+    def _advance_simulation(self, dt: float):
+        """Fixed timestep: dồn thời gian game vào accumulator rồi chạy các tick SIM_DT.
+
+        Tốc độ x2 = gấp đôi số tick, mỗi tick vẫn dài như nhau nên kết quả không đổi.
+        """
+        self.sim_accumulator += min(dt, SIM_MAX_FRAME_TIME) * self.speed_scale
+        steps = int(self.sim_accumulator / SIM_DT + 1e-9)  # +epsilon: tránh mất tick do sai số float
+        max_steps = int(SIM_MAX_CATCHUP_STEPS * max(1.0, self.speed_scale))
+        if steps > max_steps:
+            steps = max_steps
+            self.sim_accumulator = steps * SIM_DT  # Bỏ phần tồn đọng, game chậm lại thay vì đứng hình
+        for i in range(steps):
+            if i == steps - 1:
+                self._snapshot_positions()  # Vị trí trước tick cuối để nội suy khi vẽ
+            self.sim_accumulator -= SIM_DT
+            self._sim_step(SIM_DT)
+            if self._sim_stopped():
+                self.sim_accumulator = 0.0
+                break
+        self.sim_alpha = min(1.0, max(0.0, self.sim_accumulator / SIM_DT))
+
+    def _sim_stopped(self) -> bool:
+        return self.lives <= 0 or self.win_level
+
+    def _snapshot_positions(self):
+        """Lưu vị trí hiện tại của enemy/projectile làm trạng thái 'trước' cho render_pos."""
+        if self.enemy_pool is not None:
+            self.enemy_pool.snapshot_positions()
+        else:
+            for e in self.enemies:
+                e.prev_x, e.prev_y = e.x, e.y
+        for p in self.projectiles:
+            p.prev_x, p.prev_y = p.x, p.y
+
+    def _remove_dead_enemies(self):
+        """Lọc enemy đã chết/thoát khỏi self.enemies tại chỗ (giữ nguyên thứ tự) và trả slot pool."""
+        events = self.enemy_events
+        pool = self.enemy_pool
+        if pool is not None:
+            for e in events.deaths:
+                pool.release(e)
+            for e in events.escapes:
+                pool.release(e)
+        enemies = self.enemies
+        live = 0
+        for e in enemies:
+            if e.alive:
+                enemies[live] = e
+                live += 1
+        del enemies[live:]
+        events.clear()
+
+    def _sim_step(self, sdt: float):
+        """1 tick mô phỏng cố định: spawn, di chuyển, bắn, va chạm, thưởng, dọn dẹp."""
+        prof = self.profiler
+        prof.begin()
+        spawned = self.wave_mgr.update(sdt)
+        self.enemies.extend(spawned)
+        prof.lap("sim:spawn")
+
+        if self.enemy_pool is not None:
+            self.enemy_pool.update(sdt)  # Vector hóa: regen/slow/poison/di chuyển cho mọi enemy
+        else:
+            for e in self.enemies: e.update(sdt)
+
+        events = self.enemy_events
+        for e in events.escapes:  # Chỉ enemy vừa tới cuối đường trong tick này
+            e.alive = False
+
+            # Nếu boss thoát thì thua ngay lập tức
+            if e.etype == "boss":
+                self.lives = 0  # Game over ngay lập tức
+                self.game_over_reason = "boss_escaped"  # Lý do thua
+            else:
+                self.lives -= 1  # Enemy thường chỉ trừ 1 mạng
+                if self.lives <= 0 and self.game_over_reason is None:
+                    self.game_over_reason = "no_lives"  # Lý do thua do hết mạng
+            self._on_enemy_escaped(e)
+        prof.lap("sim:enemies")
+
+        # Build lại spatial grid 1 lần/frame, tower chỉ duyệt ứng viên trong các ô quanh tầm bắn.
+        # Không sort enemy theo progress: acquire vẫn phải xét hết ứng viên để tìm enemy gần nhất
+        # (góc aim), nên chọn "first"/"last" bằng max progress trong cùng lượt đó là đủ
+        if self.enemy_pool is not None:
+            targets = self.enemy_pool  # Pool tự lọc tầm bắn bằng numpy, không cần grid
+        else:
+            self.enemy_grid.rebuild(self.enemies)
+            targets = self.enemy_grid
+        for t in self.towers:
+            t.update(sdt); t.acquire(targets)  # 1 lượt duyệt cho cả aim lẫn chọn mục tiêu
+            prj = t.try_fire(pool=self.projectile_pool)
+            if prj:
+                self.projectiles.append(prj)
+                self._on_shot(t, prj)
+        prof.lap("sim:targeting")
+
+        # Update projectiles
+        impacts: List[Projectile] = []  # Đạn splash đã nổ trong frame này
+        for p in self.projectiles:
+            # Lưu target trước khi update
+            old_target_alive = p.target and p.target.alive
+            old_target_hp = p.target.hp if p.target else 0
+
+            p.update(sdt, self.enemies, impacts)
+
+            # Nếu projectile vừa hit target (không còn alive và target bị damage)
+            if not p.alive and old_target_alive and p.target and p.target.hp < old_target_hp:
+                tx, ty = p.target.pos()
+                self._on_hit(p.target, tx, ty, int(old_target_hp - p.target.hp))
+
+        # Sát thương lan: 1 lượt cho mọi điểm nổ (pool: numpy, không pool: query spatial grid)
+        if impacts:
+            resolve_impacts(impacts, targets)
+        prof.lap("sim:projectiles")
+
+        # Xử lý địch chết: cộng thưởng (cả enemy bị giết ngoài tick, vd. powerup Airstrike)
+        for e in events.deaths:
+            if e.reward > 0:
+                self.money += e.reward; self.kills += 1; e.reward = 0
+                self._on_enemy_killed(e)
+        prof.lap("sim:deaths")
+
+        self._update_effects(sdt)
+        prof.lap("sim:effects")
+
+        # Loại bỏ các đối tượng đã chết/hết hạn: list enemy chỉ được dọn khi tick có enemy chết/thoát
+        if events:
+            self._remove_dead_enemies()
+        self.projectile_pool.compact(self.projectiles)  # Lọc tại chỗ, đạn chết quay về free list
+        prof.lap("sim:compact")
+
+        if (not self.wave_mgr.active) and self.wave_mgr.cooldown <= 0.0 and len(self.enemies) == 0:
+            # For permanent map, never call handle_level_clear — waves are infinite
+            if not self.is_permanent_map and self.wave_mgr.wave_no >= self.max_waves:
+                self.handle_level_clear(); return
+            else:
+                self.wave_mgr.start_next_wave()
+                # Hiển thị boss warning
+                if getattr(self.wave_mgr, 'just_started_boss_wave', False):
+                    self._on_boss_wave()
+                    self.wave_mgr.just_started_boss_wave = False
@@ -0,0 +1,51 @@
+"""Sprite xoay sẵn theo N góc (và mờ dần theo M mức alpha) cho enemy/tower.
+
+pygame.transform.rotate mỗi frame cho từng enemy/tower rất tốn; enemy chỉ đi theo đường
+lưới nên gần như chỉ dùng 4 góc, tower thì xoay liên tục nhưng lệch vài độ không thấy được.
+Mọi góc được làm tròn về bội số 360/steps: vẽ chỉ còn tra dict + blit.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import pygame
+
+from config import SPRITE_ROTATION_STEPS, SPRITE_ALPHA_STEPS
+
+
+class RotationCache:
+    """Bảng sprite[key][chỉ số góc], bản mờ (alpha < 1) tạo lười khi cần lần đầu."""
+
+    def __init__(self, steps: int = SPRITE_ROTATION_STEPS, alpha_steps: int = SPRITE_ALPHA_STEPS):
+        self.steps = steps
+        self.step_deg = 360.0 / steps
+        self.alpha_steps = alpha_steps
+        self._rotations: Dict[str, List[pygame.Surface]] = {}
+        self._sources: Dict[str, pygame.Surface] = {}
+        self._faded: Dict[Tuple[str, int, int], pygame.Surface] = {}
+
+    def add(self, key: str, surface: Optional[pygame.Surface]):
+        """Xoay sẵn surface theo đủ steps góc (gọi lúc load asset)."""
+        if surface is None or self._sources.get(key) is surface:
+            return
+        self._sources[key] = surface
+        self._rotations[key] = [pygame.transform.rotate(surface, i * self.step_deg) for i in range(self.steps)]
+        self._faded = {k: v for k, v in self._faded.items() if k[0] != key}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rotations
+
+    def get(self, key: str, angle_deg: float, alpha: float = 1.0) -> pygame.Surface:
+        """Sprite gần góc angle_deg nhất (độ, ngược chiều kim đồng hồ như transform.rotate).
+
+        alpha < 1: bản mờ, alpha làm tròn về alpha_steps mức. Surface trả về dùng chung - không sửa.
+        """
+        idx = int(round(angle_deg / self.step_deg)) % self.steps
+        if alpha >= 1.0:
+            return self._rotations[key][idx]
+        level = max(0, int(round(alpha * self.alpha_steps)))
+        fkey = (key, idx, level)
+        surf = self._faded.get(fkey)
+        if surf is None:
+            surf = self._rotations[key][idx].copy()
+            surf.set_alpha(int(255 * level / self.alpha_steps))
+            self._faded[fkey] = surf
+        return surf
@@ -0,0 +1,110 @@
+"""Font registry + cache LRU cho Surface chữ đã render.
+
+Mỗi (tên font, size, bold) chỉ tạo pygame Font 1 lần. Font trả về là CachedFont:
+render() lấy Surface từ cache LRU chung theo (font, text, antialias, màu, nền), nên các
+chuỗi lặp lại mỗi frame (HUD, menu, bảng xếp hạng...) chỉ rasterize 1 lần.
+
+Surface trả về dùng chung giữa các lần gọi: không được sửa trực tiếp (set_alpha, fill,
+blit lên...) - cần thì copy() trước.
+"""
+from collections import OrderedDict
+from typing import Dict, Sequence, Tuple
+
+import pygame
+
+from config import TEXT_CACHE_SIZE
+
+# Font hỗ trợ tiếng Việt, thử lần lượt (giống Game._get_font trước đây)
+VIETNAMESE_FONTS = ("tahoma", "segoe ui", "arial", "calibri")
+
+_fonts: Dict[Tuple, "CachedFont"] = {}
+_surfaces: "OrderedDict[Tuple, pygame.Surface]" = OrderedDict()
+
+
+def _color_key(color):
+    # pygame.Color không hash được; chuỗi tên màu ("white") giữ nguyên
+    return color if color is None or isinstance(color, str) else tuple(color)
+
+
+def _cache_get(key, make):
+    surf = _surfaces.get(key)
+    if surf is not None:
+        _surfaces.move_to_end(key)
+        return surf
+    surf = make()
+    _surfaces[key] = surf
+    if len(_surfaces) > TEXT_CACHE_SIZE:
+        _surfaces.popitem(last=False)  # Bỏ Surface lâu nhất không dùng
+    return surf
+
+
+class CachedFont:
+    """Bọc pygame Font: render() đi qua cache, mọi thuộc tính khác (size, get_height...) chuyển cho font gốc."""
+
+    __slots__ = ("font",)
+
+    def __init__(self, font: pygame.font.Font):
+        self.font = font
+
+    def render(self, text, antialias, color, background=None) -> pygame.Surface:
+        key = (self, text, antialias, _color_key(color), _color_key(background))
+        if background is None:
+            return _cache_get(key, lambda: self.font.render(text, antialias, color))
+        return _cache_get(key, lambda: self.font.render(text, antialias, color, background))
+
+    def __getattr__(self, name):
+        return getattr(self.font, name)
+
+
+def get_font(size: int, bold: bool = False, names: Sequence[str] = VIETNAMESE_FONTS) -> CachedFont:
+    """SysFont đầu tiên tạo được trong names, fallback font mặc định của pygame (size * 1.2)."""
+    key = (tuple(names), size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        base = None
+        for name in names:
+            try:
+                base = pygame.font.SysFont(name, size, bold=bold)
+                break
+            except Exception:
+                continue
+        if base is None:
+            base = pygame.font.Font(None, int(size * 1.2))
+        font = _fonts[key] = CachedFont(base)
+    return font
+
+
+def get_default_font(size: int) -> CachedFont:
+    """pygame.font.Font(None, size) dùng chung (tên enemy, damage text...)."""
+    key = (None, size, False)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = CachedFont(pygame.font.Font(None, size))
+    return font
+
+
+def render_outlined(font, text: str, color, outline_color, outline_width: int = 2) -> pygame.Surface:
+    """Chữ có viền outline_width px mỗi phía, ghép sẵn vào 1 Surface (lớn hơn chữ 2*outline_width).
+
+    Viền là chữ màu outline_color vẽ ở mọi độ lệch trong ô vuông quanh chữ chính - trước đây
+    làm trực tiếp lên màn hình mỗi frame (tới 24 lần blit cho 1 dòng), giờ chỉ ghép 1 lần.
+    Surface ở dạng alpha nhân sẵn (ghép chồng lớp mới đúng như vẽ thẳng lên màn hình): phải blit
+    với special_flags=pygame.BLEND_PREMULTIPLIED. Cần display đã mở (convert_alpha).
+    """
+    key = ("outline", font, text, _color_key(color), _color_key(outline_color), outline_width)
+
+    def make():
+        outline = font.render(text, True, outline_color).convert_alpha().premul_alpha()
+        main = font.render(text, True, color).convert_alpha().premul_alpha()
+        w = outline_width
+        surf = pygame.Surface((main.get_width() + 2 * w, main.get_height() + 2 * w), pygame.SRCALPHA)
+        surf.blits([(outline, (w + dx, w + dy), None, pygame.BLEND_PREMULTIPLIED)
+                    for dx in range(-w, w + 1) for dy in range(-w, w + 1) if dx or dy], doreturn=False)
+        surf.blit(main, (w, w), special_flags=pygame.BLEND_PREMULTIPLIED)
+        return surf
+    return _cache_get(key, make)
+
+
+def clear():
+    """Xoá toàn bộ Surface đã cache (font vẫn giữ)."""
+    _surfaces.clear()
@@ -1,12 +1,7 @@
 ﻿import os, time, random, math, hashlib, secrets, json, sys
-import io
-
-# Fix UTF-8 encoding cho Windows console
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
 from dataclasses import dataclass
-from typing import List, Tuple, Optional, Set, Dict
+from typing import List, Tuple, Optional, Dict
 import pygame
 
 from config import (
@@ -16,60 +11,53 @@ from config import (
     BASE_START_MONEY, BASE_START_LIVES, SELL_REFUND_RATE, PROJECTILE_SPEED,
     RANGE_TILES, RANGE_PX, H_RANGE_TILES, H_RANGE_PX,
     TOWER_DEFS, TOWER_KEYS, TOWER_UPGRADE, ENEMY_TYPES, ALL_TOWER_KEYS, DEFAULT_LOADOUT,
-    SPAWN_GAP, WAVE_COOLDOWN, TOTAL_LEVELS, MAX_LEVELS, waves_in_level, MODE_PARAMS, MODES,
+    TARGET_PRIORITY_NAMES,
+    SPAWN_GAP, WAVE_COOLDOWN, TOTAL_LEVELS, MAX_LEVELS, MODE_PARAMS, MODES,
     BOSS_LEVELS, BOSS_HP_MULTIPLIER, BOSS_REWARD_MULTIPLIER,
     POWERUPS,
-    PERMANENT_MAP_LEVEL,
+    PERMANENT_MAP_LEVEL, DIRTY_RECT_RENDERING, DIRTY_RECT_MAX_COVERAGE,
+    GATE_PARTICLE_CAPACITY, GATE_ANIMATION_FRAMES, EFFECT_PARTICLE_CAPACITY, PROFILE_DIR,
+    ASYNC_PRELOAD, PRELOAD_FRAME_BUDGET_MS, ATLAS_ENABLED, ATLAS_DIR, ATLAS_SHEET_SIZE, ATLAS_MAX_SPRITE,
     SCENE_MENU, SCENE_GAME, SCENE_ALL_CLEAR, SCENE_LEVEL_SELECT, SCENE_SHOP, SCENE_STATS,
-    SCENE_LEADER, SCENE_NAME, SCENE_AUTH, SCENE_MAP_PREVIEW, SCENE_SETTINGS,
+    SCENE_LEADER, SCENE_NAME, SCENE_AUTH, SCENE_MAP_PREVIEW, SCENE_SETTINGS, SCENE_LOADING,
 )
 pygame.init()
 from utils import (
     grid_to_px, px_to_grid, clamp,
     load_img, load_sprite, try_tileset,
-    load_shoot_sound, list_music, play_random_music,
+    load_shoot_sound, list_music, play_random_music, SHOOT_SOUND_FILES,
     DEFAULT_SAVE, SAVE_KEYS_ORDER, load_save, save_save, load_accounts, save_accounts,
 )
+from render_queue import RenderQueue, disc
+import game_log
+
+save_log = game_log.get_logger("save")
+level_log = game_log.get_logger("level")
+asset_log = game_log.get_logger("assets")
+audio_log = game_log.get_logger("audio")
+event_log = game_log.get_logger("game")
+from particles import ParticleSystem, register_kind
+from floating_text import DamageTextPool
 
 # Helpers (load/save, audio, music listing) are provided by utils.py
 
 # ------------------- PARTICLES -------------------
-class Particle:
-    def __init__(self, x, y, vx, vy, color, life):
-        self.x = x
-        self.y = y
-        self.vx = vx
-        self.vy = vy
-        self.color = color
-        self.life = life
-        self.max_life = life
-        
-    def update(self, dt):
-        self.x += self.vx * dt
-        self.y += self.vy * dt
-        self.life -= dt
-        return self.life > 0
-        
-    def draw(self, screen):
-        if self.life <= 0:
-            return
-        alpha = int(255 * (self.life / self.max_life))
-        size = max(1, int(4 * (self.life / self.max_life)))
-        if alpha > 0:
-            color_with_alpha = (*self.color[:3], alpha)
-            surf = pygame.Surface((size*2, size*2), pygame.SRCALPHA)
-            pygame.draw.circle(surf, color_with_alpha, (size, size), size)
-            screen.blit(surf, (int(self.x-size), int(self.y-size)))
+# Hạt quanh cổng: 9 biến thể màu mỗi loại (trước đây random từng kênh màu)
+GATE_PARTICLE_KINDS = {
+    "entrance": register_kind("gate_entrance", [(255, g, b) for g in (80, 100, 120) for b in (80, 100, 120)], 4),  # Đỏ đậm
+    "exit": register_kind("gate_exit", [(r, 255, b) for r in (80, 100, 120) for b in (120, 150, 180)], 4),  # Xanh sáng
+}
 
 # ------------------- ANIMATED GATES -------------------
 class AnimatedGate:
-    def __init__(self, x, y, gate_type="entrance"):
+    def __init__(self, x, y, particles: ParticleSystem, gate_type="entrance"):
         self.x = x
         self.y = y
         self.gate_type = gate_type  # "entrance" hoặc "exit"
         self.animation_time = 0
         self.pulse_speed = 2.0  # Tốc độ animation
-        self.particles = []
+        self.particles = particles  # Hệ dùng chung giữa các cổng (Game update/vẽ)
+        self.particle_group = self.particles.new_group()
         self.particle_timer = 0
         
     def update(self, dt):
@@ -82,127 +70,128 @@ class AnimatedGate:
             center_x = self.x * TILE + TILE // 2
             center_y = self.y * TILE + TILE // 2
             
+            kind = GATE_PARTICLE_KINDS[self.gate_type]
             if self.gate_type == "entrance":
                 # Particles đỏ xoáy quanh cổng vào (nguy hiểm)
+                xs, ys, vxs, vys = [], [], [], []
                 for i in range(3):
                     angle = random.uniform(0, math.pi * 2)
                     radius = random.uniform(20, 40)
-                    px = center_x + math.cos(angle) * radius
-                    py = center_y + math.sin(angle) * radius
-                    vx = math.cos(angle + math.pi/2) * 40
-                    vy = math.sin(angle + math.pi/2) * 40
-                    color = (255, random.randint(80, 120), random.randint(80, 120))  # Đỏ đậm
-                    self.particles.append(Particle(px, py, vx, vy, color, 2.5))
+                    xs.append(center_x + math.cos(angle) * radius)
+                    ys.append(center_y + math.sin(angle) * radius)
+                    vxs.append(math.cos(angle + math.pi/2) * 40)
+                    vys.append(math.sin(angle + math.pi/2) * 40)
+                self.particles.emit(kind, xs, ys, vxs, vys, 2.5, size=4,
+                                    variant=[random.randrange(9) for _ in xs], group=self.particle_group)
             else:
                 # Particles xanh bay ra từ cổng ra (an toàn)
-                for i in range(2):
-                    px = center_x + random.uniform(-15, 15)
-                    py = center_y + random.uniform(-10, 10)
-                    vx = random.uniform(30, 50)  # Bay sang phải (hướng ra)
-                    vy = random.uniform(-30, 30)
-                    color = (random.randint(80, 120), 255, random.randint(120, 180))  # Xanh sáng
-                    self.particles.append(Particle(px, py, vx, vy, color, 2.0))
-        
-        # Update particles
-        self.particles = [p for p in self.particles if p.update(dt)]
-        
-    def draw(self, screen, tiles):
-        # Vẽ particles trước (ở phía sau)
-        for particle in self.particles:
-            particle.draw(screen)
-            
+                xs = [center_x + random.uniform(-15, 15) for i in range(2)]
+                ys = [center_y + random.uniform(-10, 10) for i in range(2)]
+                vxs = [random.uniform(30, 50) for i in range(2)]  # Bay sang phải (hướng ra)
+                vys = [random.uniform(-30, 30) for i in range(2)]
+                self.particles.emit(kind, xs, ys, vxs, vys, 2.0, size=4,
+                                    variant=[random.randrange(9) for _ in xs], group=self.particle_group)
+        
+    def draw(self, queue: RenderQueue):
+        """Đẩy glow + thân cổng vào queue (Game flush 1 lần cho mọi cổng, particles do Game vẽ trước).
+
+        Hình cổng lặp lại theo chu kỳ GATE_PERIOD của animation_time nên được làm tròn về
+        GATE_ANIMATION_FRAMES pha: mỗi pha dựng Surface 1 lần (dùng chung giữa các cổng cùng loại).
+        """
+        phase = int(self.animation_time % GATE_PERIOD / GATE_PERIOD * GATE_ANIMATION_FRAMES) % GATE_ANIMATION_FRAMES
+        t = phase * GATE_PERIOD / GATE_ANIMATION_FRAMES
         # Hiệu ứng pulse và glow
-        pulse = abs(math.sin(self.animation_time)) * 0.3 + 0.7  # 0.7 -> 1.0
-        
+        pulse = abs(math.sin(t)) * 0.3 + 0.7  # 0.7 -> 1.0
+        cx, cy = self.x * TILE + TILE // 2, self.y * TILE + TILE // 2
+        glow_radius = int(TILE * 0.8 * pulse)
         if self.gate_type == "entrance":
-            # Cổng vào - màu đỏ với hiệu ứng nguy hiểm (địch xuất hiện)
-            base_color = (255, 80, 80)      # Đỏ sáng
-            glow_color = (255, 120, 120)    # Đỏ glow
-            
-            # Vẽ glow effect đỏ
-            glow_radius = int(TILE * 0.8 * pulse)
+            # Glow đỏ, alpha cao hơn cho hiệu ứng nguy hiểm
             for i in range(3):
-                alpha = int(80 * (1 - i/3) * pulse)  # Alpha cao hơn cho hiệu ứng mạnh
-                glow_surf = pygame.Surface((glow_radius*2, glow_radius*2), pygame.SRCALPHA)
-                pygame.draw.circle(glow_surf, (*glow_color, alpha), (glow_radius, glow_radius), glow_radius - i*8)
-                screen.blit(glow_surf, (self.x*TILE + TILE//2 - glow_radius, self.y*TILE + TILE//2 - glow_radius))
-            
-            # Vẽ cổng chính đỏ
-            gate_size = int(TILE * 0.9 * pulse)
-            gate_surf = pygame.Surface((gate_size, gate_size), pygame.SRCALPHA)
-            pygame.draw.rect(gate_surf, (*base_color, 220), (0, 0, gate_size, gate_size), border_radius=12)
-            pygame.draw.rect(gate_surf, (255, 200, 200), (0, 0, gate_size, gate_size), width=3, border_radius=12)
-            
-            # Vẽ ký hiệu cảnh báo thay vì portal xoay
-            center_x, center_y = gate_size//2, gate_size//2
-            warning_size = int(gate_size//3 * pulse)
-            
-            # Vẽ tam giác cảnh báo với animation nhấp nháy
-            warning_alpha = int(200 + 55 * math.sin(self.animation_time * 6))  # Nhấp nháy
-            triangle_points = [
-                (center_x, center_y - warning_size),
-                (center_x - warning_size, center_y + warning_size//2),
-                (center_x + warning_size, center_y + warning_size//2)
-            ]
-            pygame.draw.polygon(gate_surf, (255, 255, 100, warning_alpha), triangle_points)
-            pygame.draw.polygon(gate_surf, (200, 0, 0), triangle_points, 2)
-            
-            # Dấu chấm than trong tam giác
-            pygame.draw.circle(gate_surf, (200, 0, 0), (center_x, center_y - warning_size//4), 3)
-            pygame.draw.circle(gate_surf, (200, 0, 0), (center_x, center_y + warning_size//4), 2)
-            
-            screen.blit(gate_surf, (self.x*TILE + (TILE-gate_size)//2, self.y*TILE + (TILE-gate_size)//2))
-            
-        else:  # exit gate
-            # Cổng ra - màu xanh với hiệu ứng an toàn (địch thoát ra)
-            base_color = (80, 200, 120)     # Xanh lá sáng
-            glow_color = (120, 240, 160)    # Xanh glow
-            
-            # Vẽ glow effect xanh
-            glow_radius = int(TILE * 0.8 * pulse)
-            for i in range(3):
-                alpha = int(70 * (1 - i/3) * pulse)  # Alpha vừa phải cho hiệu ứng êm
-                glow_surf = pygame.Surface((glow_radius*2, glow_radius*2), pygame.SRCALPHA)
-                pygame.draw.circle(glow_surf, (*glow_color, alpha), (glow_radius, glow_radius), glow_radius - i*10)
-                screen.blit(glow_surf, (self.x*TILE + TILE//2 - glow_radius, self.y*TILE + TILE//2 - glow_radius))
-            
-            # Vẽ base chính xanh
-            base_size = int(TILE * 1.0 * pulse)
-            base_surf = pygame.Surface((base_size, base_size), pygame.SRCALPHA)
-            pygame.draw.rect(base_surf, (*base_color, 200), (0, 0, base_size, base_size), border_radius=15)
-            pygame.draw.rect(base_surf, (150, 255, 180), (0, 0, base_size, base_size), width=3, border_radius=15)
-            
-            # Vẽ ký hiệu mũi tên hướng ra thay vì lửa
-            center_x, center_y = base_size//2, base_size//2
-            arrow_size = int(base_size//3 * pulse)
-            arrow_breath = math.sin(self.animation_time * 4) * 0.15 + 0.85  # Hiệu ứng thở nhẹ
-            
-            # Vẽ 3 mũi tên chồng lên nhau để tạo hiệu ứng chuyển động
+                queue.add_disc(cx, cy, glow_radius - i*8, (255, 120, 120), int(80 * (1 - i/3) * pulse))
+        else:
+            # Glow xanh, alpha vừa phải cho hiệu ứng êm
             for i in range(3):
-                offset = i * 8 - 8  # Tạo khoảng cách giữa các mũi tên
-                arrow_alpha = int(255 * arrow_breath * (1 - i * 0.3))
-                arrow_color = (100, 255, 150, arrow_alpha)
-                
-                # Mũi tên hướng phải (→)
-                arrow_points = [
-                    (center_x - arrow_size + offset, center_y - arrow_size//2),
-                    (center_x + arrow_size//2 + offset, center_y),
-                    (center_x - arrow_size + offset, center_y + arrow_size//2),
-                    (center_x - arrow_size//3 + offset, center_y)
-                ]
-                if arrow_alpha > 50:  # Chỉ vẽ nếu đủ sáng
-                    pygame.draw.polygon(base_surf, arrow_color[:3], arrow_points)
-            
-            # Viền mũi tên chính
-            main_arrow_points = [
-                (center_x - arrow_size, center_y - arrow_size//2),
-                (center_x + arrow_size//2, center_y),
-                (center_x - arrow_size, center_y + arrow_size//2),
-                (center_x - arrow_size//3, center_y)
-            ]
-            pygame.draw.polygon(base_surf, (0, 150, 80), main_arrow_points, 2)
-            
-            screen.blit(base_surf, (self.x*TILE + (TILE-base_size)//2, self.y*TILE + (TILE-base_size)//2))
+                queue.add_disc(cx, cy, glow_radius - i*10, (120, 240, 160), int(70 * (1 - i/3) * pulse))
+
+        key = (self.gate_type, phase)
+        surf = _gate_frames.get(key)
+        if surf is None:
+            surf = _gate_frames[key] = (_render_entrance_gate if self.gate_type == "entrance" else _render_exit_gate)(t, pulse)
+        size = surf.get_width()
+        queue.add(surf, (self.x*TILE + (TILE-size)//2, self.y*TILE + (TILE-size)//2))
+
+
+# Chu kỳ hình cổng theo animation_time: |sin(t)|, sin(6t) và sin(4t) đều lặp lại sau pi
+GATE_PERIOD = math.pi
+_gate_frames: Dict[Tuple[str, int], pygame.Surface] = {}  # (loại cổng, pha) -> thân cổng đã vẽ
+
+
+def _render_entrance_gate(t: float, pulse: float) -> pygame.Surface:
+    """Cổng vào - màu đỏ với hiệu ứng nguy hiểm (địch xuất hiện)."""
+    base_color = (255, 80, 80)      # Đỏ sáng
+    gate_size = int(TILE * 0.9 * pulse)
+    gate_surf = pygame.Surface((gate_size, gate_size), pygame.SRCALPHA)
+    pygame.draw.rect(gate_surf, (*base_color, 220), (0, 0, gate_size, gate_size), border_radius=12)
+    pygame.draw.rect(gate_surf, (255, 200, 200), (0, 0, gate_size, gate_size), width=3, border_radius=12)
+
+    # Vẽ ký hiệu cảnh báo thay vì portal xoay
+    center_x, center_y = gate_size//2, gate_size//2
+    warning_size = int(gate_size//3 * pulse)
+
+    # Vẽ tam giác cảnh báo với animation nhấp nháy
+    warning_alpha = int(200 + 55 * math.sin(t * 6))  # Nhấp nháy
+    triangle_points = [
+        (center_x, center_y - warning_size),
+        (center_x - warning_size, center_y + warning_size//2),
+        (center_x + warning_size, center_y + warning_size//2)
+    ]
+    pygame.draw.polygon(gate_surf, (255, 255, 100, warning_alpha), triangle_points)
+    pygame.draw.polygon(gate_surf, (200, 0, 0), triangle_points, 2)
+
+    # Dấu chấm than trong tam giác
+    pygame.draw.circle(gate_surf, (200, 0, 0), (center_x, center_y - warning_size//4), 3)
+    pygame.draw.circle(gate_surf, (200, 0, 0), (center_x, center_y + warning_size//4), 2)
+    return gate_surf
+
+
+def _render_exit_gate(t: float, pulse: float) -> pygame.Surface:
+    """Cổng ra - màu xanh với hiệu ứng an toàn (địch thoát ra)."""
+    base_color = (80, 200, 120)     # Xanh lá sáng
+    base_size = int(TILE * 1.0 * pulse)
+    base_surf = pygame.Surface((base_size, base_size), pygame.SRCALPHA)
+    pygame.draw.rect(base_surf, (*base_color, 200), (0, 0, base_size, base_size), border_radius=15)
+    pygame.draw.rect(base_surf, (150, 255, 180), (0, 0, base_size, base_size), width=3, border_radius=15)
+
+    # Vẽ ký hiệu mũi tên hướng ra thay vì lửa
+    center_x, center_y = base_size//2, base_size//2
+    arrow_size = int(base_size//3 * pulse)
+    arrow_breath = math.sin(t * 4) * 0.15 + 0.85  # Hiệu ứng thở nhẹ
+
+    # Vẽ 3 mũi tên chồng lên nhau để tạo hiệu ứng chuyển động
+    for i in range(3):
+        offset = i * 8 - 8  # Tạo khoảng cách giữa các mũi tên
+        arrow_alpha = int(255 * arrow_breath * (1 - i * 0.3))
+        arrow_color = (100, 255, 150, arrow_alpha)
+
+        # Mũi tên hướng phải (→)
+        arrow_points = [
+            (center_x - arrow_size + offset, center_y - arrow_size//2),
+            (center_x + arrow_size//2 + offset, center_y),
+            (center_x - arrow_size + offset, center_y + arrow_size//2),
+            (center_x - arrow_size//3 + offset, center_y)
+        ]
+        if arrow_alpha > 50:  # Chỉ vẽ nếu đủ sáng
+            pygame.draw.polygon(base_surf, arrow_color[:3], arrow_points)
+
+    # Viền mũi tên chính
+    main_arrow_points = [
+        (center_x - arrow_size, center_y - arrow_size//2),
+        (center_x + arrow_size//2, center_y),
+        (center_x - arrow_size, center_y + arrow_size//2),
+        (center_x - arrow_size//3, center_y)
+    ]
+    pygame.draw.polygon(base_surf, (0, 150, 80), main_arrow_points, 2)
+    return base_surf
 
 # ------------------- ACCOUNTS (đăng nhập/đăng ký) -------------------
 def _hash_password(password: str, salt: str) -> str:
@@ -239,7 +228,7 @@ def save_accounts(db: dict):
         with open(ACCOUNTS_FILE, "w", encoding="utf-8") as f:
             json.dump(db, f, ensure_ascii=False, indent=2)
     except Exception as e:
-        print("Save accounts failed:", e)
+        save_log.warning("Save accounts failed: %s", e)
 
 
 
@@ -247,298 +236,41 @@ def save_accounts(db: dict):
 
 
 # ------------------- MAPS -------------------
-def make_map(level: int):
-    """
-    Trả về 1 map theo LEVEL với số đường vào tăng dần.
-    - Level 1-3: 2 đường vào (cải thiện từ 1)
-    - Level 4-6: 3 đường vào (cải thiện từ 2)
-    - Level 7-9: 4 đường vào (cải thiện từ 3)
-    - Level 10+: 4+ đường vào
-    
-    Mỗi map là list các path; mỗi path là list node (x,y) đi ngang/dọc theo lưới.
-    - Lối vào đặt ở x = -1 (bên trái), lối ra ở x = GRID_W (bên phải) để quái vào/ra mượt.
-    - Các node còn lại nằm trong 0..GRID_W-1 (x) và 0..GRID_H-1 (y).
-    - Địch sẽ spawn ngẫu nhiên từ các path khác nhau tạo thêm thử thách.
-    """
-    
-    # Định nghĩa map theo số đường vào
-    LEVEL_MAPS = {}
-    
-    # Level 1-3: Network paths - có điểm giao để địch có thể phân nhánh ra nhiều exit
-    LEVEL_MAPS[1] = [
-        [(-1, 2), (6, 2), (6, 5), (GRID_W, 5)],     # Path 1: vào trên, có thể ra giữa
-        [(-1, 7), (6, 7), (6, 5), (GRID_W, 5)],     # Path 2: vào dưới, gặp path 1 tại (6,5)
-        [(6, 5), (10, 5), (10, 2), (GRID_W, 2)],    # Path 3: từ junction ra trên
-        [(6, 5), (10, 5), (10, 8), (GRID_W, 8)]     # Path 4: từ junction ra dưới
-    ]
-    LEVEL_MAPS[2] = [
-        [(-1, 1), (5, 1), (5, 4), (GRID_W, 4)],     # Path 1: vào trên, ra giữa
-        [(-1, 8), (5, 8), (5, 4), (GRID_W, 4)],     # Path 2: vào dưới, gặp tại (5,4)
-        [(5, 4), (9, 4), (9, 1), (GRID_W, 1)],      # Path 3: từ junction ra trên
-        [(5, 4), (9, 4), (9, 7), (GRID_W, 7)]       # Path 4: từ junction ra dưới
-    ]  
-    LEVEL_MAPS[3] = [
-        [(-1, 3), (4, 3), (7, 3), (7, 5), (GRID_W, 5)],     # Path chính ngang
-        [(-1, 6), (4, 6), (7, 6), (7, 5), (GRID_W, 5)],     # Path gặp nhau tại (7,5)
-        [(7, 5), (11, 5), (11, 2), (GRID_W, 2)],            # Nhánh ra trên
-        [(7, 5), (11, 5), (11, 8), (GRID_W, 8)]             # Nhánh ra dưới
-    ]
-    
-    # Level 4-6: Network paths với nhiều junction
-    LEVEL_MAPS[4] = [
-        [(-1, 1), (5, 1), (8, 1), (8, 4), (GRID_W, 4)],     # Entrance path 1
-        [(-1, 5), (5, 5), (8, 5), (8, 4), (GRID_W, 4)],     # Entrance path 2 - gặp nhau tại (8,4)
-        [(-1, 9), (5, 9), (8, 9), (8, 4), (GRID_W, 4)],     # Entrance path 3 - gặp nhau tại (8,4)
-        [(8, 4), (11, 4), (11, 1), (GRID_W, 1)],            # Junction - ra trên
-        [(8, 4), (11, 4), (11, 7), (GRID_W, 7)],            # Junction - ra dưới
-        [(8, 4), (13, 4), (13, 5), (GRID_W, 5)]             # Junction - ra giữa
-    ]
-    LEVEL_MAPS[5] = [
-        [(-1, 2), (4, 2), (7, 2), (7, 5), (GRID_W, 5)],     # Entrance path 1
-        [(-1, 6), (4, 6), (7, 6), (7, 5), (GRID_W, 5)],     # Entrance path 2 - gặp tại (7,5)
-        [(-1, 8), (4, 8), (7, 8), (7, 5), (GRID_W, 5)],     # Entrance path 3 - gặp tại (7,5)
-        [(7, 5), (10, 5), (10, 2), (GRID_W, 2)],            # Junction - ra trên
-        [(7, 5), (10, 5), (10, 8), (GRID_W, 8)],            # Junction - ra dưới
-        [(7, 5), (12, 5), (12, 6), (GRID_W, 6)]             # Junction - ra giữa
-    ]
-    LEVEL_MAPS[6] = [
-        [(-1, 1), (3, 1), (6, 1), (6, 4), (9, 4), (GRID_W, 4)],    # Main path ngang
-        [(-1, 7), (3, 7), (6, 7), (6, 4), (9, 4), (GRID_W, 4)],    # Path gặp tại (6,4) và (9,4)
-        [(6, 4), (6, 8), (10, 8), (GRID_W, 8)],                    # Junction từ (6,4) ra dưới
-        [(9, 4), (12, 4), (12, 1), (GRID_W, 1)],                   # Junction từ (9,4) ra trên
-        [(9, 4), (12, 4), (12, 7), (GRID_W, 7)]                    # Junction từ (9,4) ra dưới
-    ]
-    
-    # Level 7-9: 4 đường vào (tăng từ 3 lên 4)
-    LEVEL_MAPS[7] = [
-        [(-1, 1), (4, 1), (4, 5), (8, 5), (8, 8), (GRID_W, 8)],
-        [(-1, 3), (6, 3), (6, 7), (11, 7), (11, 2), (GRID_W, 2)],
-        [(-1, 6), (3, 6), (3, 9), (12, 9), (12, 4), (GRID_W, 4)],
-        [(-1, 9), (9, 9), (9, 6), (GRID_W, 6)]
-    ]
-    LEVEL_MAPS[8] = [
-        [(-1, 1), (5, 1), (5, 6), (9, 6), (9, 3), (GRID_W, 3)],
-        [(-1, 4), (7, 4), (7, 8), (12, 8), (12, 1), (GRID_W, 1)],
-        [(-1, 7), (2, 7), (2, 2), (14, 2), (14, 9), (GRID_W, 9)],
-        [(-1, 9), (10, 9), (10, 5), (GRID_W, 5)]
-    ]
-    LEVEL_MAPS[9] = [
-        [(-1, 1), (3, 1), (3, 4), (8, 4), (8, 8), (GRID_W, 8)],
-        [(-1, 3), (6, 3), (6, 7), (11, 7), (11, 2), (GRID_W, 2)],
-        [(-1, 6), (4, 6), (4, 9), (13, 9), (13, 5), (GRID_W, 5)],
-        [(-1, 8), (9, 8), (9, 1), (GRID_W, 1)]
-    ]
-    
-    # Level 10+: 4 đường vào
-    LEVEL_MAPS[10] = [
-        [(-1, 1), (4, 1), (4, 4), (8, 4), (8, 7), (GRID_W, 7)],
-        [(-1, 3), (6, 3), (6, 8), (11, 8), (11, 2), (GRID_W, 2)],
-        [(-1, 6), (2, 6), (2, 9), (9, 9), (9, 5), (GRID_W, 5)],
-        [(-1, 9), (13, 9), (13, 6), (GRID_W, 6)]
-    ]
-    LEVEL_MAPS[11] = [
-        [(-1, 2), (3, 2), (3, 7), (7, 7), (7, 1), (11, 1), (11, 8), (GRID_W, 8)],
-        [(-1, 5), (5, 5), (5, 3), (9, 3), (9, 6), (13, 6), (13, 4), (GRID_W, 4)],
-        [(-1, 8), (8, 8), (8, 5), (12, 5), (12, 9), (GRID_W, 9)],
-        [(-1, 1), (6, 1), (6, 4), (10, 4), (10, 2), (GRID_W, 2)]
-    ]
-    LEVEL_MAPS[12] = [
-        [(-1, 3), (4, 3), (4, 6), (8, 6), (8, 2), (GRID_W, 2)],
-        [(-1, 1), (7, 1), (7, 8), (12, 8), (12, 5), (GRID_W, 5)],
-        [(-1, 7), (2, 7), (2, 4), (10, 4), (10, 9), (GRID_W, 9)],
-        [(-1, 9), (5, 9), (5, 1), (GRID_W, 1)]
-    ]
-    LEVEL_MAPS[13] = [
-        [(-1, 2), (6, 2), (6, 5), (9, 5), (9, 8), (GRID_W, 8)],
-        [(-1, 4), (3, 4), (3, 1), (11, 1), (11, 7), (GRID_W, 7)],
-        [(-1, 6), (8, 6), (8, 3), (13, 3), (13, 9), (GRID_W, 9)],
-        [(-1, 8), (4, 8), (4, 6), (GRID_W, 6)]
-    ]
-    LEVEL_MAPS[14] = [
-        [(-1, 1), (5, 1), (5, 7), (9, 7), (9, 3), (GRID_W, 3)],
-        [(-1, 4), (7, 4), (7, 9), (12, 9), (12, 2), (GRID_W, 2)],
-        [(-1, 6), (2, 6), (2, 2), (10, 2), (10, 8), (GRID_W, 8)],
-        [(-1, 9), (6, 9), (6, 5), (14, 5), (14, 4), (GRID_W, 4)]
-    ]
-    LEVEL_MAPS[15] = [
-        [(-1, 2), (4, 2), (4, 8), (8, 8), (8, 1), (12, 1), (12, 6), (GRID_W, 6)],
-        [(-1, 5), (6, 5), (6, 3), (10, 3), (10, 9), (14, 9), (14, 7), (GRID_W, 7)],
-        [(-1, 7), (3, 7), (3, 4), (11, 4), (11, 2), (GRID_W, 2)],
-        [(-1, 9), (7, 9), (7, 6), (13, 6), (13, 8), (GRID_W, 8)]
-    ]
-    
-    # Cho level > 15: Tạo map tự động với 4 đường vào
-    if level > 15:
-        return generate_procedural_map(level)
-    
-    # Trả về map cho level, nếu không có thì dùng map level 1
-    return LEVEL_MAPS.get(level, LEVEL_MAPS[1])
-
-
-def generate_procedural_map(level: int):
-    """
-    Tạo map tự động cho level > 15 với 4 đường vào.
-    Độ khó tăng dần theo level.
-    """
-    import random
-    
-    # Sử dụng level làm seed để tạo map nhất quán
-    random.seed(level * 42)
-    
-    # Level > 15 luôn có 4 đường vào để duy trì độ khó cao
-    num_paths = 4
-    
-    paths = []
-    
-    # Định nghĩa các vị trí y cố định cho 4 đường để tránh trùng lặp
-    y_positions = [1, 3, 6, 8]  # Phân bố đều trên map
-    
-    for i in range(num_paths):
-        start_y = y_positions[i]
-        
-        # Tạo path với độ phức tạp tăng theo level
-        complexity = min((level - 15) // 3 + 2, 6)  # 2-6 turns, tăng dần
-        path = generate_single_path(start_y, complexity, random)
-        paths.append(path)
-    
-    return paths
-
-
-def generate_single_path(start_y: int, complexity: int, rng):
-    """
-    Tạo một đường đi với số lượng rẽ được chỉ định.
-    """
-    path = [(-1, start_y)]  # Điểm bắt đầu
-    
-    current_x = 0
-    current_y = start_y
-    
-    for turn in range(complexity):
-        # Di chuyển một đoạn theo x
-        next_x = current_x + rng.randint(2, 5)
-        next_x = min(next_x, GRID_W - 2)
-        path.append((next_x, current_y))
-        
-        # Rẽ theo y
-        direction = rng.choice([-1, 1])
-        next_y = current_y + direction * rng.randint(2, 4)
-        next_y = max(1, min(next_y, GRID_H - 2))
-        path.append((next_x, next_y))
-        
-        current_x = next_x
-        current_y = next_y
-    
-    # Đến cuối màn hình
-    if current_x < GRID_W - 1:
-        path.append((GRID_W - 1, current_y))
-    
-    # Điểm kết thúc
-    path.append((GRID_W, current_y))
-    
-    return path
-
-
-def make_maps():
-    """Trả về list map cho tất cả level (không còn giới hạn 15 map)."""
-    # Không cần tạo list cố định nữa vì mỗi level có map riêng
-    # Hàm này giữ lại để tương thích nhưng không dùng nhiều
-    return [make_map(i) for i in range(1, 16)]
-
-
-# Dữ liệu map dùng cho game - giờ sẽ load động theo level
-MAPS = make_maps()  # Giữ lại để tương thích với code cũ
-
-
-def make_permanent_map() -> List[List[Tuple[int,int]]]:
-    """Tạo 1 map chơi vĩnh viễn (special) với theme snow và nhiều ô đặt trụ.
-    Map này có ít đường đi để tối đa hóa không gian cho tower.
-    Trả về list các path (mỗi path là list of nodes).
-    """
-    # Thiết kế map Snow: 3 đường chính đơn giản để tối đa hóa tower slots
-    paths = []
-
-    # Đường 1: Trên cùng - đường thẳng đơn giản
-    paths.append([(-1, 2), (2, 2), (6, 2), (10, 2), (14, 2), (GRID_W, 2)])
-    
-    # Đường 2: Giữa - có một curve nhẹ
-    paths.append([(-1, 5), (3, 5), (6, 5), (6, 7), (9, 7), (12, 7), (GRID_W, 7)])
-    
-    # Đường 3: Dưới cùng - đường zigzag nhẹ  
-    paths.append([(-1, 9), (4, 9), (7, 9), (7, 6), (10, 6), (13, 6), (GRID_W, 6)])
-
-    return paths
-
-def grid_nodes_to_px(nodes: List[Tuple[int, int]]) -> List[Tuple[float, float]]:
-    return [grid_to_px(x, y) for x, y in nodes]
-
-def expand_path_cells(multipath_nodes: List[List[Tuple[int,int]]]) -> Set[Tuple[int,int]]:
-    cells: Set[Tuple[int, int]] = set()
-    for nodes in multipath_nodes:
-        for (x1, y1), (x2, y2) in zip(nodes[:-1], nodes[1:]):
-            if x1 == x2:
-                for y in range(min(y1, y2), max(y1, y2) + 1):
-                    if 0 <= x1 < GRID_W and 0 <= y < GRID_H:
-                        cells.add((x1, y))
-            elif y1 == y2:
-                for x in range(min(x1, x2), max(x1, x2) + 1):
-                    if 0 <= x < GRID_W and 0 <= y1 < GRID_H:
-                        cells.add((x, y1))
-    return cells
+# Map data/hàm tạo map nằm trong maps.py (dùng chung với headless.py)
+from maps import (
+    make_map, MAPS,
+    make_permanent_map, grid_nodes_to_px, expand_path_cells,
+)
 
 # Core entity classes and UI moved to modules for clarity
-from entities import Enemy, Projectile, Tower, DeathEffect, DamageText
+from entities import Enemy, Projectile, Tower, DeathEffect
 from wave_manager import WaveManager
+from simulation import SimulationCore, make_tower, compute_stars
 from ui import Button, draw_level_badge
+from dirty_rects import DirtyRectTracker
+from text_cache import get_font, get_default_font, render_outlined
+from sprite_cache import RotationCache
+from asset_manager import assets
+from preloader import AssetPreloader
+from atlas import TextureAtlas
+from quality import QualityManager, QUALITY_SETTINGS
+from profiler import FrameProfiler
 
+ENEMY_SPRITE_BASE_SIZE = 36  # Cỡ sprite enemy trước khi nhân size_mul
+BASIC_PROJECTILE_TYPES = frozenset(("basic", "sniper", "minigun"))  # Đạn tròn trơn, không hiệu ứng
 
-class Game:
 
-    def _init_runtime(self, mode_name: str, level: int, new_game=False):
-        """Thiết lập lại trạng thái 1 ván chơi (tiền, mạng, map, wave...)."""
-        # 1) Mode & tham số
-        self.mode_name = mode_name
-        mp = MODE_PARAMS[self.mode_name]
-        self.level = level
-        # Default waves per level
-        self.max_waves = waves_in_level(self.level)
-        # Special permanent map handling
-        try:
-            from config import PERMANENT_MAP_LEVEL
-        except Exception:
-            PERMANENT_MAP_LEVEL = None
-        self.is_permanent_map = (PERMANENT_MAP_LEVEL is not None and self.level == PERMANENT_MAP_LEVEL)
-        if self.is_permanent_map:
-            # Permanent map: fixed 5 waves as requested
-            self.max_waves = 5
-
-        # 2) Trạng thái người chơi / trận
-        self.money = mp["money"]
-        self.lives = mp["lives"]
+class Game(SimulationCore):
+
+    def _init_runtime(self, mode_name: str, level: int, new_game=False, seed=None):
+        """Thiết lập lại trạng thái 1 ván chơi (tiền, mạng, map, wave...). seed: match seed để replay."""
+        # 1-4) Mode, tiền/mạng, world rỗng, đường đi, wave manager (dùng chung với headless)
+        self._init_world(mode_name, level, seed)
         self.paused = False
-        self.speed_scale = 1.0
-        self.win_level = False
-        self.game_over_reason = None  # Lý do thua game ("boss_escaped" hoặc "no_lives")
         self.show_placement_grid = False  # Tắt grid placement để tránh nhầm lẫn
-
-        # 3) World rỗng
-        self.towers = []
-        self.projectiles = []
-        self.enemies = []
-        self.death_effects = []  # Hiệu ứng khi địch chết
-        self.damage_texts = []   # Text sát thương bay lên
-        self.occupied = set()
-
-        # 4) Đường đi theo level hiện tại (thay vì dùng index cố định)
-        if getattr(self, 'is_permanent_map', False):
-            multipath_grid = make_permanent_map()
-        else:
-            multipath_grid = make_map(self.level)  # Load map theo level, không phải index
-        self.paths_grid = multipath_grid
-        self.paths_px = [ [grid_to_px(x,y) for (x,y) in path] for path in multipath_grid ]
-
-        # Tập ô thuộc đường đi (để chặn đặt trụ)
-        self.path_cells = expand_path_cells(multipath_grid)
-        self.exit_cells = [p[-1] for p in multipath_grid]
+        self.effect_particles = ParticleSystem(EFFECT_PARTICLE_CAPACITY)  # Vụn khi địch chết
+        self.quality.reset_samples()  # Frame đo từ ván trước/menu không còn đúng
+        self.damage_texts = DamageTextPool()  # Số sát thương bay lên (ring buffer, ghép từ glyph chữ số)
 
         # Tạo grid placement system với khoảng cách bắt buộc
         self.tower_slots = self._generate_tower_slots()
@@ -546,6 +278,7 @@ class Game:
         
         # Tạo animated gates chỉ cho entrance và exit thật (không phải junction)
         self.animated_gates = []
+        self.gate_particles = ParticleSystem(GATE_PARTICLE_CAPACITY)  # Hạt của mọi cổng
         
         # Tạo entrance gates - chỉ cho paths bắt đầu từ ngoài map (-1)
         for path in self.paths_grid:
@@ -553,7 +286,7 @@ class Game:
             if start_x == -1:  # Chỉ tạo gate cho paths từ bên trái thật
                 gate_x = 0
                 gate_y = max(0, min(GRID_H-1, start_y))
-                self.animated_gates.append(AnimatedGate(gate_x, gate_y, "entrance"))
+                self.animated_gates.append(AnimatedGate(gate_x, gate_y, self.gate_particles, "entrance"))
         
         # Tạo exit gates - chỉ cho paths kết thúc ở ngoài map (GRID_W)
         exit_positions = set()  # Tránh tạo gate trùng lặp
@@ -565,14 +298,11 @@ class Game:
                 gate_pos = (gate_x, gate_y)
                 if gate_pos not in exit_positions:  # Tránh trùng lặp
                     exit_positions.add(gate_pos)
-                    self.animated_gates.append(AnimatedGate(gate_x, gate_y, "exit"))
+                    self.animated_gates.append(AnimatedGate(gate_x, gate_y, self.gate_particles, "exit"))
 
         # 5) Âm thanh, thông số thống kê
         self.snd_shoot = load_shoot_sound()
         self._shoot_snd_cooldown = 0.0
-        self.kills = 0
-        self.towers_built = 0
-        self.money_spent = 0
         self.powerups_used = 0
         self.start_time = time.time()
         self.notice_msg = ""
@@ -592,45 +322,17 @@ class Game:
         self.selected_tower_for_range = None  # Tower được chọn để hiện tầm bắn
         self.show_all_ranges = False          # Hiển thị tất cả tầm bắn
 
-        # 6) Tower sprites (nếu có asset) - Load tất cả 12 tháp
-        self.tower_sprites = {}
-        for tower_key in ALL_TOWER_KEYS:
-            sprite_file = TOWER_DEFS[tower_key]["sprite"]
-            # Kích thước khác nhau theo loại tháp
-            if tower_key == "sniper":
-                size = 52
-            elif tower_key in ["splash", "mortar", "rocket"]:
-                size = 56
-            elif tower_key == "slow":
-                size = 50
-            else:
-                size = 48
-            self.tower_sprites[tower_key] = load_sprite(sprite_file, size)
-            
-        # Enemy sprites - Load tất cả 4 loại địch  
-        self.enemy_sprites = {}
-        base_size = 36
-        for enemy_key in ["normal", "fast", "tank", "boss"]:
-            sprite_file = f"enemy_{enemy_key}.png"
-            # Kích thước theo size_mul từ config
-            size_mul = ENEMY_TYPES[enemy_key].get("size_mul", 1.0)
-            actual_size = int(base_size * size_mul)
-            self.enemy_sprites[enemy_key] = load_sprite(sprite_file, actual_size)
-            
+        # 6) Tower sprites (nếu có asset) - Load tất cả 12 tháp, rồi 4 loại địch
+        tower_specs, enemy_specs = self._sprite_specs()
+        self.tower_sprites = {k: load_sprite(f, size) for k, (f, size) in tower_specs.items()}
+        self.enemy_sprites = {k: load_sprite(f, size) for k, (f, size) in enemy_specs.items()}
+
         # Fallback enemy sprite
-        self.enemy_sprite = load_sprite("enemy.png", base_size)
+        self.enemy_sprite = load_sprite("enemy.png", ENEMY_SPRITE_BASE_SIZE)
+        self._build_sprite_rotations()
 
-        # 7) Tạo wave manager (không tự động start, chờ setup phase)
-        paths_for_wave_mgr = [ [grid_to_px(x,y) for (x,y) in path] for path in multipath_grid ]
-        print(f"[LEVEL] {self.level}: Tạo {len(paths_for_wave_mgr)} paths cho WaveManager")
-        self.wave_mgr = WaveManager(
-            paths_for_wave_mgr,
-            MODE_PARAMS[self.mode_name]["hp_mul"],
-            MODE_PARAMS[self.mode_name]["spd_mul"],
-            level=self.level,
-            special_mode=('permanent' if getattr(self, 'is_permanent_map', False) else None)
-        )
-        # Không start wave ngay, chờ setup phase kết thúc
+        # 7) Wave manager đã được tạo trong _init_world (không tự động start, chờ setup phase)
+        level_log.info("Level %d: tạo %d paths cho WaveManager", self.level, len(self.paths_px))
 
         # 8) Mặc định trụ đã mở & lựa chọn từ loadout
         if self.current_user and self.current_user in self.accounts:
@@ -646,14 +348,14 @@ class Game:
         self._ensure_tiles_loaded()
         self._load_map_background(self.level)  # Load background theo level hiện tại
         self._compute_decor_once()
+        self.invalidate_static_layer()
         
     def _generate_tower_slots(self):
         """
         Tạo các ô có thể đặt tower với khoảng cách bắt buộc 2-4 ô.
         Đảm bảo vẫn có đủ slot để thắng game.
         """
-        import random
-        random.seed(self.level * 567)  # Seed cố định cho level
+        rng = random.Random(self.level * 567)  # Seed cố định cho level
         
         available_cells = []
         # Tìm tất cả ô không phải đường đi
@@ -663,7 +365,7 @@ class Game:
                     available_cells.append((x, y))
         
         tower_slots = set()
-        min_distance = random.choice([2, 3, 4])  # Khoảng cách ngẫu nhiên cho level này
+        min_distance = rng.choice([2, 3, 4])  # Khoảng cách ngẫu nhiên cho level này
         
         # Thuật toán Poisson disk sampling để đặt tower slots
         attempts = 0
@@ -671,7 +373,7 @@ class Game:
             attempts += 1
             
             # Chọn ô ngẫu nhiên
-            candidate = random.choice(available_cells)
+            candidate = rng.choice(available_cells)
             
             # Kiểm tra khoảng cách với các tower slot đã có
             valid = True
@@ -730,9 +432,10 @@ class Game:
             for path_to_try in [custom_path, main_path]:
                 try:
                     if os.path.exists(path_to_try):
-                        img = pygame.image.load(path_to_try).convert_alpha()
+                        if assets.source_size(path_to_try) is None:
+                            continue
                         # Scale thông minh dựa trên kích thước gốc
-                        original_size = max(img.get_width(), img.get_height())
+                        original_size = max(assets.source_size(path_to_try))
                         if original_size <= 24:
                             target_size = 32  
                         elif original_size <= 48:
@@ -740,17 +443,17 @@ class Game:
                         else:
                             target_size = 56  
                         
-                        scaled_img = pygame.transform.smoothscale(img, (target_size, target_size))
+                        scaled_img = assets.image(path_to_try, (target_size, target_size))
                         decoration_sprites[dec_type] = scaled_img
                         folder_name = "custom" if "custom" in path_to_try else "main"
-                        print(f"[OK] Loaded decoration: {filename} ({folder_name})")
+                        asset_log.debug("Loaded decoration: %s (%s)", filename, folder_name)
                         loaded = True
                         break
                 except Exception as e:
                     continue
             
             if not loaded:
-                print(f"[FAIL] Could not load decoration {filename}")
+                asset_log.warning("Could not load decoration %s", filename)
                 decoration_sprites[dec_type] = None
                 
         return decoration_sprites
@@ -760,8 +463,7 @@ class Game:
         Tạo các vật trang trí cho những ô không thể đặt tower.
         Bao gồm: cành khô, tháp vỡ, đá, cây nhỏ...
         """
-        import random
-        random.seed(self.level * 789)  # Seed khác để độc lập
+        rng = random.Random(self.level * 789)  # Seed khác để độc lập
         
         decorations = []
         decoration_types = [
@@ -790,11 +492,11 @@ class Game:
                 cell = (x, y)
                 if (cell not in self.path_cells and 
                     cell not in self.tower_slots and
-                    random.random() < 0.4):  # 40% chance có decoration
+                    rng.random() < 0.4):  # 40% chance có decoration
                     
                     # Chọn loại decoration theo trọng số
                     total_weight = sum(d["weight"] for d in decoration_types)
-                    rand_val = random.randint(1, total_weight)
+                    rand_val = rng.randint(1, total_weight)
                     current_weight = 0
                     
                     for dec_type in decoration_types:
@@ -805,17 +507,16 @@ class Game:
                                 "type": dec_type["name"], 
                                 "color": dec_type["color"],
                                 "size": dec_type["size"],
-                                "offset": (random.randint(-8, 8), random.randint(-8, 8))
+                                "offset": (rng.randint(-8, 8), rng.randint(-8, 8))
                             })
                             break
         
-        print(f"Tao {len(decorations)} decorations cho level {self.level}")
+        level_log.debug("Tạo %d decorations cho level %d", len(decorations), self.level)
         return decorations
         
     def _generate_decorative_objects_preview(self, temp_game):
         """Tạo decorations cho preview map (tương tự như game thật)."""
-        import random
-        random.seed(temp_game.level * 789)
+        rng = random.Random(temp_game.level * 789)
         
         available_cells = []
         for x in range(GRID_W):
@@ -825,7 +526,7 @@ class Game:
         
         decorations = []
         placed_positions = set()
-        min_distance = random.choice([2, 3])
+        min_distance = rng.choice([2, 3])
         target_count = min(15, len(available_cells) // 4)
         
         attempts = 0
@@ -834,7 +535,7 @@ class Game:
             
             if not available_cells:
                 break
-            candidate = random.choice(available_cells)
+            candidate = rng.choice(available_cells)
             
             valid = True
             for existing_pos in placed_positions:
@@ -871,8 +572,7 @@ class Game:
         
     def _generate_tower_slots_preview(self, temp_game):
         """Tạo tower slots cho preview map."""
-        import random
-        random.seed(temp_game.level * 567)
+        rng = random.Random(temp_game.level * 567)
         
         available_cells = []
         for x in range(GRID_W):
@@ -881,12 +581,12 @@ class Game:
                     available_cells.append((x, y))
         
         tower_slots = set()
-        min_distance = random.choice([2, 3, 4])
+        min_distance = rng.choice([2, 3, 4])
         
         attempts = 0
         while len(tower_slots) < min(20, len(available_cells) // 3) and attempts < 1000:
             attempts += 1
-            candidate = random.choice(available_cells)
+            candidate = rng.choice(available_cells)
             
             valid = True
             for existing in tower_slots:
@@ -1013,6 +713,10 @@ class Game:
         sfx_text = "Âm thanh súng: BẬT" if self.save["settings"]["sfx"] else "Âm thanh súng: TẮT"
         self.settings_buttons.append(Button((x, y_start + gap, w, h), sfx_text, self.toggle_sfx))
         
+        # Nút đổi mức đồ họa (vòng: Tự động -> Ultra -> High -> Low -> Minimal)
+        quality_text = "Đồ họa: " + ("TỰ ĐỘNG" if self.quality.auto else self.quality.setting.upper())
+        self.settings_buttons.append(Button((x, y_start + gap * 2, w, h), quality_text, self.cycle_quality))
+
         # Nút trở về menu
         self.settings_buttons.append(Button((x, y_start + gap * 3, w, h), "Trở về Menu", self.back_to_menu))
 
@@ -1049,6 +753,18 @@ class Game:
             self._build_menu_buttons()
         save_save(self.save)
     
+    def cycle_quality(self):
+        """Đổi mức đồ họa sang lựa chọn kế tiếp trong QUALITY_SETTINGS."""
+        current = self.quality.setting
+        setting = QUALITY_SETTINGS[(QUALITY_SETTINGS.index(current) + 1) % len(QUALITY_SETTINGS)]
+        self.save["settings"]["quality"] = setting
+        self.quality.configure(setting)
+
+        # Cập nhật buttons và lưu settings
+        if self.scene == SCENE_SETTINGS:
+            self._build_settings_buttons()
+        save_save(self.save)
+
     def _migrate_old_save_data(self):
         """Chuyển đổi dữ liệu save cũ sang cấu trúc mới với tiến độ theo chế độ."""
         if "level_unlocked_by_mode" not in self.save:
@@ -1065,16 +781,16 @@ class Game:
             # Cho người chơi cũ, làm cho tất cả súng đã có thể mua
             unlocked = self.save.get("unlocked_towers", DEFAULT_LOADOUT.copy())
             self.save["available_for_purchase"] = unlocked.copy()
-            print(f"[MIGRATE] Added available_for_purchase: {len(unlocked)} towers")
+            save_log.info("Added available_for_purchase: %s towers", len(unlocked))
             
         if "coins" not in self.save:
             # Cho người chơi cũ coin để mua súng
             self.save["coins"] = 5  # Cho 5 coin để bắt đầu
-            print("[MIGRATE] Added coins: 5")
+            save_log.info("Added coins: 5")
             
         if "level_unlocked_by_mode" in self.save:
             old_level = self.save.get("level_unlocked", 1)
-            print(f"[MIGRATE] Converted save data: Easy={old_level}, Normal=1, Hard=1")
+            save_log.info("Converted save data: Easy=%s, Normal=1, Hard=1", old_level)
             # Sanitize/clamp progression values to avoid corrupted large numbers
             try:
                 from config import TOTAL_LEVELS
@@ -1087,7 +803,7 @@ class Game:
                 except Exception:
                     clamped = 1
                 if self.save["level_unlocked_by_mode"].get(mode_k) != clamped:
-                    print(f"[MIGRATE] Clamping save.level_unlocked_by_mode[{mode_k}] from {v} to {clamped}")
+                    save_log.info("Clamping save.level_unlocked_by_mode[%s] from %s to %s", mode_k, v, clamped)
                     self.save["level_unlocked_by_mode"][mode_k] = clamped
 
             # Also clamp legacy single value
@@ -1112,7 +828,7 @@ class Game:
                     "Hard": 1             # Reset Hard về 1
                 }
                 changed = True
-                print(f"[MIGRATE] Converted account {username}: Easy={old_level}, Normal=1, Hard=1")
+                save_log.info("Converted account %s: Easy=%s, Normal=1, Hard=1", username, old_level)
             
             # Migration cho progression system
             if "available_for_purchase" not in account_data:
@@ -1120,13 +836,13 @@ class Game:
                 unlocked = account_data.get("unlocked_towers", DEFAULT_LOADOUT.copy())
                 account_data["available_for_purchase"] = unlocked.copy()
                 changed = True
-                print(f"[MIGRATE] Added available_for_purchase for {username}: {len(unlocked)} towers")
+                save_log.info("Added available_for_purchase for %s: %s towers", username, len(unlocked))
                 
             if "coins" not in account_data:
                 # Cho tài khoản cũ coin để mua súng
                 account_data["coins"] = 5  # Cho 5 coin để bắt đầu
                 changed = True
-                print(f"[MIGRATE] Added coins for {username}: 5")
+                save_log.info("Added coins for %s: 5", username)
             # Sanitize/clamp progression values to avoid corrupted large numbers
             try:
                 from config import TOTAL_LEVELS
@@ -1140,7 +856,7 @@ class Game:
                     except Exception:
                         clamped = 1
                     if account_data["level_unlocked_by_mode"].get(mode_k) != clamped:
-                        print(f"[MIGRATE] Clamping account {username}.level_unlocked_by_mode[{mode_k}] from {v} to {clamped}")
+                        save_log.info("Clamping account %s.level_unlocked_by_mode[%s] from %s to %s", username, mode_k, v, clamped)
                         account_data["level_unlocked_by_mode"][mode_k] = clamped
 
             if "level_unlocked" in account_data:
@@ -1342,17 +1058,16 @@ class Game:
         self.decorations = []
         if not self.tiles: 
             return
-        import random
-        random.seed(42 + self.level)
+        rng = random.Random(42 + self.level)
 
         # rải bush/rock tại ô không phải đường & chưa bị chiếm
         for _ in range(18):
-            x = random.randrange(0, GRID_W)
-            y = random.randrange(0, GRID_H)
+            x = rng.randrange(0, GRID_W)
+            y = rng.randrange(0, GRID_H)
             if (x, y) in self.path_cells or (x, y) in getattr(self, "occupied", set()):
                 continue
-            kind = random.choice(["bush", "rock"])
-            self.decorations.append((kind, x, y, random.uniform(-6, 6), random.uniform(-6, 6)))
+            kind = rng.choice(["bush", "rock"])
+            self.decorations.append((kind, x, y, rng.uniform(-6, 6), rng.uniform(-6, 6)))
 
     def _draw_tiles_autotile(self):
         """Vẽ nền cỏ + đường cát có viền/corner tự động, dùng assets/tiles/*."""
@@ -1360,6 +1075,9 @@ class Game:
         if not self.tiles:
             return  # thiếu tiles → bỏ qua, fallback màu trơn ở draw_game
 
+        # Gom mọi tile vào 1 lần Surface.blits (cùng thứ tự vẽ như từng blit riêng)
+        batch = []
+
         # 1) nền cỏ - chỉ vẽ ở các vị trí tower slots
         grass = self.tiles.get("grass")
         tower_slot_positions = getattr(self, 'tower_slots', set())
@@ -1367,13 +1085,13 @@ class Game:
         for gy in range(GRID_H):
             for gx in range(GRID_W):
                 if grass and (gx, gy) in tower_slot_positions:
-                    self.screen.blit(grass, (gx * TILE, gy * TILE))
+                    batch.append((grass, (gx * TILE, gy * TILE)))
 
         # 2) trung tâm cát
         sand_center = self.tiles.get("sand_center")
         for (gx, gy) in self.path_cells:
             if 0 <= gx < GRID_W and 0 <= gy < GRID_H and sand_center:
-                self.screen.blit(sand_center, (gx * TILE, gy * TILE))
+                batch.append((sand_center, (gx * TILE, gy * TILE)))
 
         # 3) cạnh & góc
         t = self.tiles
@@ -1381,23 +1099,24 @@ class Game:
         cNE, cNW, cSE, cSW = t.get("sand_corner_ne"), t.get("sand_corner_nw"), t.get("sand_corner_se"), t.get("sand_corner_sw")
 
         for (gx, gy) in self.path_cells:
-            m = self._neighbors_mask(gx, gy)
+            pos = (gx*TILE, gy*TILE)
 
             # Edges: nếu cạnh giáp cỏ
-            if not self._is_path(gx, gy-1) and eN: self.screen.blit(eN, (gx*TILE, gy*TILE))
-            if not self._is_path(gx+1, gy) and eE: self.screen.blit(eE, (gx*TILE, gy*TILE))
-            if not self._is_path(gx, gy+1) and eS: self.screen.blit(eS, (gx*TILE, gy*TILE))
-            if not self._is_path(gx-1, gy) and eW: self.screen.blit(eW, (gx*TILE, gy*TILE))
+            if not self._is_path(gx, gy-1) and eN: batch.append((eN, pos))
+            if not self._is_path(gx+1, gy) and eE: batch.append((eE, pos))
+            if not self._is_path(gx, gy+1) and eS: batch.append((eS, pos))
+            if not self._is_path(gx-1, gy) and eW: batch.append((eW, pos))
 
             # Corners: nếu là góc lồi ra cỏ
             if self._is_path(gx, gy-1) and self._is_path(gx+1, gy) and not self._is_path(gx+1, gy-1) and cNE:
-                self.screen.blit(cNE, (gx*TILE, gy*TILE))
+                batch.append((cNE, pos))
             if self._is_path(gx, gy-1) and self._is_path(gx-1, gy) and not self._is_path(gx-1, gy-1) and cNW:
-                self.screen.blit(cNW, (gx*TILE, gy*TILE))
+                batch.append((cNW, pos))
             if self._is_path(gx, gy+1) and self._is_path(gx+1, gy) and not self._is_path(gx+1, gy+1) and cSE:
-                self.screen.blit(cSE, (gx*TILE, gy*TILE))
+                batch.append((cSE, pos))
             if self._is_path(gx, gy+1) and self._is_path(gx-1, gy) and not self._is_path(gx-1, gy+1) and cSW:
-                self.screen.blit(cSW, (gx*TILE, gy*TILE))
+                batch.append((cSW, pos))
+        self.screen.blits(batch, doreturn=False)
 
         # Vẽ decorative objects trước
         if hasattr(self, 'decorative_objects'):
@@ -1454,6 +1173,11 @@ class Game:
 
     def _draw_decor_and_markers(self):
         """Rải bụi cây/đá + cổng/nhà căn cứ."""
+        self._draw_decor()
+        self._draw_gates()
+
+    def _draw_decor(self):
+        """Bụi cây/đá (tĩnh - nằm trong static layer)."""
         if not self.tiles:
             return
         # vật trang trí
@@ -1467,9 +1191,16 @@ class Game:
             pygame.draw.ellipse(self.screen, (0,0,0,35), (x+8, y+TILE-14, TILE-16, 10))
             self.screen.blit(img, (x, y))
 
-        # Vẽ animated gates thay cho cổng tĩnh
+    def _draw_gates(self):
+        if not self.tiles:
+            return
+        # Vẽ animated gates thay cho cổng tĩnh (particles ở phía sau)
+        if self.quality.enabled("gate_particles"):
+            self.gate_particles.draw(self.screen)
+        queue = self.world_queue
         for gate in self.animated_gates:
-            gate.draw(self.screen, self.tiles)
+            gate.draw(queue)
+        queue.flush(self.screen)
 
     def _load_map_background(self, level: int):
         """Load background image cho level cụ thể."""
@@ -1483,12 +1214,9 @@ class Game:
         ]
         
         for p in candidates:
-            try:
-                img = pygame.image.load(p).convert()
-                self.map_bg = pygame.transform.scale(img, (WIDTH, HEIGHT))
+            self.map_bg = assets.image(p, (WIDTH, HEIGHT), alpha=False, smooth=False)
+            if self.map_bg is not None:
                 break
-            except Exception:
-                pass
         
         # Nếu không tìm thấy background cụ thể cho level, không tạo map_bg
         # Để draw_game() sử dụng _draw_enhanced_background() làm fallback
@@ -1514,14 +1242,13 @@ class Game:
             bg.fill((80, 30, 20))  # Đỏ đen
         
         # Thêm texture đơn giản
-        import random
-        random.seed(level * 123)  # Seed cố định cho level
+        rng = random.Random(level * 123)  # Seed cố định cho level
         
         for _ in range(50):
-            x = random.randint(0, WIDTH)
-            y = random.randint(0, HEIGHT)
-            size = random.randint(20, 80)
-            alpha = random.randint(10, 30)
+            x = rng.randint(0, WIDTH)
+            y = rng.randint(0, HEIGHT)
+            size = rng.randint(20, 80)
+            alpha = rng.randint(10, 30)
             
             if level <= 3:
                 color = (30, 100, 40, alpha)  # Cỏ đậm hơn
@@ -1539,11 +1266,12 @@ class Game:
         
         return bg        
     def _load_bg_cached(self, filename):
-        try:
-            img = pygame.image.load(os.path.join(ASSETS_DIR, filename)).convert()
-            return pygame.transform.scale(img, (WIDTH, HEIGHT))
-        except Exception:
-            return None
+        return assets.image(os.path.join(ASSETS_DIR, filename), (WIDTH, HEIGHT), alpha=False, smooth=False)
+
+    def _scene_background(self, alpha=False):
+        """background.png phủ cả màn hình cho các scene menu (load + scale 1 lần, dùng chung)."""
+        return self._load_bg_cached("background.png") if not alpha else \
+            assets.image(os.path.join(ASSETS_DIR, "background.png"), (WIDTH, HEIGHT), smooth=False)
 
 
 
@@ -1552,32 +1280,27 @@ class Game:
     def menu_auth(self):
         self.scene = SCENE_AUTH
         self.auth_msg = ""
+    def _build_sprite_rotations(self):
+        """Xoay sẵn sprite enemy/tower theo SPRITE_ROTATION_STEPS góc để draw chỉ cần tra bảng + blit."""
+        if not hasattr(self, "enemy_rotations"):
+            self.enemy_rotations = RotationCache()
+            self.tower_rotations = RotationCache()
+        # Sprite lấy từ asset cache nên vào level mới vẫn là cùng Surface: add() bỏ qua, không xoay lại
+        for key, img in self.enemy_sprites.items():
+            self.enemy_rotations.add(key, img)
+        for key, img in self.tower_sprites.items():
+            self.tower_rotations.add(key, img)
+
     def _get_font(self, size, bold=False):
-        """Tạo font hỗ trợ tiếng Việt với fallback"""
-        font_names = ["tahoma", "segoe ui", "arial", "calibri"]
-        
-        for font_name in font_names:
-            try:
-                return pygame.font.SysFont(font_name, size, bold=bold)
-            except:
-                continue
-        
-        # Fallback to default font
-        return pygame.font.Font(None, int(size * 1.2))
+        """Font hỗ trợ tiếng Việt với fallback (lấy từ registry, mỗi size/bold chỉ tạo 1 lần)"""
+        return get_font(size, bold)
     
     def _draw_text_with_outline(self, text, font, text_color, outline_color, x, y, outline_width=2):
         """Vẽ text với viền để dễ đọc hơn"""
-        # Vẽ viền bằng cách vẽ text ở các vị trí xung quanh
-        for dx in range(-outline_width, outline_width + 1):
-            for dy in range(-outline_width, outline_width + 1):
-                if dx != 0 or dy != 0:  # Không vẽ ở vị trí chính giữa
-                    outline_surface = font.render(text, True, outline_color)
-                    self.screen.blit(outline_surface, (x + dx, y + dy))
-        
-        # Vẽ text chính ở giữa
-        main_surface = font.render(text, True, text_color)
-        self.screen.blit(main_surface, (x, y))
-        return main_surface.get_rect(x=x, y=y)
+        # Chữ + viền đã ghép sẵn trong text_cache: 1 lần blit thay vì vẽ lại viền ở từng độ lệch
+        surf = render_outlined(font, text, text_color, outline_color, outline_width)
+        self.screen.blit(surf, (x - outline_width, y - outline_width), special_flags=pygame.BLEND_PREMULTIPLIED)
+        return pygame.Rect(x, y, surf.get_width() - 2 * outline_width, surf.get_height() - 2 * outline_width)
 
     def __init__(self):
         # ...existing code...
@@ -1588,7 +1311,7 @@ class Game:
             pygame.mixer.pre_init(frequency=22050, size=-16, channels=1, buffer=512)
             pygame.mixer.init(); pygame.mixer.set_num_channels(24)
         except Exception as e:
-            print("Mixer init failed:", e)
+            audio_log.warning("Mixer init failed: %s", e)
         pygame.init()
         pygame.display.set_caption("Tower Defense")
 
@@ -1602,19 +1325,30 @@ class Game:
             self.screen = pygame.display.set_mode((WIDTH, HEIGHT), flags)
 
         self.clock = pygame.time.Clock()
+        # 🆕 Dirty-rect renderer cho màn chơi (tắt mặc định, bật trong config)
+        self.dirty_rects = DirtyRectTracker(WIDTH, HEIGHT, pygame.Rect(0, 0, GAME_WIDTH, GAME_HEIGHT),
+                                            DIRTY_RECT_MAX_COVERAGE)
+        self.use_dirty_rects = DIRTY_RECT_RENDERING
+        self.world_queue = RenderQueue()  # Dùng chung cho các lớp vẽ trên map (cổng, đạn, enemy, tower)
+        self._present_ms = 0.0  # Thời gian flip/update màn hình trong frame hiện tại (xem _present)
         # Sử dụng font mặc định của pygame hoặc tahoma để hỗ trợ tiếng Việt tốt
         self.font = self._get_font(20)
         self.bigfont = self._get_font(40, bold=True)
         self.medfont = self._get_font(24, bold=False)
 
-        # ✅ KHỞI TẠO ẢNH NỀN MENU 1 LẦN (tránh AttributeError)
-        self.bg_menu = self._load_bg_cached("background.png")  # trả về Surface hoặc None
+        # Ảnh nền menu: gán trong _finish_loading khi preload xong (None thì các scene tự fill màu)
+        self.bg_menu = None
 
 
         # --- Save & mặc định ---
         self.save = load_save()
         self._migrate_old_save_data()  # Chuyển đổi dữ liệu cũ
         self.player_name = self.save.get("player_name", "Player")
+        # Mức đồ họa màn chơi ("auto" = tự hạ/nâng theo thời gian vẽ đo trong run())
+        self.quality = QualityManager(self.save["settings"].get("quality", "auto"))
+        # Profiler từng phase update/draw: F3 bật overlay (và bắt đầu đo), F4 export CSV/JSON
+        self.profiler = FrameProfiler()
+        self.show_profiler = False
 
     # --- Accounts / Auth state ---
         self.accounts = load_accounts()
@@ -1650,15 +1384,82 @@ class Game:
         if self.save["settings"]["music"]:
             play_random_music(self.menu_tracks, self.save["settings"]["volume"])
 
-# Chuẩn bị runtime nhưng KHÔNG vào game (scene vẫn là AUTH)
+# Chuẩn bị runtime nhưng KHÔNG vào game: asset được decode ở worker thread trong lúc scene LOADING chạy
         self.selected_map_idx = 0
-        self._init_runtime("Normal", level=1, new_game=True)
+        self.loading_anim = 0.0
+        if ATLAS_ENABLED:
+            assets.use_atlas(TextureAtlas.load(ATLAS_DIR))  # None khi chưa build (lần chạy đầu)
+        self.preloader = AssetPreloader(self._preload_jobs(), [f for f in SHOOT_SOUND_FILES if os.path.exists(f)][:1])
+        if ASYNC_PRELOAD:
+            self.scene = SCENE_LOADING
+            self.preloader.start()
+        else:
+            self._finish_loading()
 
         # build menu
         self.menu_buttons: List[Button] = []
         self._build_menu_buttons()
 
 
+    @staticmethod
+    def _sprite_specs():
+        """(file, cỡ) của sprite tower và enemy - dùng chung cho _init_runtime và preload."""
+        towers = {}
+        for tower_key in ALL_TOWER_KEYS:
+            # Kích thước khác nhau theo loại tháp
+            if tower_key == "sniper":
+                size = 52
+            elif tower_key in ["splash", "mortar", "rocket"]:
+                size = 56
+            elif tower_key == "slow":
+                size = 50
+            else:
+                size = 48
+            towers[tower_key] = (TOWER_DEFS[tower_key]["sprite"], size)
+        # Enemy: kích thước theo size_mul từ config
+        enemies = {k: (f"enemy_{k}.png", int(ENEMY_SPRITE_BASE_SIZE * ENEMY_TYPES[k].get("size_mul", 1.0)))
+                   for k in ["normal", "fast", "tank", "boss"]}
+        return towers, enemies
+
+    def _preload_jobs(self):
+        """Ảnh cần cho menu và ván mặc định: nền (2 kiểu convert các scene đang dùng), sprite tower/enemy, tile, decor."""
+        bg = os.path.join(ASSETS_DIR, "background.png")
+        jobs = [(bg, (WIDTH, HEIGHT), False, False), (bg, (WIDTH, HEIGHT), True, False)]
+        tower_specs, enemy_specs = self._sprite_specs()
+        sprites = list(tower_specs.values()) + list(enemy_specs.values()) + [("enemy.png", ENEMY_SPRITE_BASE_SIZE)]
+        jobs += [(os.path.join(ASSETS_DIR, f), (size, size), True, True) for f, size in sprites]
+        # Tile/decor: chỉ convert ảnh gốc, cỡ scale quyết định lúc dựng map
+        for sub in ("tiles", "decor"):
+            for root, _, names in os.walk(os.path.join(ASSETS_DIR, sub)):
+                jobs += [(os.path.join(root, n), None, True, True) for n in sorted(names) if n.lower().endswith(".png")]
+        return jobs
+
+    def _update_loading(self, dt):
+        self.loading_anim += dt
+        if self.preloader.pump(PRELOAD_FRAME_BUDGET_MS):
+            self._finish_loading()
+
+    def _finish_loading(self):
+        """Preload xong: dựng runtime mặc định (sprite đã nằm trong asset cache) rồi vào màn đăng nhập."""
+        self.bg_menu = self._load_bg_cached("background.png")
+        self._init_runtime("Normal", level=1, new_game=True)
+        self._update_atlas()
+        self.scene = SCENE_AUTH
+
+    def _update_atlas(self):
+        """Ghi sprite nhỏ đã scale ra atlas khi chưa có hoặc có sprite mới / ảnh gốc đã đổi."""
+        if not ATLAS_ENABLED:
+            return
+        images, source_sizes = assets.atlas_candidates(ATLAS_MAX_SPRITE)
+        atlas = assets.atlas
+        if atlas is not None and all(atlas.get(path, size) is not None for path, size in images):
+            return
+        try:
+            TextureAtlas.build(images, source_sizes, ATLAS_SHEET_SIZE).save(ATLAS_DIR)
+            asset_log.info("Atlas: đã ghi %d sprite vào %s", len(images), ATLAS_DIR)
+        except Exception as e:
+            asset_log.warning("Atlas: không ghi được atlas: %s", e)
+
         # ==== Helpers lưu tiến độ theo user đang đăng nhập ====
     def get_unlocked_towers(self):
         """Lấy danh sách trụ đã mở theo user hiện tại (hoặc save mặc định)."""
@@ -1891,15 +1692,51 @@ class Game:
         running = True
         while running:
             dt = self.clock.tick(FPS) / 1000.0
+            frame_start = time.perf_counter()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                 else:
                     self.handle_event(event)
+            work_start = time.perf_counter()
+            self._present_ms = 0.0
             self.update(dt)
             self.draw()
+            if self.scene == SCENE_GAME:
+                # Chỉ phần việc update + draw: flip có vsync chờ tới hết 1 chu kỳ màn hình (~16.7 ms ở 60 Hz)
+                # nên tính cả vào thì frame nào cũng "vượt" ngân sách và auto tụt xuống mức thấp nhất
+                self.quality.record((time.perf_counter() - work_start) * 1000.0 - self._present_ms)
+            if self.profiler.enabled:
+                if self.scene == SCENE_GAME:
+                    self.profiler.record("frame", (time.perf_counter() - frame_start) * 1000.0)
+                    self.profiler.end_frame(self._profiler_counts())
+                else:
+                    self.profiler.discard_frame()
         pygame.quit()
 
+    def _profiler_counts(self) -> Dict[str, int]:
+        return {"enemies": len(self.enemies), "projectiles": len(self.projectiles), "towers": len(self.towers),
+                "particles": len(self.gate_particles) + len(self.effect_particles), "texts": len(self.damage_texts)}
+
+    def toggle_profiler(self):
+        self.show_profiler = not self.show_profiler
+        self.profiler.set_enabled(self.show_profiler)
+
+    def export_profile(self):
+        if not self.profiler.history:
+            self.notice("Profiler chưa có dữ liệu (F3 để bật)", 2.0)
+            return
+        try:
+            csv_path, _ = self.profiler.export(PROFILE_DIR)
+            self.notice(f"Đã lưu profile: {os.path.splitext(csv_path)[0]}.csv/.json", 3.0)
+        except OSError as e:
+            self.notice(f"Không lưu được profile: {e}", 3.0)
+
+    def _draw_profiler_overlay(self):
+        """Bảng thời gian từng phase ở góc dưới-trái map."""
+        surf = self.profiler.overlay()
+        self.screen.blit(surf, (8, GAME_HEIGHT - surf.get_height() - 8))
+
     # ------------------- XỬ LÝ INPUT -------------------
     def handle_event(self, event):
         if self.scene == SCENE_MENU:
@@ -1919,6 +1756,8 @@ class Game:
         elif self.scene == SCENE_MAP_PREVIEW:
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 self.back_to_menu()
+        elif self.scene == SCENE_LOADING:
+            pass  # Đang tải asset: chưa nhận input (QUIT vẫn được run() xử lý)
         else:
             self.handle_submenu_event(event)
 
@@ -2037,6 +1876,8 @@ class Game:
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE: self.back_to_menu()
             elif event.key == pygame.K_p: self.toggle_pause()
+            elif event.key == pygame.K_F3: self.toggle_profiler()
+            elif event.key == pygame.K_F4: self.export_profile()
             elif event.key == pygame.K_c: self.toggle_pause(False)
             # Bắt đầu trận đấu sớm - PHẢI ĐẶT TRƯỚC speed toggle
             elif event.key == pygame.K_SPACE and self.in_setup_phase:
@@ -2047,7 +1888,13 @@ class Game:
             elif event.key == pygame.K_SPACE: self.speed_scale = 1.0 if self.speed_scale > 1.0 else 2.0
             elif event.key == pygame.K_r: self._init_runtime(self.mode_name, self.level)
             elif event.key == pygame.K_n and self.win_level: self.go_next_or_clear()
-            elif event.key == pygame.K_g: self.show_placement_grid = not self.show_placement_grid  # Toggle placement grid
+            elif event.key == pygame.K_g:
+                self.show_placement_grid = not self.show_placement_grid  # Toggle placement grid
+                self.invalidate_static_layer()
+            elif event.key == pygame.K_t and self.selected_tower_for_range:
+                # Đổi kiểu ưu tiên mục tiêu cho tháp đang chọn
+                priority = self.selected_tower_for_range.cycle_priority()
+                self.notice(f"Ưu tiên mục tiêu: {TARGET_PRIORITY_NAMES[priority]}")
             # chọn trụ bằng số
             elif event.key in (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4):
                 idx = int(event.unicode)-1 if event.unicode.isdigit() else 0
@@ -2430,12 +2277,9 @@ class Game:
             return
             
         self.money -= cost; self.money_spent += cost
-        spec = TOWER_DEFS[ttype]
-        t = Tower(gx, gy, ttype=ttype,
-                range=spec["range"], fire_rate=spec["firerate"], damage=spec.get("damage",20),
-                splash=spec.get("splash",0.0), slow_mul=spec.get("slow",1.0), slow_time=spec.get("slow_time",0.0),
-                poison_damage=spec.get("poison_damage",0.0), poison_time=spec.get("poison_time",0.0))  # Poison support
+        t = make_tower(gx, gy, ttype)
         self.towers.append(t); self.occupied.add(cell); self.towers_built += 1
+        self.invalidate_static_layer()  # Viền ô đã có tower nằm trong static layer
         self.notice(f"Đã đặt {TOWER_DEFS[ttype]['name']}!")
 
 
@@ -2444,6 +2288,7 @@ class Game:
         for i, t in enumerate(self.towers):
             if (t.gx, t.gy) == cell:
                 del self.towers[i]; self.occupied.discard(cell)
+                self.invalidate_static_layer()
                 back = int(TOWER_DEFS[t.ttype]["cost"] * SELL_REFUND_RATE)
                 self.money += back; return
 
@@ -2541,17 +2386,19 @@ class Game:
 
     # ------------------- UPDATE -------------------
     def update(self, dt: float):
+        if self.scene == SCENE_LOADING:
+            self._update_loading(dt); return
         if self.scene != SCENE_GAME: return
         if self.notice_timer>0: self.notice_timer -= dt
         
         # Update animated gates (luôn chạy, kể cả khi pause)
         for gate in self.animated_gates:
             gate.update(dt)
+        self.gate_particles.update(dt)
             
         if self.paused or self.lives <= 0 or self.win_level: return
 
         self._shoot_snd_cooldown = max(0.0, self._shoot_snd_cooldown - dt)
-        sdt = dt * self.speed_scale
 
         # Xử lý setup phase
         if self.in_setup_phase:
@@ -2588,132 +2435,80 @@ class Game:
                 self.notice("⚔️ BATTLE BEGINS! ⚔️", 3.0)
             return  # Không spawn địch và không xử lý combat trong setup phase
 
-        spawned = self.wave_mgr.update(sdt)
-        self.enemies.extend(spawned)
-
-        for e in self.enemies: e.update(sdt)
-
-        for e in self.enemies:
-            if e.alive and e.reached_end:
-                e.alive = False
-                
-                # Nếu boss thoát thì thua ngay lập tức
-                if e.etype == "boss":
-                    self.lives = 0  # Game over ngay lập tức
-                    self.game_over_reason = "boss_escaped"  # Lý do thua
-                    self.notice(" BOSS ESCAPED! GAME OVER! ", 5.0)
-                    print(" BOSS ESCAPED - IMMEDIATE GAME OVER!")
-                else:
-                    self.lives -= 1  # Enemy thường chỉ trừ 1 mạng
-                    if self.lives <= 0:
-                        self.game_over_reason = "no_lives"  # Lý do thua do hết mạng
-
-        for t in self.towers:
-            t.update(sdt); t.aim(self.enemies)
-            prj = t.try_fire(self.enemies)
-            if prj:
-                self.projectiles.append(prj)
-                if self.snd_shoot and self._shoot_snd_cooldown <= 0.0 and self.save["settings"]["sfx"]:
-                    try: self.snd_shoot.play()
-                    except Exception: pass
-                    self._shoot_snd_cooldown = 0.06
-
-        # Update projectiles và tạo damage text
-        for p in self.projectiles:
-            # Lưu target trước khi update
-            old_target_alive = p.target and p.target.alive
-            old_target_hp = p.target.hp if p.target else 0
-            
-            p.update(sdt, self.enemies)
-            
-            # Nếu projectile vừa hit target (không còn alive và target bị damage)
-            if not p.alive and old_target_alive and p.target and p.target.hp < old_target_hp:
-                # Tạo damage text tại vị trí target
-                tx, ty = p.target.pos()
-                actual_damage = int(old_target_hp - p.target.hp)
-                damage_text = DamageText(tx, ty, actual_damage)
-                self.damage_texts.append(damage_text)
-
-        # Xử lý địch chết và tạo hiệu ứng
-        for e in self.enemies:
-            if not e.alive and e.hp <= 0 and e.reward > 0:
-                self.money += e.reward; self.kills += 1; e.reward = 0
-                # Tạo hiệu ứng chết tại vị trí địch
-                ex, ey = e.pos()
-                death_effect = DeathEffect(ex, ey, e.etype)
-                self.death_effects.append(death_effect)
-                
-                # Boss tạo thêm nhiều hiệu ứng hơn
+        # Fixed timestep (SimulationCore): nhiều tick SIM_DT mỗi frame khi tăng tốc
+        self._advance_simulation(dt)
+
+    def _sim_stopped(self) -> bool:
+        return self.scene != SCENE_GAME or self.lives <= 0 or self.win_level
+
+    # ----- Hook hiển thị/âm thanh cho SimulationCore -----
+    def _on_shot(self, tower, projectile):
+        if self.snd_shoot and self._shoot_snd_cooldown <= 0.0 and self.save["settings"]["sfx"]:
+            try: self.snd_shoot.play()
+            except Exception: pass
+            self._shoot_snd_cooldown = 0.06
+
+    def _on_hit(self, enemy, x, y, damage):
+        # Số sát thương bay lên tại vị trí target
+        self.damage_texts.spawn(x, y, damage)
+
+    def _on_enemy_escaped(self, enemy):
+        if enemy.etype == "boss":
+            self.notice(" BOSS ESCAPED! GAME OVER! ", 5.0)
+            event_log.info("Boss escaped - immediate game over")
+
+    def _on_boss_wave(self):
+        self.notice("! BOSS WAVE! COMMANDER INCOMING! !", 4.0)
+
+    def _on_enemy_killed(self, e):
+        # Tạo hiệu ứng chết tại vị trí địch
+        ex, ey = e.pos()
+        DeathEffect(ex, ey, e.etype).emit(self.effect_particles)
+        
+        # Boss tạo thêm nhiều hiệu ứng hơn
+        if e.etype == "boss":
+            # Tạo thêm 2 hiệu ứng phụ xung quanh boss
+            for i in range(2):
+                offset_x = ex + random.uniform(-30, 30)
+                offset_y = ey + random.uniform(-30, 30)
+                DeathEffect(offset_x, offset_y, "boss", max_duration=1.2).emit(self.effect_particles)  # Ngắn hơn một chút
+            
+            # Thông báo đặc biệt khi boss chết
+            self.notice("*** BOSS DEFEATED! ***", 3.0)
+        
+        # Phát âm thanh địch chết (với volume khác nhau theo loại)
+        if self.snd_shoot and self.save["settings"]["sfx"]:
+            try:
+                # Tạo hiệu ứng âm thanh khác nhau cho từng loại địch
+                volume = 0.3  # Volume mặc định
                 if e.etype == "boss":
-                    # Tạo thêm 2 hiệu ứng phụ xung quanh boss
-                    for i in range(2):
-                        offset_x = ex + random.uniform(-30, 30)
-                        offset_y = ey + random.uniform(-30, 30)
-                        extra_effect = DeathEffect(offset_x, offset_y, "boss")
-                        extra_effect.max_duration = 1.2  # Ngắn hơn một chút
-                        extra_effect.time_left = 1.2
-                        self.death_effects.append(extra_effect)
-                    
-                    # Thông báo đặc biệt khi boss chết
-                    self.notice("*** BOSS DEFEATED! ***", 3.0)
+                    volume = 0.8  # Boss to hơn
+                elif e.etype == "tank":
+                    volume = 0.6  # Tank trung bình
+                elif e.etype == "fast":
+                    volume = 0.3  # Fast nhỏ hơn
                 
-                # Phát âm thanh địch chết (với volume khác nhau theo loại)
-                if self.snd_shoot and self.save["settings"]["sfx"]:
-                    try:
-                        # Tạo hiệu ứng âm thanh khác nhau cho từng loại địch
-                        volume = 0.3  # Volume mặc định
-                        if e.etype == "boss":
-                            volume = 0.8  # Boss to hơn
-                        elif e.etype == "tank":
-                            volume = 0.6  # Tank trung bình
-                        elif e.etype == "fast":
-                            volume = 0.3  # Fast nhỏ hơn
-                        
-                        # Clone âm thanh và chỉnh volume
-                        if self.save["settings"]["sfx"]:
-                            original_vol = self.snd_shoot.get_volume()
-                            self.snd_shoot.set_volume(volume)
-                            self.snd_shoot.play()
-                            self.snd_shoot.set_volume(original_vol)  # Khôi phục volume gốc
-                    except Exception:
-                        pass
+                # Clone âm thanh và chỉnh volume
+                if self.save["settings"]["sfx"]:
+                    original_vol = self.snd_shoot.get_volume()
+                    self.snd_shoot.set_volume(volume)
+                    self.snd_shoot.play()
+                    self.snd_shoot.set_volume(original_vol)  # Khôi phục volume gốc
+            except Exception:
+                pass
 
+    def _update_effects(self, sdt):
         # Update hiệu ứng chết và damage text
-        for effect in self.death_effects:
-            effect.update(sdt)
-            
-        for damage_text in self.damage_texts:
-            damage_text.update(sdt)
-
-        # Loại bỏ các đối tượng đã chết/hết hạn
-        self.enemies = [e for e in self.enemies if e.alive]
-        self.projectiles = [p for p in self.projectiles if p.alive]
-        self.death_effects = [effect for effect in self.death_effects if effect.alive]
-        self.damage_texts = [text for text in self.damage_texts if text.alive]
-
-        if (not self.wave_mgr.active) and self.wave_mgr.cooldown <= 0.0 and len(self.enemies) == 0:
-            # For permanent map, never call handle_level_clear — waves are infinite
-            if not getattr(self, 'is_permanent_map', False) and self.wave_mgr.wave_no >= self.max_waves:
-                self.handle_level_clear(); return
-            else:
-                self.wave_mgr.start_next_wave()
-                # Hiển thị boss warning
-                if hasattr(self.wave_mgr, 'just_started_boss_wave') and self.wave_mgr.just_started_boss_wave:
-                    self.notice("! BOSS WAVE! COMMANDER INCOMING! !", 4.0)
-                    self.wave_mgr.just_started_boss_wave = False
+        self.effect_particles.update(sdt)
+            
+        self.damage_texts.update(sdt)
 
     def handle_level_clear(self):
         self.win_level = True
 
         # STAR SYSTEM: Chấm sao theo performance (như cũ)
         max_lives = MODE_PARAMS[self.mode_name]["lives"]
-        lives_lost = max_lives - self.lives
-        
-        # Công thức chấm sao: 3 sao nếu không mất mạng, giảm 1 sao mỗi mạng mất, tối thiểu 1 sao
-        if self.lives <= 0:
-            stars_earned = 1  # Nếu game over, chỉ được 1 sao
-        else:
-            stars_earned = max(1, 3 - lives_lost)
+        stars_earned = compute_stars(self.lives, max_lives)
         
         # COIN SYSTEM: Mỗi màn hoàn thành được coin để mua súng
         coins_earned = 1  # Mỗi màn = 1 coin để mua súng
@@ -2866,6 +2661,10 @@ class Game:
 
     # ------------------- VẼ -------------------
     def draw(self):
+        if self.scene == SCENE_GAME and self.use_dirty_rects:
+            self.draw_game_dirty()  # Tự gọi display.update/flip
+            return
+        self.dirty_rects.invalidate()  # Quay lại màn chơi thì frame đầu phải vẽ toàn bộ
         if self.scene == SCENE_MENU: self.draw_menu()
         elif self.scene == SCENE_GAME: self.draw_game()
         elif self.scene == SCENE_ALL_CLEAR: self.draw_all_clear()
@@ -2877,7 +2676,42 @@ class Game:
         elif self.scene == SCENE_MAP_PREVIEW: self.draw_map_preview()
         elif self.scene == SCENE_LEADER: self.draw_leader()
         elif self.scene == SCENE_NAME: self.draw_name()
-        pygame.display.flip()
+        elif self.scene == SCENE_LOADING: self.draw_loading()
+        self._present(pygame.display.flip)
+        if self.scene == SCENE_GAME:
+            self.profiler.lap("present")
+
+    def _present(self, show):
+        """Đẩy frame lên màn hình; ghi lại thời gian (gồm lúc chờ vsync) để Game.run trừ khỏi phần việc của frame."""
+        t0 = time.perf_counter()
+        show()
+        self._present_ms += (time.perf_counter() - t0) * 1000.0
+
+    def draw_loading(self):
+        """Màn hình tải: chữ, thanh tiến độ và vòng chấm xoay (chỉ dùng font, không cần asset)."""
+        self.screen.fill((20, 22, 30))
+        cx, cy = WIDTH // 2, HEIGHT // 2
+        title = self.bigfont.render("Đang tải...", True, WHITE)
+        self.screen.blit(title, title.get_rect(center=(cx, cy - 70)))
+
+        # Vòng chấm xoay
+        for i in range(8):
+            ang = self.loading_anim * 4.0 + i * math.pi / 4
+            shade = 80 + 175 * i // 7
+            pygame.draw.circle(self.screen, (shade, shade, 60),
+                               (int(cx + math.cos(ang) * 22), int(cy + math.sin(ang) * 22)), 4)
+
+        # Thanh tiến độ
+        progress = self.preloader.progress
+        bar = pygame.Rect(0, 0, 420, 18)
+        bar.center = (cx, cy + 60)
+        pygame.draw.rect(self.screen, DARK, bar, border_radius=9)
+        fill = bar.copy(); fill.width = int(bar.width * progress)
+        if fill.width > 0:
+            pygame.draw.rect(self.screen, GREEN, fill, border_radius=9)
+        pygame.draw.rect(self.screen, GRAY, bar, 2, border_radius=9)
+        pct = self.font.render(f"{int(progress * 100)}%", True, WHITE)
+        self.screen.blit(pct, pct.get_rect(center=(cx, bar.bottom + 20)))
 
     def draw_menu(self):
         if self.bg_menu:
@@ -2887,8 +2721,7 @@ class Game:
         
         # Thêm background cho menu
         try:
-            bg_img = pygame.image.load(os.path.join(ASSETS_DIR, "background.png")).convert()
-            bg_img = pygame.transform.scale(bg_img, (WIDTH, HEIGHT))
+            bg_img = self._scene_background()
             self.screen.blit(bg_img, (0, 0))
         except Exception:
             self.screen.fill((25,25,30))
@@ -2932,8 +2765,7 @@ class Game:
         
         # Background với overlay
         try:
-            bg_img = pygame.image.load(os.path.join(ASSETS_DIR, "background.png")).convert()
-            bg_img = pygame.transform.scale(bg_img, (WIDTH, HEIGHT))
+            bg_img = self._scene_background()
             overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
             overlay.fill((0, 0, 0, 140))
             self.screen.blit(bg_img, (0, 0))
@@ -3274,7 +3106,7 @@ class Game:
         try:
             tower_path = os.path.join(ASSETS_DIR, tower_file)
             if os.path.exists(tower_path):
-                return pygame.image.load(tower_path).convert_alpha()
+                return assets.image(tower_path)
         except Exception:
             pass
             
@@ -3290,7 +3122,7 @@ class Game:
             category = categories.get(tower_key, "basic")
             tower_path = os.path.join(ASSETS_DIR, "towers", category, f"{tower_key}.png")
             if os.path.exists(tower_path):
-                return pygame.image.load(tower_path).convert_alpha()
+                return assets.image(tower_path)
         except Exception:
             pass
             
@@ -3298,7 +3130,7 @@ class Game:
         try:
             tower_path = os.path.join(ASSETS_DIR, "tiles", tower_file)
             if os.path.exists(tower_path):
-                return pygame.image.load(tower_path).convert_alpha()
+                return assets.image(tower_path)
         except Exception:
             pass
             
@@ -3340,8 +3172,7 @@ class Game:
         
         # Background image với hiệu ứng blur (nếu có)
         try:
-            bg_img = pygame.image.load(os.path.join(ASSETS_DIR, "background.png")).convert_alpha()
-            bg_img = pygame.transform.scale(bg_img, (WIDTH, HEIGHT))
+            bg_img = self._scene_background(alpha=True)
             
             # Tạo hiệu ứng blur bằng alpha blending
             blur_surf = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
@@ -3476,13 +3307,7 @@ class Game:
         achieve_title = "THÀNH TỰU ĐẶC BIỆT"
         
         # Dùng font tiếng Việt tốt cho title
-        try:
-            title_font = pygame.font.SysFont('tahoma', 24, bold=True)  # Tahoma hỗ trợ tiếng Việt tốt
-        except:
-            try:
-                title_font = pygame.font.SysFont('arial', 24, bold=True)
-            except:
-                title_font = self.medfont
+        title_font = get_font(24, bold=True, names=("tahoma", "arial"))  # Tahoma hỗ trợ tiếng Việt tốt
         
         achieve_title_surf = title_font.render(achieve_title, True, (255, 215, 0))
         achieve_title_rect = achieve_title_surf.get_rect()
@@ -3557,13 +3382,7 @@ class Game:
             pygame.draw.rect(self.screen, border_color, card_rect, width=2, border_radius=8)
             
             # Achievement text màu đen, dễ đọc - KHÔNG CÓ ICON
-            try:
-                achieve_font = pygame.font.SysFont('tahoma', 16, bold=True)  # Tăng từ 14 lên 16 vì không có icon
-            except:
-                try:
-                    achieve_font = pygame.font.SysFont('arial', 16, bold=True)  # Arial fallback
-                except:
-                    achieve_font = pygame.font.Font(None, 20)
+            achieve_font = get_font(16, bold=True, names=("tahoma", "arial"))  # Tăng từ 14 lên 16 vì không có icon
                 
             achieve_surf = achieve_font.render(achievement, True, (0, 0, 0))  # Màu đen
             achieve_rect = achieve_surf.get_rect()
@@ -3707,8 +3526,7 @@ class Game:
         
         # Background image với hiệu ứng blur (nếu có)
         try:
-            bg_img = pygame.image.load(os.path.join(ASSETS_DIR, "background.png")).convert_alpha()
-            bg_img = pygame.transform.scale(bg_img, (WIDTH, HEIGHT))
+            bg_img = self._scene_background(alpha=True)
             
             # Tạo hiệu ứng blur/overlay sang trọng
             overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
@@ -4036,8 +3854,7 @@ class Game:
         
         # Background image với hiệu ứng blur (nếu có)
         try:
-            bg_img = pygame.image.load(os.path.join(ASSETS_DIR, "background.png")).convert_alpha()
-            bg_img = pygame.transform.scale(bg_img, (WIDTH, HEIGHT))
+            bg_img = self._scene_background(alpha=True)
             
             # Tạo hiệu ứng blur/overlay sang trọng
             overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
@@ -4173,8 +3990,7 @@ class Game:
             self.screen.fill((30, 34, 45))
         # Vẽ background khi đăng nhập
         try:
-            bg_img = pygame.image.load(os.path.join(ASSETS_DIR, "background.png")).convert()
-            bg_img = pygame.transform.scale(bg_img, (WIDTH, HEIGHT))
+            bg_img = self._scene_background()
             self.screen.blit(bg_img, (0, 0))
             
             # Thêm overlay để che chữ "TOWER DEFENSE" nếu có trong background
@@ -4285,8 +4101,7 @@ class Game:
         
         # Background image với hiệu ứng blur
         try:
-            bg_img = pygame.image.load(os.path.join(ASSETS_DIR, "background.png")).convert_alpha()
-            bg_img = pygame.transform.scale(bg_img, (WIDTH, HEIGHT))
+            bg_img = self._scene_background(alpha=True)
             
             # Tạo hiệu ứng blur/overlay sang trọng
             overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
@@ -5102,13 +4917,12 @@ class Game:
                     self.screen.blit(overlay, (x, y))
         
         # Thêm một số điểm nhấn random để tăng tính tự nhiên
-        import random
-        random.seed(level * 42)  # Seed cố định cho level
+        rng = random.Random(level * 42)  # Seed cố định cho level
         
         for _ in range(20):
-            x = random.randint(0, GAME_WIDTH - 32)
-            y = random.randint(0, GAME_HEIGHT - 32)
-            size = random.randint(12, 24)
+            x = rng.randint(0, GAME_WIDTH - 32)
+            y = rng.randint(0, GAME_HEIGHT - 32)
+            size = rng.randint(12, 24)
             
             # Vẽ các vòng tròn với alpha rõ ràng hơn
             dot_surf = pygame.Surface((size*2, size*2), pygame.SRCALPHA)
@@ -5117,55 +4931,215 @@ class Game:
             self.screen.blit(dot_surf, (x, y))
 
     # ---- Trong game ----
+    def invalidate_static_layer(self):
+        """Đánh dấu lớp nền tĩnh cần vẽ lại (đổi map, đặt/bán trụ, bật/tắt grid placement)."""
+        self._static_layer = None
+        self.dirty_rects.invalidate()
+
+    def _build_static_layer(self):
+        """Vẽ 1 lần nền map + panel UI + tiles/đường/decor vào 1 Surface riêng."""
+        layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+        screen, self.screen = self.screen, layer  # Các hàm _draw_* vẽ vào self.screen
+        prof = self.profiler  # Chỉ chạy ở frame đầu level / khi nền đổi
+        prof.begin()
+        try:
+            # 1) Ưu tiên sử dụng ảnh nền, fallback về texture nền
+            if hasattr(self, "map_bg") and self.map_bg:
+                # Có ảnh nền → sử dụng ảnh
+                self.screen.blit(self.map_bg, (0, 0))
+            else:
+                # Không có ảnh → sử dụng nền texture đẹp
+                self._draw_enhanced_background()
+
+            # Nền cho khu vực UI - màu đẹp hơn, ít đen hơn
+            ui_bg_color = (40, 45, 55)  # Xanh xám nhẹ thay vì đen
+            pygame.draw.rect(self.screen, ui_bg_color, (GAME_WIDTH, 0, WIDTH-GAME_WIDTH, HEIGHT))  # Panel phải
+            pygame.draw.rect(self.screen, ui_bg_color, (0, GAME_HEIGHT, GAME_WIDTH, HEIGHT-GAME_HEIGHT))  # Panel dưới
+
+            # Thêm gradient subtile cho UI area
+            for i in range(5):
+                gradient_color = (ui_bg_color[0] + i, ui_bg_color[1] + i, ui_bg_color[2] + i)
+                pygame.draw.rect(self.screen, gradient_color, (GAME_WIDTH + i, i, WIDTH-GAME_WIDTH - 2*i, HEIGHT - 2*i))
+            prof.lap("static:bg")
+            # 2) Vẽ tiles/đường/decor...
+            if hasattr(self, "_draw_tiles_autotile"):
+                self._draw_tiles_autotile()
+            else:
+                self.draw_grid()
+            prof.lap("static:tiles")
+            self._draw_decor()
+            prof.lap("static:decor")
+        finally:
+            self.screen = screen
+        self._static_layer = layer
+
     def draw_game(self):
-        # 1) Ưu tiên sử dụng ảnh nền, fallback về texture nền
-        if hasattr(self, "map_bg") and self.map_bg:
-            # Có ảnh nền → sử dụng ảnh
-            self.screen.blit(self.map_bg, (0, 0))
-        else:
-            # Không có ảnh → sử dụng nền texture đẹp
-            self._draw_enhanced_background()
-        
-        # Nền cho khu vực UI - màu đẹp hơn, ít đen hơn
-        ui_bg_color = (40, 45, 55)  # Xanh xám nhẹ thay vì đen
-        pygame.draw.rect(self.screen, ui_bg_color, (GAME_WIDTH, 0, WIDTH-GAME_WIDTH, HEIGHT))  # Panel phải
-        pygame.draw.rect(self.screen, ui_bg_color, (0, GAME_HEIGHT, GAME_WIDTH, HEIGHT-GAME_HEIGHT))  # Panel dưới
-        
-        # Thêm gradient subtile cho UI area
-        for i in range(5):
-            alpha = 10 - i * 2
-            gradient_color = (ui_bg_color[0] + i, ui_bg_color[1] + i, ui_bg_color[2] + i)
-            pygame.draw.rect(self.screen, gradient_color, (GAME_WIDTH + i, i, WIDTH-GAME_WIDTH - 2*i, HEIGHT - 2*i))
-        # 2) Vẽ tiles/đường/decor...
-        if hasattr(self, "_draw_tiles_autotile"):
-            self._draw_tiles_autotile()
-        else:
-            self.draw_grid()
-        if hasattr(self, "_draw_decor_and_markers"):
-            self._draw_decor_and_markers()
+        # 1-2) Nền + tiles/đường/decor không đổi trong level → cache thành 1 Surface, mỗi frame chỉ 1 blit
+        prof = self.profiler
+        if getattr(self, "_static_layer", None) is None:
+            self._build_static_layer()
+        prof.begin()
+        self.screen.blit(self._static_layer, (0, 0))
+        prof.lap("draw:background")
+        self._draw_world_layer()
+        self._draw_ui_layer()
+        prof.lap("draw:hud")
+        if self.show_profiler:
+            self._draw_profiler_overlay()
+
+    def _draw_world_layer(self):
+        """Mọi thứ động trên map, vẽ đè lên lớp nền tĩnh: cổng, đạn, enemy, hiệu ứng, tower."""
+        prof = self.profiler
+        self._draw_gates()  # Cổng có animation nên vẽ mỗi frame
+        prof.lap("draw:gates")
 
         # 3) Objects & UI
         self.draw_projectiles()
+        prof.lap("draw:projectiles")
         self.draw_enemies()
+        prof.lap("draw:enemies")
         self.draw_death_effects()  # Vẽ hiệu ứng chết
         self.draw_damage_texts()   # Vẽ text sát thương
+        prof.lap("draw:effects")
         self.draw_range_circles()  # Vẽ tầm bắn tower
         self.draw_placement_preview()  # Vẽ preview khi đặt tower
         self.draw_towers()
+        prof.lap("draw:towers")
         
         # Vẽ thanh đếm ngược setup phase
         if self.in_setup_phase:
             self.draw_setup_countdown()
-        
+
+    def _draw_ui_layer(self, panels: bool = True):
         # 4) Vẽ đường viền tách game area và UI area
         pygame.draw.line(self.screen, WHITE, (GAME_WIDTH, 0), (GAME_WIDTH, HEIGHT), 2)  # Đường dọc
         pygame.draw.line(self.screen, WHITE, (0, GAME_HEIGHT), (WIDTH, GAME_HEIGHT), 2)  # Đường ngang
         
-        self.draw_hud()
+        self.draw_hud(panels)
 
         if self.paused or self.lives <= 0 or self.win_level:
             self.draw_overlay()
 
+    def draw_game_dirty(self):
+        """Vẽ màn chơi kiểu dirty-rect: chỉ phục hồi nền + vẽ lại + đẩy các vùng có thay đổi.
+
+        Vẫn rơi về vẽ toàn bộ + flip khi nền tĩnh vừa đổi, khi có overlay (pause/thắng/thua)
+        phủ cả màn hình, hoặc khi tổng vùng bẩn quá lớn.
+        """
+        tracker = self.dirty_rects
+        prof = self.profiler
+        if getattr(self, "_static_layer", None) is None:
+            self._build_static_layer()
+            tracker.invalidate()
+        prof.begin()
+        tracker.begin_frame()
+        panels_dirty = self._mark_dirty_regions()
+        overlay = self.paused or self.lives <= 0 or self.win_level
+        full = overlay or tracker.needs_full_redraw()
+        if full:
+            self.screen.blit(self._static_layer, (0, 0))
+        else:
+            tracker.restore(self.screen, self._static_layer)
+        prof.lap("draw:background")
+        try:
+            # Vật thể trên map không được tràn sang panel (cổng/enemy sát mép), nếu không panel sẽ phải vẽ lại mỗi frame
+            self.screen.set_clip(tracker.world)
+            self._draw_world_layer()
+            # Panel phải/dưới không đổi thì giữ nguyên từ frame trước và không vẽ lại
+            panels_dirty = panels_dirty or full
+            self.screen.set_clip(None if panels_dirty else tracker.world)
+            self._draw_ui_layer(panels_dirty)
+        finally:
+            self.screen.set_clip(None)
+        prof.lap("draw:hud")
+        if self.show_profiler:
+            self._draw_profiler_overlay()  # Rect đã được đánh dấu trong _mark_dirty_regions
+        if full:
+            self._present(tracker.present_full)
+            if overlay:
+                tracker.invalidate()  # Overlay làm tối cả màn hình, bỏ overlay cũng phải vẽ lại hết
+        else:
+            self._present(tracker.present)
+        prof.lap("present")
+
+    def _hud_state_key(self):
+        """Những gì panel HUD phụ thuộc vào: key đổi thì panel phải/dưới mới cần vẽ lại."""
+        rt = self.selected_tower_for_range
+        wm = self.wave_mgr
+        return (self.money, self.lives, self.kills, len(self.enemies), self.in_setup_phase, int(self.setup_time),
+                self.paused, self.speed_scale, self.selected_tower, self.show_all_ranges,
+                getattr(self, 'show_placement_grid', True), getattr(self, 'hovered_powerup', None),
+                (id(rt), rt.level, rt.priority) if rt else None,
+                wm.wave_no, wm.active, wm.enemies_left_to_spawn, getattr(wm, 'is_boss_wave', False),
+                pygame.mouse.get_pos(), pygame.mouse.get_pressed())
+
+    def _mark_dirty_regions(self):
+        """Đánh dấu vùng bao (có dư cho glow/trail/tên) của mọi thứ vẽ động trong frame này.
+
+        Trả về True nếu panel phải/dưới cũng phải vẽ lại frame này.
+        """
+        tracker = self.dirty_rects
+        # Các dòng chữ HUD ở góc trên map luôn vẽ lại (enemy đi ngang qua bên dưới)
+        tracker.add(0, 0, GAME_WIDTH, 170 if self.in_setup_phase else 92)  # Setup: thêm thanh đếm ngược
+
+        for gate in self.animated_gates:
+            cx, cy = gate.x * TILE + TILE // 2, gate.y * TILE + TILE // 2
+            tracker.add_circle(cx, cy, TILE)
+        for x0, y0, x1, y1 in self.gate_particles.group_bounds():  # Mỗi cổng 1 rect
+            tracker.add(x0 - 6, y0 - 6, x1 - x0 + 12, y1 - y0 + 12)
+
+        for t in self.towers:
+            cx, cy = t.center()
+            tracker.add_circle(cx, cy, 60 if t.level >= 2 else 36)  # Glow cấp 2-3 rộng hơn sprite
+        if self.selected_tower_for_range:
+            cx, cy = self.selected_tower_for_range.center()
+            tracker.add_circle(cx, cy, self.selected_tower_for_range.range + 1)
+        if self.show_all_ranges:
+            for t in self.towers:
+                cx, cy = t.center()
+                tracker.add_circle(cx, cy, t.range + 1)
+        if self.selected_tower and not self.paused:
+            mx, my = pygame.mouse.get_pos()
+            if mx < GAME_WIDTH and my < GAME_HEIGHT:
+                cx, cy = grid_to_px(*px_to_grid(mx, my))
+                tracker.add_circle(cx, cy, max(TOWER_DEFS[self.selected_tower]["range"], TILE) + 1)
+
+        for e in self.enemies:
+            x, y = e.render_pos(self.sim_alpha)
+            s = e.size_mul
+            half_w = max(30 * s, 60)  # Tên enemy rộng hơn sprite
+            tracker.add(x - half_w, y - 30 * s - 20, half_w * 2, 60 * s + 22)
+
+        for p in self.projectiles:
+            x, y = p.render_pos(self.sim_alpha)
+            if p.trail_points:
+                tracker.add_points([(x, y), (p.x, p.y), *p.trail_points], 26)
+            else:
+                tracker.add_points([(x, y), (p.x, p.y)], 26)
+
+        for x0, y0, x1, y1 in self.effect_particles.group_bounds():  # Mỗi lần nổ 1 rect
+            tracker.add(x0 - 12, y0 - 12, x1 - x0 + 24, y1 - y0 + 24)
+
+        for x, y in self.damage_texts.positions():
+            tracker.add(x - 40, y - 2, 80, 24)
+        if self.show_profiler:
+            surf = self.profiler.overlay()
+            tracker.add(8, GAME_HEIGHT - surf.get_height() - 8, surf.get_width(), surf.get_height())
+
+        # Panel: vẽ lại khi trạng thái HUD đổi, khi tiền đang nhấp nháy báo thiếu,
+        # và định kỳ vài lần/giây cho các chi tiết không nằm trong key
+        key = self._hud_state_key()
+        money_blink = bool(self.selected_tower) and self.money < TOWER_DEFS.get(self.selected_tower, {}).get("cost", 0)
+        self._hud_frames = getattr(self, '_hud_frames', 0) + 1
+        panels_dirty = (tracker.full or money_blink or key != getattr(self, '_hud_key', None)
+                        or self._hud_frames >= FPS // 4)
+        self._hud_key = key
+        if panels_dirty:
+            self._hud_frames = 0
+            tracker.add_once(pygame.Rect(GAME_WIDTH, 0, WIDTH - GAME_WIDTH, HEIGHT))
+            tracker.add_once(pygame.Rect(0, GAME_HEIGHT, GAME_WIDTH, HEIGHT - GAME_HEIGHT))
+        return panels_dirty
+
 
 
     def draw_grid(self):
@@ -5361,8 +5335,11 @@ class Game:
 
     def draw_enemies(self):
         # Enhanced enemy rendering với sprites và tên
+        # Lượt 1: sprite (và viền boss) của mọi enemy gom vào 1 lần blits; lượt 2: tên, thanh máu, hiệu ứng
+        queue = self.world_queue
+        visible = []
         for e in self.enemies:
-            x, y = e.pos()
+            x, y = e.render_pos(self.sim_alpha)
             
             # Tính alpha để fade out khi enemy thoát khỏi map
             alpha = 1.0
@@ -5376,13 +5353,12 @@ class Game:
             # Chọn sprite phù hợp
             enemy_img = self.enemy_sprites.get(e.etype)
             if enemy_img:
-                # Rotate sprite based on movement direction
+                # Rotate sprite based on movement direction (lấy bản xoay sẵn gần góc nhất)
+                angle = 0.0
                 if e.idx < len(e.path):
                     tx, ty = e.path[e.idx]
                     angle = -math.degrees(math.atan2(ty - y, tx - x))
-                    rotated_img = pygame.transform.rotate(enemy_img, angle)
-                else:
-                    rotated_img = enemy_img
+                rotated_img = self.enemy_rotations.get(e.etype, angle)
                 
                 # Vẽ sprite với kích thước phù hợp
                 img_rect = rotated_img.get_rect(center=(int(x), int(y)))
@@ -5392,18 +5368,28 @@ class Game:
                     border_color = (*[int(c * alpha) for c in (255, 215, 0)], int(255 * alpha))
                     border_surf = pygame.Surface((img_rect.width + 10, img_rect.height + 10), pygame.SRCALPHA)
                     pygame.draw.circle(border_surf, border_color, (border_surf.get_width()//2, border_surf.get_height()//2), int(img_rect.width//2 + 5), 3)
-                    self.screen.blit(border_surf, (img_rect.x - 5, img_rect.y - 5))
+                    queue.add(border_surf, (img_rect.x - 5, img_rect.y - 5))
                 
                 # Áp dụng alpha cho sprite
                 if alpha < 1.0:
-                    temp_surf = rotated_img.copy()
-                    temp_surf.set_alpha(int(255 * alpha))
-                    self.screen.blit(temp_surf, img_rect)
+                    queue.add(self.enemy_rotations.get(e.etype, angle, alpha), img_rect)
                 else:
-                    self.screen.blit(rotated_img, img_rect)
-                
+                    queue.add(rotated_img, img_rect)
+                visible.append((e, x, y, alpha, img_rect.height // 2))
+            else:
+                # Fallback: circle với màu sắc và alpha
+                color = ENEMY_TYPES[e.etype]["color"]
+                base_radius = int(16 * e.size_mul)
+                queue.add_disc(x, y, base_radius, color, int(255 * alpha))
+                visible.append((e, x, y, alpha, None))
+        queue.flush(self.screen)
+
+        show_names = self.quality.enabled("enemy_names")  # Mức thấp: chỉ giữ nhãn BOSS
+        poison_fx = self.quality.enabled("poison_fx")
+        for e, x, y, alpha, half_h in visible:
+            if half_h is not None:
                 # Vẽ tên enemy type ở trên đầu với alpha
-                if alpha > 0.3:  # Chỉ vẽ tên khi alpha đủ cao
+                if alpha > 0.3 and (show_names or e.etype == "boss"):  # Chỉ vẽ tên khi alpha đủ cao
                     enemy_name = ENEMY_TYPES[e.etype]["name"]
                     name_color = ENEMY_TYPES[e.etype]["color"]
                     
@@ -5413,32 +5399,21 @@ class Game:
                         name_color = (255, 215, 0)  # Gold color
                     
                     # Áp dụng alpha cho màu text
-                    alpha_color = (*[int(c * alpha) for c in name_color[:3]], int(255 * alpha))
-                    name_surf = pygame.font.Font(None, 16).render(enemy_name, True, name_color)
+                    name_surf = get_default_font(16).render(enemy_name, True, name_color)
                     if alpha < 1.0:
+                        name_surf = name_surf.copy()  # Surface trong text cache dùng chung, không sửa trực tiếp
                         name_surf.set_alpha(int(255 * alpha))
-                    name_rect = name_surf.get_rect(center=(int(x), int(y - img_rect.height//2 - 12)))
+                    name_rect = name_surf.get_rect(center=(int(x), int(y - half_h - 12)))
                     self.screen.blit(name_surf, name_rect)
                 
             else:
-                # Fallback: circle với màu sắc và alpha
-                color = ENEMY_TYPES[e.etype]["color"]
-                base_radius = int(16 * e.size_mul)
-                
-                if alpha < 1.0:
-                    # Vẽ với alpha bằng surface
-                    circle_surf = pygame.Surface((base_radius * 2, base_radius * 2), pygame.SRCALPHA)
-                    alpha_color = (*color[:3], int(255 * alpha))
-                    pygame.draw.circle(circle_surf, alpha_color, (base_radius, base_radius), base_radius)
-                    self.screen.blit(circle_surf, (int(x - base_radius), int(y - base_radius)))
-                else:
-                    pygame.draw.circle(self.screen, color, (int(x), int(y)), base_radius)
-                
                 # Tên cho fallback với alpha
-                if alpha > 0.3:
+                base_radius = int(16 * e.size_mul)
+                if alpha > 0.3 and show_names:
                     enemy_name = ENEMY_TYPES[e.etype]["name"]
-                    name_surf = pygame.font.Font(None, 16).render(enemy_name, True, WHITE)
+                    name_surf = get_default_font(16).render(enemy_name, True, WHITE)
                     if alpha < 1.0:
+                        name_surf = name_surf.copy()
                         name_surf.set_alpha(int(255 * alpha))
                     name_rect = name_surf.get_rect(center=(int(x), int(y - base_radius - 12)))
                     self.screen.blit(name_surf, name_rect)
@@ -5486,17 +5461,35 @@ class Game:
                 self.screen.blit(aura_surf, (int(x - aura_radius), int(y - aura_radius)))
             
             # Hiệu ứng Poison DoT với alpha
-            if e.poison_timer > 0 and alpha > 0.2:
+            if poison_fx and e.poison_timer > 0 and alpha > 0.2:
                 self._draw_poison_effect_on_enemy(e, x, y, alpha)
 
     def draw_towers(self):
+        # Glow + sprite của mọi tower (đúng thứ tự) gom vào 1 lần blits, highlight/huy hiệu vẽ sau
+        queue = self.world_queue
+        badges = []
+        glow = self.quality.enabled("tower_glow")
         for t in self.towers:
             cx, cy = t.center()
             
             # Hiệu ứng phát sáng cho tower level 2 và 3
-            if t.level >= 2:
-                self._draw_tower_glow(t, cx, cy)
+            if glow and t.level >= 2:
+                self._draw_tower_glow(t, cx, cy, queue)
             
+            base_img = self.tower_sprites.get(t.ttype)
+            if base_img:
+                angle_deg = -math.degrees(t.angle)
+                img = self.tower_rotations.get(t.ttype, angle_deg)
+                rect = img.get_rect(center=(int(cx), int(cy)))
+                queue.add(img, rect)
+                badges.append((t, rect))
+            else:
+                badges.append((t, None))
+        queue.flush(self.screen)
+
+        for t, rect in badges:
+            cx, cy = t.center()
+
             # Highlight tower được chọn
             if t == self.selected_tower_for_range:
                 # Vẽ vòng tròn highlight xung quanh tower
@@ -5504,13 +5497,8 @@ class Game:
                 # Hiệu ứng nhấp nháy nhẹ
                 pulse = int(128 + 127 * math.sin(time.time() * 4))
                 pygame.draw.circle(self.screen, (255, 255, 100, pulse), (int(cx), int(cy)), 25, 2)
-            
-            base_img = self.tower_sprites.get(t.ttype)
-            if base_img:
-                angle_deg = -math.degrees(t.angle)
-                img = pygame.transform.rotate(base_img, angle_deg)
-                rect = img.get_rect(center=(int(cx), int(cy)))
-                self.screen.blit(img, rect)
+
+            if rect is not None:
                 # --- Huy hiệu cấp ở góc phải-trên của sprite ---
                 draw_level_badge(self.screen, rect.right - 10, rect.top + 10, t.level, small=False)
             else:
@@ -5519,7 +5507,7 @@ class Game:
                 # Badge cho trường hợp không có sprite
                 draw_level_badge(self.screen, int(cx)+18, int(cy)-18, t.level, small=False)
     
-    def _draw_tower_glow(self, tower, cx, cy):
+    def _draw_tower_glow(self, tower, cx, cy, queue):
         """Vẽ hiệu ứng phát sáng xung quanh tower level 2 và 3."""
         # Tính toán pulse effect
         pulse = abs(math.sin(time.time() * 2)) * 0.3 + 0.7  # 0.7 -> 1.0
@@ -5540,50 +5528,61 @@ class Game:
             alpha = int(60 * pulse * (1 - i / num_layers))  # Alpha giảm dần từ ngoài vào
             radius = int(radius_base * pulse * (1 + i * 0.15))
             
-            # Tạo surface trong suốt cho glow
-            glow_surf = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surf, (*glow_color, alpha), (radius, radius), radius)
-            
-            # Vẽ lên screen
-            self.screen.blit(glow_surf, (int(cx - radius), int(cy - radius)))
+            # Disc trong suốt dùng chung (cache theo bán kính/alpha)
+            queue.items.append((disc(radius, glow_color, alpha), (int(cx - radius), int(cy - radius))))
 
     def draw_projectiles(self):
+        # Đạn thường (đông nhất) gom vào 1 lần blits; đạn có hiệu ứng riêng vẽ trực tiếp như cũ
+        queue = self.world_queue
         for p in self.projectiles:
-            self._draw_projectile_with_effects(p)
+            if p.projectile_type in BASIC_PROJECTILE_TYPES:
+                x, y = p.render_pos(self.sim_alpha)
+                queue.add_disc(x, y, 4, YELLOW if p.splash == 0 else ORANGE)
+            else:
+                self._draw_projectile_with_effects(p)
+        queue.flush(self.screen)
     
     def _draw_projectile_with_effects(self, p):
         """Vẽ projectile với hiệu ứng đặc biệt"""
-        x, y = int(p.x), int(p.y)
+        x, y = p.render_pos(self.sim_alpha)
+        x, y = int(x), int(y)
+        q = self.quality.flags  # Lớp glow/đuôi/tia lửa tắt ở mức đồ họa thấp, thân đạn luôn vẽ
         
-        if p.projectile_type == "basic" or p.projectile_type == "sniper" or p.projectile_type == "minigun":
+        if p.projectile_type in BASIC_PROJECTILE_TYPES:
             # Đạn cơ bản - giữ nguyên
             color = YELLOW if p.splash == 0 else ORANGE
             pygame.draw.circle(self.screen, color, (x, y), 4)
             
         elif p.projectile_type == "laser":
             # [RED] Tia laser - màu đỏ sáng với đuôi và hiệu ứng phát sáng
-            self._draw_laser_glow(p, x, y)
-            self._draw_trail(p, (255, 50, 50), (255, 150, 150))
+            if q["projectile_glow"]:
+                self._draw_laser_glow(p, x, y)
+            if q["trails"]:
+                self._draw_trail(p, (255, 50, 50), (255, 150, 150))
             pygame.draw.circle(self.screen, (255, 255, 255), (x, y), 6)
             pygame.draw.circle(self.screen, (255, 0, 0), (x, y), 4)
             
         elif p.projectile_type == "rocket":
             # [ROCKET] Tên lửa - lớn, màu cam với lửa phía sau và hình dạng thực tế
-            self._draw_rocket_trail(p)
+            if q["trails"]:
+                self._draw_rocket_trail(p)
             self._draw_rocket_body(p, x, y)
             # Đầu tên lửa (nhọn)
             pygame.draw.circle(self.screen, (255, 100, 0), (x, y), 5)
             
         elif p.projectile_type == "electric":
             # Điện - màu xanh dương với tia điện và hiệu ứng sét
-            self._draw_electric_effect(p)
-            self._draw_electric_aura(p, x, y)
+            if q["sparks"]:
+                self._draw_electric_effect(p)
+            if q["projectile_glow"]:
+                self._draw_electric_aura(p, x, y)
             pygame.draw.circle(self.screen, (0, 150, 255), (x, y), 5)
             pygame.draw.circle(self.screen, (255, 255, 255), (x, y), 2)
             
         elif p.projectile_type == "poison":
             # [GREEN] Độc - màu xanh lá với bong bóng
-            self._draw_poison_bubbles(p)
+            if q["poison_fx"]:
+                self._draw_poison_bubbles(p)
             pygame.draw.circle(self.screen, (0, 200, 0), (x, y), 5)
             pygame.draw.circle(self.screen, (100, 255, 100), (x, y), 3)
             
@@ -5599,7 +5598,8 @@ class Game:
             
         elif p.projectile_type == "mortar":
             # [BOMB] Cối phá hủy - lớn, màu đen với đuôi khói
-            self._draw_mortar_smoke(p)
+            if q["trails"]:
+                self._draw_mortar_smoke(p)
             pygame.draw.circle(self.screen, (50, 50, 50), (x, y), 8)
             pygame.draw.circle(self.screen, (100, 80, 60), (x, y), 6)
     
@@ -5694,7 +5694,7 @@ class Game:
                 pygame.draw.circle(self.screen, color, (int(x + offset_x), int(y + offset_y)), size)
         
         # Thêm particles lửa bay tung tóe
-        if random.random() < 0.4:  # 40% cơ hội tạo particle
+        if self.quality.flags["sparks"] and random.random() < 0.4:  # 40% cơ hội tạo particle
             for _ in range(random.randint(1, 3)):
                 spark_x = x + random.uniform(-8, 8)
                 spark_y = y + random.uniform(-8, 8) 
@@ -5738,7 +5738,7 @@ class Game:
             pygame.draw.polygon(self.screen, (150, 200, 255), star_points, 2)
         
         # Hiệu ứng lấp lánh xung quanh
-        if random.random() < 0.3:  # 30% cơ hội lấp lánh
+        if self.quality.flags["sparks"] and random.random() < 0.3:  # 30% cơ hội lấp lánh
             for _ in range(random.randint(2, 4)):
                 sparkle_x = x + random.uniform(-12, 12)
                 sparkle_y = y + random.uniform(-12, 12)
@@ -5837,7 +5837,7 @@ class Game:
             # Hiện thông tin poison damage trên thanh HP
             if enemy.poison_damage > 0:
                 poison_text = f"-{enemy.poison_damage:.0f}/s"
-                poison_surf = pygame.font.Font(None, 14).render(poison_text, True, (0, 255, 100))
+                poison_surf = get_default_font(14).render(poison_text, True, (0, 255, 100))
                 poison_rect = poison_surf.get_rect(center=(int(x + 20), int(y - 30)))
                 self.screen.blit(poison_surf, poison_rect)
     
@@ -5879,13 +5879,12 @@ class Game:
 
     def draw_death_effects(self):
         """Vẽ hiệu ứng khi địch chết"""
-        for effect in self.death_effects:
-            effect.draw(self.screen)
+        if self.quality.enabled("death_particles"):
+            self.effect_particles.draw(self.screen)
             
     def draw_damage_texts(self):
         """Vẽ text sát thương bay lên"""
-        for damage_text in self.damage_texts:
-            damage_text.draw(self.screen)
+        self.damage_texts.draw(self.screen)
             
     def draw_range_circles(self):
         """Vẽ vòng tròn tầm bắn cho tower"""
@@ -6064,7 +6063,7 @@ class Game:
             rects[key] = pygame.Rect(x, y, w, h)
         return rects
 
-    def draw_hud(self):
+    def draw_hud(self, panels: bool = True):
         name = self.player_name
         
         # Setup phase indicator và combat indicator - Gọn gàng hơn
@@ -6123,6 +6122,92 @@ class Game:
                 warning_text = "! BOSS thoát = GAME OVER! [SKULL]"
                 self._draw_text_with_outline(warning_text, hud_font, RED, (0, 0, 0), 10, 50, 2)
 
+        # --- Panel phải + hotbar (dirty-rect: bỏ qua khi panel không đổi so với frame trước) ---
+        if panels:
+            self._draw_hud_panels()
+
+        # Gợi ý nâng cấp / trạng thái wave / thông tin decoration
+        mx, my = pygame.mouse.get_pos()
+        gx, gy = px_to_grid(mx, my)
+        t = self._find_tower_at((gx,gy))
+        
+        # Sử dụng font nhỏ hơn với viền cho tooltip để đọc rõ hơn
+        tooltip_font = self._get_font(14)
+        tooltip_y = 70  # Đặt thấp hơn để không đè lên HUD chính
+        
+        if t:
+            up_txt = "MAX" if not t.can_upgrade() else f"Upgrade: ${t.upgrade_cost()}"
+            tip = f"{TOWER_DEFS[t.ttype]['name']} Lv{t.level} | Rng {int(t.range)} | FR {t.fire_rate:.2f}/s | Dmg {t.damage} | {up_txt}"
+            self._draw_text_with_outline(tip, tooltip_font, WHITE, (0, 0, 0), 10, tooltip_y, 1)
+        elif (gx, gy) in getattr(self, 'tower_slots', set()) and (gx, gy) not in self.occupied:
+            # Thông tin về ô đặt tower với viền
+            self._draw_text_with_outline("Ô đặt trụ - Click để đặt trụ đã chọn", tooltip_font, (150, 255, 150), (0, 0, 0), 10, tooltip_y, 1)
+        elif hasattr(self, 'decorative_objects'):
+            # Kiểm tra hover qua decoration
+            decoration_info = self._get_decoration_at(gx, gy)
+            if decoration_info:
+                decoration_names = {
+                    "broken_tower": "Tháp cổ bị hư hỏng",
+                    "dead_tree": "Cây khô héo", 
+                    "rocks": "Những tảng đá cổ",
+                    "thorns": "Bụi gai sắc nhọn",
+                    "ruins": "Tàn tích cổ đại",
+                    "crystal": "Pha lê năng lượng",
+                    "bones": "Hài cốt cổ"
+                }
+                name = decoration_names.get(decoration_info, "Vật trang trí")
+                self._draw_text_with_outline(f"{name} - Không thể đặt trụ ở đây", tooltip_font, (200, 200, 100), (0, 0, 0), 10, tooltip_y, 1)
+            else:
+                # Thông tin wave thông thường với viền
+                if self.wave_mgr.active: status = f"Đang sinh: còn {self.wave_mgr.enemies_left_to_spawn} địch"
+                elif self.wave_mgr.is_between_waves(): status = f"Nghỉ wave: {self.wave_mgr.cooldown:.1f}s"
+                else: status = "Chuẩn bị wave tiếp theo..."
+                self._draw_text_with_outline(status, tooltip_font, WHITE, (0, 0, 0), 10, tooltip_y, 1)
+        else:
+            if self.wave_mgr.active: status = f"Đang sinh: còn {self.wave_mgr.enemies_left_to_spawn} địch"
+            elif self.wave_mgr.is_between_waves(): status = f"Nghỉ wave: {self.wave_mgr.cooldown:.1f}s"
+            else: status = "Chuẩn bị wave tiếp theo..."
+            self._draw_text_with_outline(status, tooltip_font, WHITE, (0, 0, 0), 10, tooltip_y, 1)
+            
+        # Hiển thị hint về placement grid (nằm ở panel dưới)
+        if panels:
+            grid_status = "ON" if getattr(self, 'show_placement_grid', True) else "OFF"
+            grid_hint = f"Placement Grid: {grid_status} (G)"
+            self.screen.blit(self.font.render(grid_hint, True, (180, 180, 180)), (8, HEIGHT - 25))
+
+        # VẼ PLACEMENT GRID Ở ĐÂY ĐỂ ĐẢM BẢO KHÔNG BỊ CHE
+        if getattr(self, 'show_placement_grid', True) and hasattr(self, 'tower_slots'):
+            decoration_positions = set()
+            if hasattr(self, 'decorative_objects'):
+                decoration_positions = {decoration["pos"] for decoration in self.decorative_objects}
+                
+            for (gx, gy) in self.tower_slots:
+                if (gx, gy) not in decoration_positions:  # Không vẽ lên decorations
+                    center_x = gx*TILE + TILE//2
+                    center_y = gy*TILE + TILE//2
+                    
+                    if (gx, gy) in self.occupied:
+                        # Ô có tower - viền xanh đậm
+                        rect = pygame.Rect(gx*TILE + 1, gy*TILE + 1, TILE-2, TILE-2)
+                        pygame.draw.rect(self.screen, (0, 255, 0), rect, width=4, border_radius=8)
+                    else:
+                        # Ô có thể đặt tower - dấu "+" trắng nổi bật
+                        # Dấu + với outline đen
+                        for dx, dy in [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)]:
+                            pygame.draw.line(self.screen, (0, 0, 0), 
+                                           (center_x - 15 + dx, center_y + dy), 
+                                           (center_x + 15 + dx, center_y + dy), 4)
+                            pygame.draw.line(self.screen, (0, 0, 0), 
+                                           (center_x + dx, center_y - 15 + dy), 
+                                           (center_x + dx, center_y + 15 + dy), 4)
+                        # Dấu + trắng chính
+                        pygame.draw.line(self.screen, (255, 255, 255), 
+                                       (center_x - 15, center_y), (center_x + 15, center_y), 4)
+                        pygame.draw.line(self.screen, (255, 255, 255), 
+                                       (center_x, center_y - 15), (center_x, center_y + 15), 4)
+    
+    def _draw_hud_panels(self):
+        """Phần HUD nằm ngoài map: panel hỗ trợ, trạng thái, tầm bắn, thành phần wave, âm thanh, hotbar."""
         # --- Panel Hỗ trợ (Freeze/Airstrike) - Hiển thị luôn ---
         panel_x = GAME_WIDTH + 5   # Giảm margin để phù hợp với vùng click
         panel_y = 25               # Điều chỉnh để phù hợp
@@ -6249,6 +6334,8 @@ class Game:
             self.screen.blit(small_font.render(specs, True, WHITE), (panel_x, guide_y + 18))
             color = GREEN if tower.can_upgrade() else GRAY
             self.screen.blit(small_font.render(upgrade_text, True, color), (panel_x, guide_y + 36))
+            priority_text = f"Ưu tiên: {TARGET_PRIORITY_NAMES.get(tower.priority, tower.priority)} (T: đổi)"
+            self.screen.blit(small_font.render(priority_text, True, CYAN), (panel_x, guide_y + 54))
         else:
             # Hướng dẫn sử dụng - gọn
             self.screen.blit(self._get_font(18, bold=True).render("TẦM BẮN", True, WHITE), (panel_x, guide_y))
@@ -6359,85 +6446,6 @@ class Game:
                 border_color = YELLOW if self.in_setup_phase else ORANGE
                 pygame.draw.rect(self.screen, border_color, r, width=3, border_radius=10)
 
-        # Gợi ý nâng cấp / trạng thái wave / thông tin decoration
-        mx, my = pygame.mouse.get_pos()
-        gx, gy = px_to_grid(mx, my)
-        t = self._find_tower_at((gx,gy))
-        
-        # Sử dụng font nhỏ hơn với viền cho tooltip để đọc rõ hơn
-        tooltip_font = self._get_font(14)
-        tooltip_y = 70  # Đặt thấp hơn để không đè lên HUD chính
-        
-        if t:
-            up_txt = "MAX" if not t.can_upgrade() else f"Upgrade: ${t.upgrade_cost()}"
-            tip = f"{TOWER_DEFS[t.ttype]['name']} Lv{t.level} | Rng {int(t.range)} | FR {t.fire_rate:.2f}/s | Dmg {t.damage} | {up_txt}"
-            self._draw_text_with_outline(tip, tooltip_font, WHITE, (0, 0, 0), 10, tooltip_y, 1)
-        elif (gx, gy) in getattr(self, 'tower_slots', set()) and (gx, gy) not in self.occupied:
-            # Thông tin về ô đặt tower với viền
-            self._draw_text_with_outline("Ô đặt trụ - Click để đặt trụ đã chọn", tooltip_font, (150, 255, 150), (0, 0, 0), 10, tooltip_y, 1)
-        elif hasattr(self, 'decorative_objects'):
-            # Kiểm tra hover qua decoration
-            decoration_info = self._get_decoration_at(gx, gy)
-            if decoration_info:
-                decoration_names = {
-                    "broken_tower": "Tháp cổ bị hư hỏng",
-                    "dead_tree": "Cây khô héo", 
-                    "rocks": "Những tảng đá cổ",
-                    "thorns": "Bụi gai sắc nhọn",
-                    "ruins": "Tàn tích cổ đại",
-                    "crystal": "Pha lê năng lượng",
-                    "bones": "Hài cốt cổ"
-                }
-                name = decoration_names.get(decoration_info, "Vật trang trí")
-                self._draw_text_with_outline(f"{name} - Không thể đặt trụ ở đây", tooltip_font, (200, 200, 100), (0, 0, 0), 10, tooltip_y, 1)
-            else:
-                # Thông tin wave thông thường với viền
-                if self.wave_mgr.active: status = f"Đang sinh: còn {self.wave_mgr.enemies_left_to_spawn} địch"
-                elif self.wave_mgr.is_between_waves(): status = f"Nghỉ wave: {self.wave_mgr.cooldown:.1f}s"
-                else: status = "Chuẩn bị wave tiếp theo..."
-                self._draw_text_with_outline(status, tooltip_font, WHITE, (0, 0, 0), 10, tooltip_y, 1)
-        else:
-            if self.wave_mgr.active: status = f"Đang sinh: còn {self.wave_mgr.enemies_left_to_spawn} địch"
-            elif self.wave_mgr.is_between_waves(): status = f"Nghỉ wave: {self.wave_mgr.cooldown:.1f}s"
-            else: status = "Chuẩn bị wave tiếp theo..."
-            self._draw_text_with_outline(status, tooltip_font, WHITE, (0, 0, 0), 10, tooltip_y, 1)
-            
-        # Hiển thị hint về placement grid
-        grid_status = "ON" if getattr(self, 'show_placement_grid', True) else "OFF"
-        grid_hint = f"Placement Grid: {grid_status} (G)"
-        self.screen.blit(self.font.render(grid_hint, True, (180, 180, 180)), (8, HEIGHT - 25))
-
-        # VẼ PLACEMENT GRID Ở ĐÂY ĐỂ ĐẢM BẢO KHÔNG BỊ CHE
-        if getattr(self, 'show_placement_grid', True) and hasattr(self, 'tower_slots'):
-            decoration_positions = set()
-            if hasattr(self, 'decorative_objects'):
-                decoration_positions = {decoration["pos"] for decoration in self.decorative_objects}
-                
-            for (gx, gy) in self.tower_slots:
-                if (gx, gy) not in decoration_positions:  # Không vẽ lên decorations
-                    center_x = gx*TILE + TILE//2
-                    center_y = gy*TILE + TILE//2
-                    
-                    if (gx, gy) in self.occupied:
-                        # Ô có tower - viền xanh đậm
-                        rect = pygame.Rect(gx*TILE + 1, gy*TILE + 1, TILE-2, TILE-2)
-                        pygame.draw.rect(self.screen, (0, 255, 0), rect, width=4, border_radius=8)
-                    else:
-                        # Ô có thể đặt tower - dấu "+" trắng nổi bật
-                        # Dấu + với outline đen
-                        for dx, dy in [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)]:
-                            pygame.draw.line(self.screen, (0, 0, 0), 
-                                           (center_x - 15 + dx, center_y + dy), 
-                                           (center_x + 15 + dx, center_y + dy), 4)
-                            pygame.draw.line(self.screen, (0, 0, 0), 
-                                           (center_x + dx, center_y - 15 + dy), 
-                                           (center_x + dx, center_y + 15 + dy), 4)
-                        # Dấu + trắng chính
-                        pygame.draw.line(self.screen, (255, 255, 255), 
-                                       (center_x - 15, center_y), (center_x + 15, center_y), 4)
-                        pygame.draw.line(self.screen, (255, 255, 255), 
-                                       (center_x, center_y - 15), (center_x, center_y + 15), 4)
-    
     def _get_decoration_at(self, gx, gy):
         """Lấy thông tin decoration tại vị trí (gx, gy)."""
         if hasattr(self, 'decorative_objects'):
@@ -6717,6 +6725,8 @@ class Game:
 
 # ------------------- MAIN -------------------
 def main():
+    # Log ghi trên thread riêng, tự xử lý UTF-8 cho console Windows (không bọc lại sys.stdout nữa)
+    game_log.configure()
     Game().run()
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 import pygame
 from typing import Callable
 from config import WHITE, ORANGE
+from text_cache import get_font
 
 class Button:
     def __init__(self, rect, text, on_click, bg=(70,90,120), fg=WHITE):
@@ -66,6 +67,6 @@ def draw_level_badge(surface, x, y, lvl: int, small=False):
 
     pygame.draw.circle(surface, (0, 0, 0), (x, y), r + 2)  # viền đen
     pygame.draw.circle(surface, bg, (x, y), r)
-    f = pygame.font.SysFont("consolas", font_size, bold=True)
+    f = get_font(font_size, bold=True, names=("consolas",))
     txt = f.render(str(lvl), True, (30, 30, 30))
     surface.blit(txt, txt.get_rect(center=(x, y)))
@@ -2,6 +2,10 @@ import os, json, time, math, random
 import pygame
 from typing import List, Tuple, Optional, Set, Dict
 from config import ASSETS_DIR, SAVE_FILE, ACCOUNTS_FILE, TILE
+from asset_manager import assets
+from game_log import get_logger
+
+save_log = get_logger("save")
 
 # Grid helpers
 
@@ -15,13 +19,8 @@ def clamp(v, lo, hi): return max(lo, min(hi, v))
 
 # Image/sprite loading
 def load_img(path, size=None):
-    try:
-        img = pygame.image.load(path).convert_alpha()
-        if size:
-            img = pygame.transform.smoothscale(img, size)
-        return img
-    except Exception:
-        return None
+    # Qua asset cache dùng chung: vào level mới / đổi scene không đọc lại file
+    return assets.image(path, size)
 
 def load_sprite(filename: str, size: int):
     return load_img(os.path.join(ASSETS_DIR, filename), (size, size))
@@ -50,16 +49,20 @@ def try_tileset():
     return tiles
 
 # Sound helpers
+SHOOT_SOUND_FILES = ["shoot.wav", os.path.join(ASSETS_DIR, "shoot.wav")]  # Thứ tự ưu tiên
+
 def load_shoot_sound():
     try:
         if not pygame.mixer.get_init():
             pygame.mixer.init(frequency=22050, size=-16, channels=1)
     except Exception:
         return None
-    for fn in ["shoot.wav", os.path.join(ASSETS_DIR, "shoot.wav")]:
+    for fn in SHOOT_SOUND_FILES:
         if os.path.exists(fn):
             try:
-                s = pygame.mixer.Sound(fn); s.set_volume(0.15); return s  # Âm lượng súng
+                s = assets.sound(fn)  # Đã decode sẵn nếu preloader chạy trước
+                if s is not None:
+                    s.set_volume(0.15); return s  # Âm lượng súng
             except Exception: pass
     # No bundled shoot sound found and synth fallback removed for simplicity
     return None
@@ -96,7 +99,7 @@ DEFAULT_SAVE = {
     "achievements": {},
     "leaderboard": [],
     "stars": 0,
-    "settings": {"music": True, "sfx": True, "volume": 0.1},  #Âm lượng nhạc
+    "settings": {"music": True, "sfx": True, "volume": 0.1, "quality": "auto"},  #Âm lượng nhạc, mức đồ họa
 }
 
 SAVE_KEYS_ORDER = list(DEFAULT_SAVE.keys())
@@ -120,7 +123,7 @@ def save_save(data):
         with open(SAVE_FILE,"w",encoding="utf-8") as f:
             json.dump(data,f,ensure_ascii=False,indent=2)
     except Exception as e:
-        print("Save failed:", e)
+        save_log.warning("Save failed: %s", e)
 
 # Accounts (simple wrapper used by game)
 def load_accounts():
@@ -137,4 +140,4 @@ def save_accounts(db: dict):
         with open(ACCOUNTS_FILE, "w", encoding="utf-8") as f:
             json.dump(db, f, ensure_ascii=False, indent=2)
     except Exception as e:
-        print("Save accounts failed:", e)
+        save_log.warning("Save accounts failed: %s", e)
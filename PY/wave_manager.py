@@ -1,11 +1,19 @@
 import random
-from typing import List, Tuple
-from entities import Enemy
+from typing import List, Tuple, Optional
+from entities import Enemy, path_cumulative_lengths
 from config import ENEMY_TYPES, SPAWN_GAP, WAVE_COOLDOWN, BOSS_LEVELS, BOSS_HP_MULTIPLIER, BOSS_REWARD_MULTIPLIER, waves_in_level
+from game_log import get_logger
+
+log = get_logger("waves")        # Mỗi wave / level vài dòng
+spawn_log = get_logger("spawn")  # Mỗi enemy spawn - trong vòng mô phỏng, mặc định tắt
 
 class WaveManager:
-    def __init__(self, paths_px: List[List[Tuple[float, float]]], hp_mul: float = 1.0, spd_mul: float = 1.0, level: int = 1, special_mode: str = None):
+    def __init__(self, paths_px: List[List[Tuple[float, float]]], hp_mul: float = 1.0, spd_mul: float = 1.0, level: int = 1, special_mode: str = None,
+                 rng: Optional[random.Random] = None, junction_rng: Optional[random.Random] = None):
         self.paths = paths_px
+        # 🆕 RNG riêng của wave (chọn loại địch) và của enemy khi chuyển junction - xem rng.MatchRNG
+        self.rng = rng if rng is not None else random.Random()
+        self.junction_rng = junction_rng if junction_rng is not None else self.rng
         self.active = False
         self.wave_no = 0
         self.enemies_left_to_spawn = 0
@@ -15,6 +23,8 @@ class WaveManager:
         self.hp_mul = hp_mul
         self.spd_mul = spd_mul
         self.special_mode = special_mode  # e.g., 'permanent'
+        self.enemy_pool = None  # 🆕 EnemyPool (NumPy) - nếu có thì spawn enemy vào pool
+        self.events = None      # EnemyEvents của thế giới - enemy mới spawn báo chết/thoát vào đây
         self.hp_scale = 1.0
         self.spd_scale = 1.0
         self.is_boss_wave = False
@@ -25,8 +35,10 @@ class WaveManager:
         self.entrance_paths = []  # Paths bắt đầu từ -1 (entrance)
         self.junction_paths = []  # Paths bắt đầu từ điểm giao
         self._separate_paths()
+        # 🆕 Độ dài cộng dồn của từng path (id(path) -> list) để Enemy tính progress liên tục
+        self.path_lengths = {id(path): path_cumulative_lengths(path) for path in self.paths}
         
-        print(f"🛤️  Paths: {len(self.entrance_paths)} entrance + {len(self.junction_paths)} junction = {len(self.paths)} total")
+        log.info("Paths: %d entrance + %d junction = %d total", len(self.entrance_paths), len(self.junction_paths), len(self.paths))
         
         # Tank distribution system (từ level 6+)
         self.tank_waves = []  # Danh sách wave nào có tank
@@ -75,7 +87,7 @@ class WaveManager:
                 wave_index = math.ceil((i + 1) * wave_step)
                 self.tank_waves.append(wave_index)
         
-        print(f"🚗 TANK DISTRIBUTION Level {self.level}: {num_tanks} tanks in waves {self.tank_waves}")
+        log.info("Tank distribution level %d: %d tanks in waves %s", self.level, num_tanks, self.tank_waves)
 
     def start_next_wave(self):
         self.wave_no += 1
@@ -98,14 +110,15 @@ class WaveManager:
         # Check if this wave has tanks
         self.current_wave_has_tank = self.wave_no in self.tank_waves
         
-        print(f"🔧 SET is_boss_wave = {self.is_boss_wave} (level {self.level} in BOSS_LEVELS: {self.level in BOSS_LEVELS}, wave {self.wave_no} == max {max_waves_in_level}: {self.wave_no == max_waves_in_level})")
+        log.debug("is_boss_wave = %s (level %d in BOSS_LEVELS: %s, wave %d / max %d)",
+                  self.is_boss_wave, self.level, self.level in BOSS_LEVELS, self.wave_no, max_waves_in_level)
         if self.current_wave_has_tank:
-            print(f"🚗 TANK WAVE! Level {self.level}, Wave {self.wave_no}")
+            log.info("Tank wave: level %d, wave %d", self.level, self.wave_no)
         
         if self.is_boss_wave:
             self.boss_group = self._create_boss_group()
             self.enemies_left_to_spawn = len(self.boss_group)
-            print(f"🔥🔥🔥 BOSS WAVE! Level {self.level}, Wave {self.wave_no}, Group: {self.boss_group} 🔥🔥🔥")
+            log.info("BOSS WAVE: level %d, wave %d, group %s", self.level, self.wave_no, self.boss_group)
         else:
             self.boss_group = None
             self.enemies_left_to_spawn = size
@@ -136,7 +149,8 @@ class WaveManager:
         return group
 
     def _pick_enemy_type(self):
-        print(f"🔍 _pick_enemy_type: is_boss_wave={self.is_boss_wave}, boss_group={self.boss_group}, enemies_left={self.enemies_left_to_spawn}")
+        spawn_log.debug("_pick_enemy_type: is_boss_wave=%s, boss_group=%s, enemies_left=%d",
+                        self.is_boss_wave, self.boss_group, self.enemies_left_to_spawn)
         if self.is_boss_wave and self.boss_group:
             # enemies_left_to_spawn is decremented BEFORE calling this method
             # So enemies_left represents remaining enemies after current spawn
@@ -145,14 +159,11 @@ class WaveManager:
             # enemies_left=0 means this is the second spawn (1→0), should return boss_group[1]
             if self.enemies_left_to_spawn < len(self.boss_group):
                 spawned_index = len(self.boss_group) - 1 - self.enemies_left_to_spawn
-                print(f"🔍 Boss index calc: len={len(self.boss_group)}, enemies_left={self.enemies_left_to_spawn}, spawned_index={spawned_index}")
                 enemy_type = self.boss_group[spawned_index]
-                print(f"🔍 Returning BOSS enemy: {enemy_type}")
+                spawn_log.debug("Boss group index %d/%d -> %s", spawned_index, len(self.boss_group), enemy_type)
                 return enemy_type
             else:
-                print(f"❌ enemies_left >= group size: {self.enemies_left_to_spawn}")
-        else:
-            print(f"🔍 Not boss wave or no boss_group")
+                spawn_log.debug("enemies_left >= group size: %d", self.enemies_left_to_spawn)
         
         # Tank distribution system - guaranteed tanks in specified waves
         if self.current_wave_has_tank and self.level >= 6:
@@ -163,14 +174,14 @@ class WaveManager:
             remaining_enemies = self.enemies_left_to_spawn
             spawned_count = total_enemies - remaining_enemies - 1  # -1 because current spawn is in progress
             
-            print(f"🚗 Tank check: total={total_enemies}, remaining={remaining_enemies}, spawned={spawned_count}")
+            spawn_log.debug("Tank check: total=%d, remaining=%d, spawned=%d", total_enemies, remaining_enemies, spawned_count)
             
             if spawned_count == 0:  # This is the first enemy in the wave - should be tank
-                print(f"🚗 Spawning TANK (guaranteed - first enemy in tank wave)")
+                spawn_log.debug("Spawning tank (guaranteed - first enemy in tank wave)")
                 return "tank"
         
         # Regular enemy distribution cho non-tank enemies
-        r = random.random()
+        r = self.rng.random()
         if self.wave_no >= 4 and r < 0.45: 
             return "fast"
         return "normal"
@@ -193,9 +204,9 @@ class WaveManager:
             et = self._pick_enemy_type()
             base = ENEMY_TYPES[et]
             
-            print(f"⚡ SPAWNING: {et}")
+            spawn_log.debug("Spawning: %s", et)
             if et == "boss":
-                print("👑👑👑 COMMANDER BOSS HAS ARRIVED! 👑👑👑")
+                log.info("Commander boss has arrived")
             
             if et == "boss":
                 hp = base["hp"] * BOSS_HP_MULTIPLIER * self.hp_scale
@@ -212,15 +223,21 @@ class WaveManager:
                     # Xoay vòng toàn cục để đảm bảo tất cả entrance paths được dùng qua các waves
                     path_id = self.global_enemy_count % len(self.entrance_paths)
                     path = self.entrance_paths[path_id]
-                    print(f"🚶 {et.upper()} spawning from entrance path {path_id}/{len(self.entrance_paths)} (global rotation #{self.global_enemy_count})")
+                    spawn_log.debug("%s spawning from entrance path %d/%d (global rotation #%d)",
+                                    et, path_id, len(self.entrance_paths), self.global_enemy_count)
                 else:
                     path = self.entrance_paths[0]
-                    print(f"🚶 {et.upper()} spawning from single entrance path")
+                    spawn_log.debug("%s spawning from single entrance path", et)
                 self.global_enemy_count += 1
             else:
-                path = random.choice(self.paths)  # Fallback nếu không có entrance paths
+                path = self.rng.choice(self.paths)  # Fallback nếu không có entrance paths
             
-            enemy = Enemy(path, hp, spd, reward, etype=et)
+            if self.enemy_pool is not None:
+                enemy = self.enemy_pool.spawn(path, hp, spd, reward, etype=et, path_lengths=self.path_lengths,
+                                              rng=self.junction_rng, events=self.events)
+            else:
+                enemy = Enemy(path, hp, spd, reward, etype=et, path_lengths=self.path_lengths, rng=self.junction_rng,
+                              events=self.events)
             
             # 🆕 Cho enemy biết về junction paths để có thể chuyển đường
             if hasattr(enemy, 'set_junction_paths'):